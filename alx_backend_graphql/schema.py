@@ -1,7 +1,10 @@
 import graphene
-from crm.schema import CRMQuery  # make sure this import matches your crm/schema.py location
+from crm.schema import Query as CRMQuery, Mutation as CRMMutation
 
 class Query(CRMQuery, graphene.ObjectType):
     pass
 
-schema = graphene.Schema(query=Query)
+class Mutation(CRMMutation, graphene.ObjectType):
+    pass
+
+schema = graphene.Schema(query=Query, mutation=Mutation)
@@ -10,6 +10,7 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/5.2/ref/settings/
 """
 
+import os
 from pathlib import Path
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -43,6 +44,85 @@ INSTALLED_APPS = [
     'django_crontab',
 ]
 
+GRAPHENE = {
+    'SCHEMA': 'alx_backend_graphql.schema.schema',
+}
+
+# Serve /graphql with crm.views.AsyncGraphQLView (async resolvers on the event loop).
+# asgi.py turns this on; WSGI deployments keep the sync CachedGraphQLView.
+GRAPHQL_ASYNC = os.environ.get('GRAPHQL_ASYNC', '0') == '1'
+
+# Parsed/validated documents and persisted queries kept by crm.views.CachedGraphQLView
+GRAPHQL_DOCUMENT_CACHE_SIZE = 256
+GRAPHQL_PERSISTED_QUERY_CACHE_SIZE = 1024
+
+# Most operations accepted in one batched POST (a JSON array of operations) to /graphql.
+GRAPHQL_MAX_BATCH_SIZE = 10
+
+# Response cache for read-heavy catalog queries, invalidated by model writes.
+# 'local' is per process: with several workers each caches on its own and misses
+# the others' invalidations until TIMEOUT. Use 'BACKEND': 'django' with a shared
+# CACHES[CACHE_ALIAS] (e.g. Redis) when more than one process serves /graphql.
+GRAPHQL_RESPONSE_CACHE = {
+    'BACKEND': 'local',
+    'CACHE_ALIAS': 'default',
+    'FIELDS': ['allProducts'],
+    'TIMEOUT': 300,
+    'MAX_ENTRIES': 1000,
+}
+
+# Counts for allOrders/allCustomers(countStrategy: CACHED | APPROXIMATE), see crm/counts.py.
+# Cached counts live TIMEOUT seconds or until a write to a table they read; estimates
+# sample SAMPLE_SIZE primary keys and count exactly below MIN_SAMPLE_MATCHES hits.
+GRAPHQL_COUNTS = {
+    'BACKEND': 'local',
+    'CACHE_ALIAS': 'default',
+    'TIMEOUT': 60,
+    'MAX_ENTRIES': 1000,
+    'SAMPLE_SIZE': 1000,
+    'MIN_SAMPLE_MATCHES': 10,
+}
+
+# Static cost/depth budget checked by crm.views.CachedGraphQLView before execution.
+# Connections cost first/last (or RELAY_CONNECTION_MAX_LIMIT) times their nodes,
+# other list fields DEFAULT_LIST_SIZE; FIELD_WEIGHTS overrides 'Type.field' weights.
+GRAPHQL_QUERY_COST = {
+    'MAX_COST': 50000,
+    'MAX_DEPTH': 5,
+    'DEFAULT_LIST_SIZE': 10,
+    'FIELD_WEIGHTS': {},
+}
+
+# Per-request resolver/SQL tracing (crm/tracing.py), returned in response extensions.
+# Enable for one request with the HEADER, or for every request with ENABLED.
+GRAPHQL_TRACING = {
+    'ENABLED': False,
+    'HEADER': 'X-GraphQL-Tracing',
+    'N_PLUS_ONE_THRESHOLD': 3,
+}
+
+# Client used by cron jobs (crm/executor.py): 'local' runs documents in-process
+# against the schema, 'http' posts them to URL through the web tier.
+GRAPHQL_CLIENT = {
+    'TRANSPORT': os.environ.get('GRAPHQL_CLIENT_TRANSPORT', 'local'),
+    'URL': os.environ.get('GRAPHQL_CLIENT_URL', 'http://localhost:8000/graphql'),
+}
+
+# Bulk imports (crm/imports.py): `startImport` reads server-side paths only under ROOT,
+# and dispatches CHUNK_SIZE rows per crm.tasks.import_chunk Celery task.
+CRM_IMPORT = {
+    'ROOT': os.environ.get('CRM_IMPORT_ROOT', str(BASE_DIR / 'imports')),
+    'CHUNK_SIZE': 1000,
+    'MAX_CHUNK_SIZE': 10000,
+}
+
+# Celery, for tasks enqueued by the web process (`celery -A crm worker` runs them).
+# CELERY_TASK_ALWAYS_EAGER=1 runs them inline instead, without a broker.
+CELERY_BROKER_URL = os.environ.get('CELERY_BROKER_URL', 'redis://localhost:6379/0')
+CELERY_TASK_ALWAYS_EAGER = os.environ.get('CELERY_TASK_ALWAYS_EAGER', '0') == '1'
+CELERY_ACCEPT_CONTENT = ['json']
+CELERY_TASK_SERIALIZER = 'json'
+
 CRONJOBS = [
     ('*/5 * * * *', 'crm.cron.log_crm_heartbeat'),
 ]
@@ -87,6 +167,27 @@ DATABASES = {
     }
 }
 
+# Read replicas for GraphQL query operations (crm/routing.py). To try it locally with
+# SQLite, copy db.sqlite3 and point CRM_REPLICA_DB at the copy; mutations still write
+# to db.sqlite3, so the copy only sees them once it is copied again.
+if os.environ.get('CRM_REPLICA_DB'):
+    DATABASES['replica'] = {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': os.environ['CRM_REPLICA_DB'],
+        'TEST': {'MIRROR': 'default'},
+    }
+
+DATABASE_ROUTERS = ['crm.routing.PrimaryReplicaRouter']
+
+# REPLICAS are tried in turn; one that fails is skipped for RETRY_AFTER seconds. After a
+# mutation the client reads from the primary for STICKY_SECONDS (request flag + COOKIE).
+CRM_DATABASE_ROUTING = {
+    'REPLICAS': [alias for alias in DATABASES if alias != 'default'],
+    'STICKY_SECONDS': 5,
+    'RETRY_AFTER': 30,
+    'COOKIE': 'crm_primary_until',
+}
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
@@ -1,9 +1,16 @@
+from django.conf import settings
 from django.contrib import admin
 from django.urls import path
-from graphene_django.views import GraphQLView
 from django.views.decorators.csrf import csrf_exempt
+from crm.exports import export_view
+from crm.metrics import metrics_view
+from crm.views import AsyncGraphQLView, CachedGraphQLView
+
+GraphQLView = AsyncGraphQLView if getattr(settings, 'GRAPHQL_ASYNC', False) else CachedGraphQLView
 
 urlpatterns = [
     path('admin/', admin.site.urls),
     path('graphql', csrf_exempt(GraphQLView.as_view(graphiql=True))),
+    path('metrics', metrics_view),
+    path('export/<str:kind>', export_view),
 ]
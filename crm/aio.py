@@ -0,0 +1,35 @@
+import asyncio
+
+from asgiref.sync import sync_to_async
+
+# -----------------------------
+# Sync/async resolver support
+# -----------------------------
+#
+# The same schema serves CachedGraphQLView (sync, resolvers run in a worker
+# thread) and AsyncGraphQLView (resolvers run on the event loop). Resolvers
+# that touch the database check which side they are on and, on the event
+# loop, return awaitables built on Django's async ORM so graphql-core can
+# gather sibling fields concurrently.
+
+
+def in_event_loop():
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        return False
+    return True
+
+
+def call_sync(fn, *args, **kwargs):
+    """Call `fn`, or on the event loop return an awaitable running it in the request's DB thread.
+
+    For work that needs transaction.atomic(), which the async ORM doesn't offer.
+    """
+    if in_event_loop():
+        return sync_to_async(fn)(*args, **kwargs)
+    return fn(*args, **kwargs)
+
+
+async def alist(queryset):
+    return [obj async for obj in queryset]
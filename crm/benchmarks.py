@@ -0,0 +1,192 @@
+import itertools
+import random
+import time
+from contextlib import nullcontext
+from dataclasses import dataclass
+from types import SimpleNamespace
+
+from django.db import transaction
+from graphql import execute, parse, validate
+
+from . import metrics
+from .models import Customer, Order, Product
+
+# -----------------------------
+# GraphQL benchmarks
+# -----------------------------
+#
+# A fixed set of representative operations run straight against the schema
+# (parsed and validated once, like CachedGraphQLView's document cache) on
+# whatever data is loaded, e.g. by `manage.py seed_crm`. Mutations run in a
+# transaction that is rolled back, so repeated runs see the same dataset.
+
+
+@dataclass
+class Operation:
+    name: str
+    query: str
+    variables: object = None  # callable(rng, sample) -> dict
+    mutation: bool = False
+    needs: tuple = ()  # sample keys the variables draw from; must be non-empty
+
+
+ORDER_FIELDS = """
+  edges {
+    node {
+      id
+      totalAmount
+      orderDate
+      customer { name email }
+      products { edges { node { name price } } }
+    }
+  }
+  pageInfo { hasNextPage endCursor }
+"""
+
+PRODUCT_FIELDS = """
+  edges { node { id name price stock } }
+  pageInfo { hasNextPage endCursor }
+"""
+
+_emails = itertools.count()
+
+
+def _new_customers(rng, sample, count=100):
+    run = next(_emails)
+    return {'input': [
+        {'name': f"Bench {run}-{i}", 'email': f"bench-{run}-{i}-{rng.randrange(10 ** 9)}@bench.example.com"}
+        for i in range(count)
+    ]}
+
+
+OPERATIONS = [
+    Operation(
+        'allOrders.filtered',
+        'query($min: Decimal, $since: Date) { allOrders(first: 50, totalAmountGte: $min, orderDateGte: $since, '
+        'orderBy: "-order_date") {' + ORDER_FIELDS + '} }',
+        lambda rng, sample: {'min': str(rng.choice([10, 100, 500])), 'since': sample['since']},
+    ),
+    Operation(
+        'allOrders.keyset',
+        '{ allOrders(first: 50, keyset: true, orderBy: "-total_amount") {' + ORDER_FIELDS + '} }',
+    ),
+    Operation(
+        'allOrders.byCustomer',
+        'query($q: String) { allOrders(first: 20, customerSearch: $q) {' + ORDER_FIELDS + '} }',
+        lambda rng, sample: {'q': rng.choice(['smith', 'alice', 'garcia', 'young'])},
+    ),
+    Operation(
+        'allProducts.byPrice',
+        'query($min: Decimal) { allProducts(first: 50, orderBy: "price", priceGte: $min) {' + PRODUCT_FIELDS + '} }',
+        lambda rng, sample: {'min': str(rng.choice([1, 50, 500]))},
+    ),
+    Operation(
+        'allProducts.byStock',
+        '{ allProducts(first: 50, orderBy: "-stock") {' + PRODUCT_FIELDS + '} }',
+    ),
+    Operation(
+        'bulkCreateCustomers',
+        'mutation($input: [CreateCustomerInput]!) { bulkCreateCustomers(input: $input) { customers { id } errors } }',
+        _new_customers,
+        mutation=True,
+    ),
+    Operation(
+        'createOrder',
+        'mutation($input: CreateOrderInput!) { createOrder(input: $input) { order { id totalAmount } message } }',
+        lambda rng, sample: {'input': {
+            'customerId': rng.choice(sample['customers']),
+            'productIds': rng.sample(sample['products'], min(3, len(sample['products']))),
+        }},
+        mutation=True,
+        needs=('customers', 'products'),
+    ),
+]
+
+
+def sample_data(size=1000):
+    """Pick ids and dates that operation variables draw from."""
+    latest = Order.objects.order_by('-order_date').values_list('order_date', flat=True).first()
+    return {
+        'customers': list(Customer.objects.order_by('?').values_list('pk', flat=True)[:size]),
+        'products': list(Product.objects.order_by('?').values_list('pk', flat=True)[:size]),
+        'since': (latest.date().replace(day=1).isoformat() if latest else None),
+    }
+
+
+def percentile(values, fraction):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(fraction * (len(ordered) - 1))))]
+
+
+def run_operation(schema, operation, sample, iterations=50, warmup=3, rng=None):
+    """Run one operation; return latency percentiles (ms), queries per run and throughput."""
+    rng = rng or random.Random(0)
+    missing = [key for key in operation.needs if not sample.get(key)]
+    if missing:
+        raise ValueError(f"{operation.name}: no {' or '.join(missing)} to draw from; load data with seed_crm first.")
+    document = parse(operation.query)
+    errors = validate(schema.graphql_schema, document)
+    if errors:
+        raise ValueError(f"{operation.name}: {errors[0].message}")
+
+    timings = []
+    queries = []
+    started = time.perf_counter()
+    for i in range(warmup + iterations):
+        variables = operation.variables(rng, sample) if operation.variables else None
+        context = SimpleNamespace()
+        with (transaction.atomic() if operation.mutation else nullcontext()), metrics.count_queries() as counter:
+            start = time.perf_counter()
+            result = execute(schema.graphql_schema, document, context_value=context, variable_values=variables)
+            elapsed = time.perf_counter() - start
+            if operation.mutation:
+                transaction.set_rollback(True)
+        if result.errors:
+            raise ValueError(f"{operation.name}: {result.errors[0].message}")
+        if i < warmup:
+            started = time.perf_counter()
+            continue
+        timings.append(elapsed)
+        queries.append(counter.count)
+
+    total = time.perf_counter() - started
+    return {
+        'p50_ms': round(percentile(timings, 0.50) * 1000, 3),
+        'p95_ms': round(percentile(timings, 0.95) * 1000, 3),
+        'mean_ms': round(sum(timings) / len(timings) * 1000, 3),
+        'queries': round(sum(queries) / len(queries), 2),
+        'ops_per_sec': round(iterations / total, 1),
+    }
+
+
+def run(schema, iterations=50, warmup=3, names=None, random_seed=0):
+    sample = sample_data()
+    rng = random.Random(random_seed)
+    results = {}
+    for operation in OPERATIONS:
+        if names and operation.name not in names:
+            continue
+        results[operation.name] = run_operation(schema, operation, sample, iterations, warmup, rng)
+    return results
+
+
+def dataset_size():
+    return {
+        'customers': Customer.objects.count(),
+        'products': Product.objects.count(),
+        'orders': Order.objects.count(),
+    }
+
+
+def compare(results, baseline):
+    """Return {operation: {metric: relative change}} for operations present in both runs."""
+    changes = {}
+    for name, current in results.items():
+        previous = baseline.get(name)
+        if not previous:
+            continue
+        changes[name] = {
+            metric: (value - previous[metric]) / previous[metric] if previous.get(metric) else None
+            for metric, value in current.items()
+        }
+    return changes
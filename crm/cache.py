@@ -0,0 +1,297 @@
+import hashlib
+import json
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.cache import caches
+from graphql import OperationType, TypeInfo, TypeInfoVisitor, Visitor, get_named_type, visit
+from graphql.language import FieldNode, OperationDefinitionNode
+
+from . import metrics
+
+
+# -----------------------------
+# In-process LRU
+# -----------------------------
+class LRUCache:
+    """Thread-safe LRU mapping with hit/miss counters, exported to /metrics under `name` if given."""
+
+    def __init__(self, maxsize=256, name=None):
+        self.maxsize = maxsize
+        self.name = name
+        self.hits = 0
+        self.misses = 0
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            try:
+                value = self._data[key]
+            except KeyError:
+                self.misses += 1
+                value = None
+            else:
+                self._data.move_to_end(key)
+                self.hits += 1
+        if self.name is not None:
+            metrics.record_cache_lookup(self.name, value is not None)
+        return value
+
+    def set(self, key, value):
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+            self.hits = self.misses = 0
+
+    def __len__(self):
+        return len(self._data)
+
+    def stats(self):
+        return {'size': len(self._data), 'maxsize': self.maxsize, 'hits': self.hits, 'misses': self.misses}
+
+
+# -----------------------------
+# Response cache backends
+# -----------------------------
+#
+# Entries are invalidated by tag versioning: every cache key embeds the
+# current version of each tag (model) the response read, and a write to a
+# model bumps its version so older keys are simply never looked up again.
+class LocalCacheBackend:
+    """Per-process backend: every worker caches separately and never sees the others' invalidations.
+
+    Fine for runserver and single-process deployments; use the 'django'
+    backend on a shared cache when several workers serve /graphql.
+    """
+
+    def __init__(self, max_entries=1000):
+        self.entries = LRUCache(max_entries)
+        self.versions = {}
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        entry = self.entries.get(key)
+        if entry is None or entry[0] < time.monotonic():
+            return None
+        return entry[1]
+
+    def set(self, key, value, timeout):
+        self.entries.set(key, (time.monotonic() + timeout, value))
+
+    def get_versions(self, tags):
+        return [self.versions.get(tag, 0) for tag in tags]
+
+    def bump(self, tags):
+        with self._lock:
+            for tag in tags:
+                self.versions[tag] = self.versions.get(tag, 0) + 1
+
+    def clear(self):
+        self.entries.clear()
+        with self._lock:
+            self.versions.clear()
+
+
+class DjangoCacheBackend:
+    """Backend on Django's cache framework, e.g. the Redis already run for Celery."""
+
+    def __init__(self, alias='default'):
+        self.cache = caches[alias]
+
+    def get(self, key):
+        return self.cache.get(key)
+
+    def set(self, key, value, timeout):
+        self.cache.set(key, value, timeout)
+
+    def get_versions(self, tags):
+        keys = [f'graphql:tag:{tag}' for tag in tags]
+        found = self.cache.get_many(keys)
+        return [found.get(key, 0) for key in keys]
+
+    def bump(self, tags):
+        for tag in tags:
+            key = f'graphql:tag:{tag}'
+            try:
+                self.cache.incr(key)
+            except ValueError:
+                # Concurrent first writes may both land here; either way the
+                # version moves past 0, which is all invalidation needs.
+                if not self.cache.add(key, 1, timeout=None):
+                    self.cache.incr(key)
+
+    def clear(self):
+        self.cache.clear()
+
+
+BACKENDS = {
+    'local': lambda config: LocalCacheBackend(config.get('MAX_ENTRIES', 1000)),
+    'django': lambda config: DjangoCacheBackend(config.get('CACHE_ALIAS', 'default')),
+}
+
+
+# -----------------------------
+# Response cache
+# -----------------------------
+def model_tag(model):
+    return model._meta.label_lower
+
+
+def document_tags(schema, document):
+    """Return (root field names, model tags) read by the query operations of a document."""
+    type_info = TypeInfo(schema)
+    root_fields = set()
+    tags = set()
+
+    class TagCollector(Visitor):
+        def enter_operation_definition(self, node, *args):
+            for selection in node.selection_set.selections:
+                if isinstance(selection, FieldNode):
+                    root_fields.add(selection.name.value)
+
+        def enter_field(self, node, *args):
+            graphene_type = getattr(get_named_type(type_info.get_type()), 'graphene_type', None)
+            model = getattr(getattr(graphene_type, '_meta', None), 'model', None)
+            if model is not None:
+                tags.add(model_tag(model))
+
+    visit(document, TypeInfoVisitor(type_info, TagCollector()))
+    return root_fields, sorted(tags)
+
+
+class ResponseCache:
+    """Caches query results by operation and variables, tagged by the models they read."""
+
+    def __init__(self, backend, fields=(), timeout=300):
+        self.backend = backend
+        self.fields = set(fields)
+        self.timeout = timeout
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+        self._plans = LRUCache(1024)
+
+    def plan(self, schema, document, query_key):
+        """Return the model tags for a document, or None if it is not cacheable."""
+        plan = self._plans.get(query_key)
+        if plan is None:
+            operations = [d for d in document.definitions if isinstance(d, OperationDefinitionNode)]
+            root_fields, tags = document_tags(schema, document)
+            cacheable = (
+                bool(root_fields)
+                and root_fields <= self.fields
+                and all(op.operation == OperationType.QUERY for op in operations)
+            )
+            # Wrapped in a tuple so an uncacheable (None) plan is still a cache hit.
+            plan = (tags if cacheable else None,)
+            self._plans.set(query_key, plan)
+        return plan[0]
+
+    def key(self, query_key, operation_name, variables, tags):
+        versions = self.backend.get_versions(tags)
+        raw = json.dumps([query_key, operation_name, variables, versions], sort_keys=True, default=str)
+        return 'graphql:response:' + hashlib.sha256(raw.encode('utf-8')).hexdigest()
+
+    def get(self, key):
+        data = self.backend.get(key)
+        if data is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        metrics.record_cache_lookup('response', data is not None)
+        return data
+
+    def set(self, key, data):
+        self.backend.set(key, data, self.timeout)
+
+    def invalidate(self, *models):
+        self.invalidations += 1
+        metrics.cache_invalidations.labels('response').inc()
+        self.backend.bump([model_tag(model) for model in models])
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hits / lookups if lookups else 0.0,
+            'invalidations': self.invalidations,
+        }
+
+
+def build_response_cache(config):
+    if not config:
+        return None
+    backend = BACKENDS[config.get('BACKEND', 'local')](config)
+    return ResponseCache(backend, fields=config.get('FIELDS', ()), timeout=config.get('TIMEOUT', 300))
+
+
+response_cache = build_response_cache(getattr(settings, 'GRAPHQL_RESPONSE_CACHE', None))
+
+
+# -----------------------------
+# Connection count cache
+# -----------------------------
+class CountCache:
+    """Caches connection row counts by their COUNT query, tagged by the tables it reads.
+
+    The SQL is the normalized filter set: the same filters given in any order
+    or spelling compile to the same query.
+    """
+
+    def __init__(self, backend, timeout=60):
+        self.backend = backend
+        self.timeout = timeout
+        self.hits = 0
+        self.misses = 0
+
+    def key(self, kind, alias, sql, params, tags):
+        versions = self.backend.get_versions(tags)
+        raw = json.dumps([kind, alias, sql, params, tags, versions], default=str)
+        return 'graphql:count:' + hashlib.sha256(raw.encode('utf-8')).hexdigest()
+
+    def get(self, key):
+        value = self.backend.get(key)
+        if value is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        metrics.record_cache_lookup('count', value is not None)
+        return value
+
+    def set(self, key, value):
+        self.backend.set(key, value, self.timeout)
+
+    def invalidate(self, *models):
+        metrics.cache_invalidations.labels('count').inc()
+        self.backend.bump([model_tag(model) for model in models])
+
+    def stats(self):
+        return {'hits': self.hits, 'misses': self.misses}
+
+
+def build_count_cache(config):
+    if not config:
+        return None
+    backend = BACKENDS[config.get('BACKEND', 'local')](config)
+    return CountCache(backend, timeout=config.get('TIMEOUT', 60))
+
+
+count_cache = build_count_cache(getattr(settings, 'GRAPHQL_COUNTS', None))
+
+
+def invalidate_models(*models):
+    """Drop cached responses and counts that read any of `models`. Call after bulk writes that skip signals."""
+    if response_cache is not None:
+        response_cache.invalidate(*models)
+    if count_cache is not None:
+        count_cache.invalidate(*models)
@@ -0,0 +1,55 @@
+import time
+from datetime import timedelta
+
+from django.db import transaction
+from django.db.models import Exists, OuterRef
+from django.utils import timezone
+
+from . import rollups
+from .models import Customer, Order
+
+# -----------------------------
+# Inactive customer cleanup
+# -----------------------------
+#
+# Inactive customers are found with an anti-join (NOT EXISTS on their orders,
+# served by crm_order_customer_date_idx) and deleted in primary-key batches,
+# each in its own short transaction. Writers only ever wait on one batch's
+# rows instead of the whole cleanup. Deletes go through QuerySet.delete() so
+# the cascade to orders and the post_delete signals (rollups, response cache)
+# behave as for any other delete; rollups.batched() folds the per-row rollup
+# updates into one per day.
+
+
+def inactive_customers(cutoff):
+    """Customers created before `cutoff` with no order placed since then."""
+    recent_orders = Order.objects.filter(customer=OuterRef('pk'), order_date__gte=cutoff)
+    return Customer.objects.filter(created_at__lt=cutoff).filter(~Exists(recent_orders))
+
+
+def cutoff_for(days, now=None):
+    return (now or timezone.now()) - timedelta(days=days)
+
+
+def delete_inactive_customers(cutoff, batch_size=500, pause=0.0, progress=None):
+    """Delete inactive customers in pk order, `batch_size` per transaction; return (customers, orders) deleted."""
+    progress = progress or (lambda customers, orders: None)
+    candidates = inactive_customers(cutoff).order_by('pk').values_list('pk', flat=True)
+    customers = orders = 0
+    last_pk = 0
+    while True:
+        batch = list(candidates.filter(pk__gt=last_pk)[:batch_size])
+        if not batch:
+            break
+        last_pk = batch[-1]
+        with transaction.atomic(), rollups.batched():
+            # Re-check inside the transaction: a customer may have ordered since the batch was read.
+            _, deleted = inactive_customers(cutoff).filter(pk__in=batch).delete()
+        customers += deleted.get(Customer._meta.label, 0)
+        orders += deleted.get(Order._meta.label, 0)
+        progress(customers, orders)
+        if len(batch) < batch_size:
+            break
+        if pause:
+            time.sleep(pause)
+    return customers, orders
@@ -0,0 +1,147 @@
+from django.conf import settings
+from graphene import relay
+from graphql import GraphQLError, get_named_type, is_composite_type, is_list_type, is_non_null_type
+from graphql.language import FieldNode, FragmentSpreadNode, InlineFragmentNode, OperationDefinitionNode
+from graphene_django.settings import graphene_settings
+
+# -----------------------------
+# Static query cost analysis
+# -----------------------------
+#
+# cost(field) = weight(field) + multiplier * cost(selected sub-fields)
+#
+# The multiplier of a connection is its `first`/`last` argument (or the
+# relay max limit when absent or unknown), and a plain list field multiplies
+# by DEFAULT_LIST_SIZE. The `edges`/`node`/`pageInfo` wrappers of a connection
+# add neither cost nor depth, so depth counts the relations a client walks.
+
+DEFAULTS = {
+    'MAX_COST': 50000,
+    'MAX_DEPTH': 6,
+    'OBJECT_COST': 1,
+    'SCALAR_COST': 0,
+    'DEFAULT_LIST_SIZE': 10,
+    'FIELD_WEIGHTS': {},
+}
+
+
+def cost_settings():
+    return {**DEFAULTS, **getattr(settings, 'GRAPHQL_QUERY_COST', {})}
+
+
+class QueryCostError(GraphQLError):
+    def __init__(self, message, report):
+        super().__init__(message, extensions={'code': 'QUERY_TOO_EXPENSIVE', 'cost': report})
+
+
+def cost_report(cost, depth, config):
+    return {'cost': cost, 'depth': depth, 'maxCost': config['MAX_COST'], 'maxDepth': config['MAX_DEPTH']}
+
+
+class _CostWalker:
+    def __init__(self, schema, fragments, variables, config):
+        self.schema = schema
+        self.fragments = fragments
+        self.variables = variables or {}
+        self.config = config
+        self.page_size = graphene_settings.RELAY_CONNECTION_MAX_LIMIT or config['DEFAULT_LIST_SIZE']
+
+    def fields(self, parent_type, selection_set, visited=()):
+        for selection in selection_set.selections:
+            if isinstance(selection, FieldNode):
+                yield parent_type, selection
+            elif isinstance(selection, InlineFragmentNode):
+                type_ = parent_type
+                if selection.type_condition is not None:
+                    type_ = self.schema.get_type(selection.type_condition.name.value) or parent_type
+                yield from self.fields(type_, selection.selection_set, visited)
+            elif isinstance(selection, FragmentSpreadNode):
+                name = selection.name.value
+                fragment = self.fragments.get(name)
+                if fragment is None or name in visited:
+                    continue
+                type_ = self.schema.get_type(fragment.type_condition.name.value) or parent_type
+                yield from self.fields(type_, fragment.selection_set, (*visited, name))
+
+    def argument(self, field_node, name):
+        for argument in field_node.arguments or ():
+            if argument.name.value == name:
+                value = argument.value
+                if value.kind == 'variable':
+                    return self.variables.get(value.name.value)
+                if value.kind == 'int_value':
+                    return int(value.value)
+        return None
+
+    def multiplier(self, field_node, field_type, is_connection):
+        if is_connection:
+            sizes = [self.argument(field_node, 'first'), self.argument(field_node, 'last')]
+            sizes = [size for size in sizes if isinstance(size, int) and size >= 0]
+            return min(sizes) if sizes else self.page_size
+        if is_non_null_type(field_type):
+            field_type = field_type.of_type
+        return self.config['DEFAULT_LIST_SIZE'] if is_list_type(field_type) else 1
+
+    def walk(self, parent_type, selection_set, role=None):
+        """Return (cost, depth) of a selection set. `role` marks connection/edge wrappers."""
+        total = 0
+        depth = 0
+        for type_, field_node in self.fields(parent_type, selection_set):
+            name = field_node.name.value
+            if name.startswith('__') or not hasattr(type_, 'fields') or name not in type_.fields:
+                continue
+            field_type = type_.fields[name].type
+            named = get_named_type(field_type)
+            graphene_type = getattr(named, 'graphene_type', None)
+            is_connection = isinstance(graphene_type, type) and issubclass(graphene_type, relay.Connection)
+
+            if role is not None:
+                # edges / node / pageInfo / cursor inside a connection
+                if field_node.selection_set is not None and is_composite_type(named):
+                    child_role = 'edge' if role == 'connection' and name == 'edges' else None
+                    cost, child_depth = self.walk(named, field_node.selection_set, child_role)
+                    total += cost
+                    depth = max(depth, child_depth)
+                continue
+
+            weights = self.config['FIELD_WEIGHTS']
+            if field_node.selection_set is None or not is_composite_type(named):
+                total += weights.get(f'{type_.name}.{name}', self.config['SCALAR_COST'])
+                continue
+            weight = weights.get(f'{type_.name}.{name}', self.config['OBJECT_COST'])
+            cost, child_depth = self.walk(named, field_node.selection_set, 'connection' if is_connection else None)
+            total += weight + self.multiplier(field_node, field_type, is_connection) * cost
+            depth = max(depth, child_depth + 1)
+        return total, depth
+
+
+def analyze(schema, document, operation_name=None, variables=None, config=None):
+    """Return {'cost', 'depth', 'maxCost', 'maxDepth'} for the operation that would execute."""
+    config = config or cost_settings()
+    fragments = {}
+    operations = []
+    for definition in document.definitions:
+        if isinstance(definition, OperationDefinitionNode):
+            operations.append(definition)
+        elif definition.kind == 'fragment_definition':
+            fragments[definition.name.value] = definition
+    if operation_name is not None:
+        operations = [op for op in operations if op.name and op.name.value == operation_name]
+    walker = _CostWalker(schema, fragments, variables, config)
+    cost = depth = 0
+    for operation in operations[:1]:
+        root = schema.get_root_type(operation.operation)
+        cost, depth = walker.walk(root, operation.selection_set)
+    return cost_report(cost, depth, config)
+
+
+def check_cost(report):
+    """Return a QueryCostError if the report exceeds its budget, else None."""
+    if report['depth'] > report['maxDepth']:
+        message = f"Query depth {report['depth']} exceeds the maximum depth of {report['maxDepth']}."
+    elif report['cost'] > report['maxCost']:
+        message = f"Query cost {report['cost']} exceeds the maximum cost of {report['maxCost']}."
+    else:
+        return None
+    return QueryCostError(message, report)
+
@@ -0,0 +1,132 @@
+import random
+
+from django.apps import apps
+from django.conf import settings
+from django.core.exceptions import EmptyResultSet
+from django.db import DatabaseError, connections
+from django.db.models import Max, Min
+
+from .cache import count_cache, model_tag
+
+# -----------------------------
+# Connection counts
+# -----------------------------
+#
+# allOrders and allCustomers take countStrategy, which decides how totalCount
+# (and the row count offset pagination needs) is found:
+#
+#   EXACT        COUNT(*) on every request, as DjangoConnectionField does.
+#   CACHED       COUNT(*) once per filter set, then from GRAPHQL_COUNTS'
+#                cache until TIMEOUT or a write to a table the count reads.
+#   APPROXIMATE  table statistics when unfiltered, otherwise the share of a
+#                random sample of primary keys that match, scaled to the
+#                table. Forward pages are found without counting at all.
+#
+# totalCountIsExact tells clients which kind of number they got.
+
+EXACT = 'exact'
+CACHED = 'cached'
+APPROXIMATE = 'approximate'
+
+DEFAULTS = {
+    'SAMPLE_SIZE': 1000,
+    'MIN_SAMPLE_MATCHES': 10,
+}
+
+
+def count_settings():
+    return {**DEFAULTS, **(getattr(settings, 'GRAPHQL_COUNTS', None) or {})}
+
+
+def query_tags(sql):
+    """Model tags of every table the SQL reads, so a write to any of them drops the count."""
+    return sorted(model_tag(model) for model in apps.get_models() if model._meta.db_table in sql)
+
+
+def cached(kind, queryset, compute):
+    """Return compute() for `queryset`, through the count cache when one is configured."""
+    if count_cache is None:
+        return compute()
+    try:
+        sql, params = queryset.query.get_compiler(queryset.db).as_sql()
+    except EmptyResultSet:
+        return compute()
+    key = count_cache.key(kind, queryset.db, sql, params, query_tags(sql))
+    value = count_cache.get(key)
+    if value is None:
+        value = compute()
+        count_cache.set(key, value)
+    return value
+
+
+def cached_count(queryset):
+    return cached(CACHED, queryset, queryset.count)
+
+
+def table_rows(queryset):
+    """The planner's row count for the queryset's table, or None if the database has none."""
+    connection = connections[queryset.db]
+    table = queryset.model._meta.db_table
+    try:
+        with connection.cursor() as cursor:
+            if connection.vendor == 'postgresql':
+                cursor.execute("SELECT reltuples::bigint FROM pg_class WHERE oid = %s::regclass", [table])
+            elif connection.vendor == 'sqlite':
+                # Filled in by ANALYZE: the first number of an index's stat is the table's row count.
+                cursor.execute("SELECT stat FROM sqlite_stat1 WHERE tbl = %s LIMIT 1", [table])
+            else:
+                return None
+            row = cursor.fetchone()
+    except DatabaseError:
+        return None
+    if row is None:
+        return None
+    rows = int(str(row[0]).split()[0])
+    return rows if rows >= 0 else None
+
+
+def estimate(queryset):
+    """Return (estimate, exact) for the number of rows in `queryset`."""
+    config = count_settings()
+    sample_size = config['SAMPLE_SIZE']
+    bounds = queryset.model._default_manager.using(queryset.db).aggregate(low=Min('pk'), high=Max('pk'))
+    if bounds['low'] is None:
+        return 0, True
+    span = bounds['high'] - bounds['low'] + 1
+    if span <= sample_size:
+        return queryset.count(), True
+
+    if not queryset.query.where and not queryset.query.distinct:
+        rows = table_rows(queryset)
+        if rows is not None:
+            return rows, False
+
+    sample = random.sample(range(bounds['low'], bounds['high'] + 1), sample_size)
+    matches = queryset.filter(pk__in=sample).count()
+    if matches < config['MIN_SAMPLE_MATCHES']:
+        # Too few hits to scale up reliably; such selective filters are usually cheap to count.
+        return cached_count(queryset), True
+    return round(matches * span / sample_size), False
+
+
+def estimate_count(queryset):
+    # Cached too, so repeated requests get a stable number.
+    return tuple(cached(APPROXIMATE, queryset, lambda: estimate(queryset)))
+
+
+def total_count(queryset, strategy=EXACT):
+    """Return (count, exact) for a connection's totalCount."""
+    if strategy == APPROXIMATE:
+        return estimate_count(queryset)
+    if strategy == CACHED:
+        return cached_count(queryset), True
+    return queryset.count(), True
+
+
+def page_length(queryset, strategy, args):
+    """The row count offset pagination needs, or None when the page can be found without one."""
+    if strategy == EXACT:
+        return queryset.count()
+    if strategy == APPROXIMATE and args.get('last') is None and args.get('before') is None:
+        return None
+    return cached_count(queryset)
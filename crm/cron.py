@@ -1,59 +1,45 @@
 import datetime
-from gql import gql, Client
-from gql.transport.requests import RequestsHTTPTransport
+import time
 
-# Configure the GraphQL endpoint
-transport = RequestsHTTPTransport(
-    url="http://localhost:8000/graphql",
-    verify=False,
-    retries=3,
-)
+from crm import metrics
+from crm.executor import get_client
 
-client = Client(transport=transport, fetch_schema_from_transport=True)
+# Documents run through crm.executor: in-process against the schema by default,
+# or over HTTP when GRAPHQL_CLIENT['TRANSPORT'] is 'http'.
+HEARTBEAT_QUERY = "{ __typename }"
 
-def log_crm_heartbeat():
-    """Logs CRM heartbeat every 5 minutes"""
-    timestamp = datetime.datetime.now().strftime("%d/%m/%Y-%H:%M:%S")
-    message = f"{timestamp} CRM is alive\n"
+LOW_STOCK_MUTATION = """
+mutation {
+  updateLowStockProducts(countsOnly: true) {
+    message
+    updatedCount
+  }
+}
+"""
 
-    with open("/tmp/crm_heartbeat_log.txt", "a") as f:
-        f.write(message)
 
-    # Optional GraphQL hello query to check API responsiveness
+def log_crm_heartbeat(transport=None):
+    """Records a CRM heartbeat every 5 minutes in the /metrics registry"""
+    ok = True
+    start = time.perf_counter()
     try:
-        query = gql("{ hello }")
-        result = client.execute(query)
-        f.write(f"{timestamp} - GraphQL responded: {result}\n")
-    except Exception as e:
-        f.write(f"{timestamp} - GraphQL request failed: {e}\n")
+        get_client(transport).execute(HEARTBEAT_QUERY)
+    except Exception:
+        ok = False
+    metrics.record_heartbeat(ok, time.perf_counter() - start)
 
 
-def update_low_stock():
+def update_low_stock(transport=None):
     """Runs every 12 hours — updates low-stock products via GraphQL mutation"""
     timestamp = datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
 
-    mutation = gql("""
-    mutation {
-      updateLowStockProducts {
-        message
-        updatedProducts {
-          name
-          stock
-        }
-      }
-    }
-    """)
-
     try:
-        result = client.execute(mutation)
-        data = result.get("updateLowStockProducts", {})
-        updated = data.get("updatedProducts", [])
+        result = get_client(transport).execute(LOW_STOCK_MUTATION)
+        data = result.get("updateLowStockProducts") or {}
         message = data.get("message", "No message")
 
         with open("/tmp/low_stock_updates_log.txt", "a") as log:
             log.write(f"{timestamp} - {message}\n")
-            for product in updated:
-                log.write(f"{timestamp} - {product['name']} new stock: {product['stock']}\n")
 
     except Exception as e:
         with open("/tmp/low_stock_updates_log.txt", "a") as log:
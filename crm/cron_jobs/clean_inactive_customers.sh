@@ -1,19 +1,13 @@
 #!/bin/bash
-# Deletes inactive customers (no orders for over a year)
-# Logs the count to /tmp/customer_cleanup_log.txt
+# Deletes inactive customers (no orders for over a year) in small batches
+# Logs the result to /tmp/customer_cleanup_log.txt
 
-TIMESTAMP=$(date '+%Y-%m-%d %H:%M:%S')
+cd "$(dirname "$0")/../.." || exit 1
 
-# Run Django shell command and capture count
-count=$(python3 manage.py shell -c "
-from crm.models import Customer
-from django.utils import timezone
-from datetime import timedelta
+TIMESTAMP=$(date '+%Y-%m-%d %H:%M:%S')
 
-cutoff_date = timezone.now() - timedelta(days=365)
-count, _ = Customer.objects.filter(order__isnull=True, created_at__lt=cutoff_date).delete()
-print(count)
-")
+# See `manage.py clean_inactive_customers --help` (--dry-run, --batch-size, --pause)
+result=$(python3 manage.py clean_inactive_customers "$@" 2>&1)
 
 # Log the result
-echo \"$TIMESTAMP - Deleted $count inactive customers\" >> /tmp/customer_cleanup_log.txt
+echo "$TIMESTAMP - $result" >> /tmp/customer_cleanup_log.txt
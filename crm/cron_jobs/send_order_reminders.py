@@ -1,41 +1,107 @@
 #!/usr/bin/env python3
 
-from gql import gql, Client
-from gql.transport.requests import RequestsHTTPTransport
-from datetime import datetime, timedelta
-import pytz
-
-# Define GraphQL endpoint
-transport = RequestsHTTPTransport(
-    url="http://localhost:8000/graphql",
-    verify=False,
-    retries=3,
-)
-
-client = Client(transport=transport, fetch_schema_from_transport=True)
-
-# Query for recent orders (within 7 days)
-query = gql("""
-query {
-  orders(lastDays: 7) {
-    id
-    customer {
-      email
+import argparse
+import json
+import os
+import sys
+from datetime import datetime, timezone
+from pathlib import Path
+
+# Run the query in-process against the schema (the default) or over HTTP with --transport http
+PROJECT_DIR = Path(__file__).resolve().parents[2]
+sys.path.insert(0, str(PROJECT_DIR))
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "alx_backend_graphql.settings")
+
+import django  # noqa: E402
+
+django.setup()
+
+from crm.executor import get_client, iter_pages  # noqa: E402
+
+LOG_FILE = "/tmp/order_reminders_log.txt"
+CHECKPOINT_FILE = "/tmp/order_reminders_checkpoint.json"
+
+# Recent orders, oldest first, one keyset page at a time
+query = """
+query RecentOrders($lastDays: Int!, $first: Int, $after: String) {
+  recentOrders(lastDays: $lastDays, first: $first, after: $after) {
+    edges {
+      node {
+        id
+        customer {
+          email
+        }
+      }
+    }
+    pageInfo {
+      hasNextPage
+      endCursor
     }
   }
 }
-""")
+"""
+
+
+def load_checkpoint(path):
+    """Return the cursor of the last order already reminded, or None."""
+    try:
+        with open(path) as f:
+            return json.load(f).get("cursor")
+    except (OSError, ValueError):
+        return None
+
+
+def save_checkpoint(path, cursor):
+    tmp = f"{path}.tmp"
+    with open(tmp, "w") as f:
+        json.dump({"cursor": cursor, "updated": datetime.now(timezone.utc).isoformat()}, f)
+    os.replace(tmp, path)
+
+
+def send_reminders(client, last_days=7, page_size=100, log_path=LOG_FILE, checkpoint_path=CHECKPOINT_FILE):
+    """Log a reminder per recent order not yet reminded; return how many were logged.
+
+    Each page is appended to the log in one write and then checkpointed, so a rerun
+    resumes after the last logged order and at most one page is ever in memory.
+    """
+    after = load_checkpoint(checkpoint_path) if checkpoint_path else None
+    sent = 0
+    with open(log_path, "a") as log_file:
+        for orders, cursor in iter_pages(client, query, "recentOrders", {"lastDays": last_days}, page_size, after):
+            timestamp = datetime.now(timezone.utc).strftime("%Y-%m-%d %H:%M:%S")
+            log_file.write("".join(
+                f"{timestamp} - Reminder for order {order['id']} -> {order['customer']['email']}\n"
+                for order in orders
+            ))
+            log_file.flush()
+            os.fsync(log_file.fileno())
+            if checkpoint_path:
+                save_checkpoint(checkpoint_path, cursor)
+            sent += len(orders)
+    return sent
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Log reminders for orders placed in the last few days.")
+    parser.add_argument("--days", type=int, default=7, help="Remind orders from the last N days.")
+    parser.add_argument("--page-size", type=int, default=100, help="Orders fetched and logged per batch (max 100).")
+    parser.add_argument("--checkpoint", default=CHECKPOINT_FILE, help="Progress file; a rerun skips orders it covers.")
+    parser.add_argument("--reset", action="store_true", help="Ignore the checkpoint and start from the oldest order.")
+    parser.add_argument("--transport", choices=["local", "http"], help="Default: GRAPHQL_CLIENT['TRANSPORT'].")
+    parser.add_argument("--url", help="GraphQL endpoint for --transport http.")
+    args = parser.parse_args(argv)
+
+    if args.reset and os.path.exists(args.checkpoint):
+        os.remove(args.checkpoint)
 
-try:
-    result = client.execute(query)
-    orders = result.get("orders", [])
-    timestamp = datetime.now(pytz.utc).strftime("%Y-%m-%d %H:%M:%S")
+    try:
+        sent = send_reminders(get_client(args.transport, args.url), args.days, args.page_size,
+                              checkpoint_path=args.checkpoint)
+        print(f"Order reminders processed! ({sent} new)")
 
-    with open("/tmp/order_reminders_log.txt", "a") as log_file:
-        for order in orders:
-            log_file.write(f"{timestamp} - Reminder for order {order['id']} -> {order['customer']['email']}\n")
+    except Exception as e:
+        print(f"Error: {e}")
 
-    print("Order reminders processed!")
 
-except Exception as e:
-    print(f"Error: {e}")
+if __name__ == "__main__":
+    main()
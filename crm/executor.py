@@ -0,0 +1,151 @@
+from types import SimpleNamespace
+
+from django.conf import settings
+from graphql import execute, parse, validate
+
+from . import metrics
+from .cache import LRUCache
+
+# -----------------------------
+# GraphQL clients for scheduled jobs
+# -----------------------------
+#
+# Cron jobs and Celery tasks run their GraphQL documents through a client.
+# LocalClient executes them directly against the graphene schema inside the
+# calling Django process: no HTTP round trip, no introspection query, and no
+# load on the request-serving workers. Each document is parsed and validated
+# once per process. HTTPClient keeps the old behaviour (gql over HTTP) for
+# jobs that should go through the web tier, e.g. to probe it.
+
+DEFAULTS = {
+    'TRANSPORT': 'local',
+    'URL': 'http://localhost:8000/graphql',
+    'DOCUMENT_CACHE_SIZE': 64,
+}
+
+
+def client_settings():
+    return {**DEFAULTS, **getattr(settings, 'GRAPHQL_CLIENT', {})}
+
+
+def _message(error):
+    if isinstance(error, dict):
+        return error.get('message', str(error))
+    return getattr(error, 'message', None) or str(error)
+
+
+class GraphQLClientError(Exception):
+    """The operation returned errors; `errors` holds them and `data` any partial result."""
+
+    def __init__(self, errors, data=None):
+        super().__init__("; ".join(_message(e) for e in errors))
+        self.errors = errors
+        self.data = data
+
+
+class LocalClient:
+    def __init__(self, schema=None, document_cache_size=None):
+        self._schema = schema
+        self.documents = LRUCache(document_cache_size or client_settings()['DOCUMENT_CACHE_SIZE'])
+        self.middleware = [metrics.MutationErrorMiddleware()]
+
+    @property
+    def schema(self):
+        if self._schema is None:
+            from alx_backend_graphql.schema import schema
+            self._schema = schema
+        return self._schema
+
+    def get_document(self, query):
+        """Parse and validate `query`, reusing the result for the same text."""
+        document = self.documents.get(query)
+        if document is None:
+            document = parse(query)
+            errors = validate(self.schema.graphql_schema, document)
+            if errors:
+                raise GraphQLClientError(errors)
+            self.documents.set(query, document)
+        return document
+
+    def execute(self, query, variables=None, operation_name=None):
+        """Run `query` in-process and return its data; raise GraphQLClientError on errors."""
+        result = execute(
+            self.schema.graphql_schema,
+            self.get_document(query),
+            context_value=SimpleNamespace(),
+            variable_values=variables,
+            operation_name=operation_name,
+            middleware=self.middleware,
+        )
+        if result.errors:
+            raise GraphQLClientError(result.errors, result.data)
+        return result.data
+
+
+class HTTPClient:
+    def __init__(self, url=None, retries=3):
+        from gql import Client
+        from gql.transport.requests import RequestsHTTPTransport
+
+        transport = RequestsHTTPTransport(url=url or client_settings()['URL'], verify=False, retries=retries)
+        self.client = Client(transport=transport)
+        self.documents = LRUCache(client_settings()['DOCUMENT_CACHE_SIZE'])
+
+    def get_document(self, query):
+        from gql import gql
+
+        document = self.documents.get(query)
+        if document is None:
+            document = gql(query)
+            self.documents.set(query, document)
+        return document
+
+    def execute(self, query, variables=None, operation_name=None):
+        """POST `query` to the endpoint and return its data; raise GraphQLClientError on errors."""
+        from gql import GraphQLRequest
+        from gql.transport.exceptions import TransportQueryError
+
+        request = GraphQLRequest(self.get_document(query), variable_values=variables, operation_name=operation_name)
+        try:
+            return self.client.execute(request)
+        except TransportQueryError as e:
+            raise GraphQLClientError(e.errors or [e], e.data)
+
+
+def iter_pages(client, query, path, variables=None, page_size=100, after=None):
+    """Walk the connection at `path` (e.g. 'recentOrders') page by page, like QuerySet.iterator(chunk_size=...).
+
+    `query` must take `$first: Int` and `$after: String` for that connection and select
+    `pageInfo { hasNextPage endCursor }`. Yields (nodes, end cursor) per non-empty page;
+    only one page is held at a time, and a cursor can be passed back as `after` to resume.
+    """
+    while True:
+        data = client.execute(query, {**(variables or {}), 'first': page_size, 'after': after})
+        for key in path.split('.'):
+            data = data[key]
+        nodes = [edge['node'] for edge in data['edges']]
+        page_info = data['pageInfo']
+        if nodes:
+            after = page_info['endCursor']
+            yield nodes, after
+        if not page_info['hasNextPage']:
+            return
+
+
+_clients = {}
+
+
+def get_client(transport=None, url=None):
+    """Return a shared client for `transport` ('local' or 'http'), defaulting to GRAPHQL_CLIENT."""
+    config = client_settings()
+    transport = transport or config['TRANSPORT']
+    if transport == 'local':
+        key = ('local',)
+    elif transport == 'http':
+        key = ('http', url or config['URL'])
+    else:
+        raise ValueError(f"Unknown GraphQL transport {transport!r}; expected 'local' or 'http'.")
+    client = _clients.get(key)
+    if client is None:
+        client = _clients[key] = LocalClient() if transport == 'local' else HTTPClient(key[1])
+    return client
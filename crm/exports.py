@@ -0,0 +1,164 @@
+import csv
+import io
+import json
+import zlib
+from collections import defaultdict
+
+from asgiref.sync import sync_to_async
+from django.core.handlers.asgi import ASGIRequest
+from django.http import HttpResponseNotAllowed, JsonResponse, StreamingHttpResponse
+from graphene.utils.str_converters import to_snake_case
+
+from .filters import CustomerFilter, OrderFilter
+from .models import Order
+from .seed import chunked
+
+# -----------------------------
+# Streaming exports
+# -----------------------------
+#
+# GET /export/orders and /export/customers take the same filter arguments as
+# the allOrders / allCustomers connections (snake_case or camelCase) and stream
+# every matching row as CSV or NDJSON, optionally gzipped. Rows are read with
+# queryset.iterator(chunk_size=...) and each chunk costs one extra query for
+# the order products, so memory stays constant in the size of the export and
+# there are no per-page COUNT queries.
+
+DEFAULT_CHUNK_SIZE = 2000
+MAX_CHUNK_SIZE = 10000
+OPTIONS = {'format', 'gzip', 'chunk_size'}
+
+
+def order_rows(queryset, chunk_size):
+    """Yield one list of row dicts per chunk of orders, with customer and products flattened."""
+    # values() rows, not model instances: building two models per row would dominate the export.
+    orders = queryset.order_by('pk').values(
+        'id', 'order_date', 'total_amount', 'customer_id', 'customer__name', 'customer__email',
+    )
+    Through = Order.products.through
+    for chunk in chunked(orders.iterator(chunk_size=chunk_size), chunk_size):
+        products = defaultdict(list)
+        lines = (
+            Through.objects.filter(order_id__in=[order['id'] for order in chunk])
+            .order_by('order_id', 'product_id')
+            .values_list('order_id', 'product_id', 'product__name')
+        )
+        for order_id, product_id, name in lines:
+            products[order_id].append((product_id, name))
+        yield [
+            {
+                'id': order['id'],
+                'order_date': order['order_date'].isoformat(),
+                'total_amount': str(order['total_amount']),
+                'customer_id': order['customer_id'],
+                'customer_name': order['customer__name'],
+                'customer_email': order['customer__email'],
+                'product_ids': [pk for pk, _ in products[order['id']]],
+                'product_names': [name for _, name in products[order['id']]],
+            }
+            for order in chunk
+        ]
+
+
+def customer_rows(queryset, chunk_size):
+    customers = queryset.order_by('pk').values('id', 'name', 'email', 'phone', 'created_at')
+    for chunk in chunked(customers.iterator(chunk_size=chunk_size), chunk_size):
+        for customer in chunk:
+            customer['phone'] = customer['phone'] or ''
+            customer['created_at'] = customer['created_at'].isoformat()
+        yield chunk
+
+
+EXPORTS = {
+    'orders': (OrderFilter, order_rows, [
+        'id', 'order_date', 'total_amount', 'customer_id', 'customer_name', 'customer_email',
+        'product_ids', 'product_names',
+    ]),
+    'customers': (CustomerFilter, customer_rows, ['id', 'name', 'email', 'phone', 'created_at']),
+}
+
+
+def encode_csv(chunks, columns):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(columns)
+    for rows in chunks:
+        for row in rows:
+            writer.writerow(
+                ';'.join(map(str, value)) if isinstance(value, list) else value
+                for value in (row[column] for column in columns)
+            )
+        yield buffer.getvalue().encode()
+        buffer.seek(0)
+        buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue().encode()
+
+
+def encode_ndjson(chunks, columns):
+    for rows in chunks:
+        yield ''.join(json.dumps(row, separators=(',', ':')) + '\n' for row in rows).encode()
+
+
+def gzipped(blocks):
+    compressor = zlib.compressobj(wbits=31)  # gzip container
+    for block in blocks:
+        data = compressor.compress(block)
+        if data:
+            yield data
+    yield compressor.flush()
+
+
+async def aiterate(blocks):
+    """Serve a sync generator to an ASGI response one block at a time, in the DB thread."""
+    iterator = iter(blocks)
+    done = object()
+    while (block := await sync_to_async(next)(iterator, done)) is not done:
+        yield block
+
+
+def export_view(request, kind):
+    if request.method != 'GET':
+        return HttpResponseNotAllowed(['GET'])
+    if kind not in EXPORTS:
+        return JsonResponse({'error': f"Unknown export {kind!r}; expected one of {sorted(EXPORTS)}."}, status=404)
+    filterset_class, rows, columns = EXPORTS[kind]
+
+    params = {to_snake_case(key): value for key, value in request.GET.items()}
+    unknown = set(params) - set(filterset_class.base_filters) - OPTIONS
+    if unknown:
+        return JsonResponse({'error': f"Unknown arguments: {', '.join(sorted(unknown))}."}, status=400)
+    fmt = params.get('format', 'csv')
+    if fmt not in ('csv', 'ndjson'):
+        return JsonResponse({'error': "format must be csv or ndjson."}, status=400)
+    try:
+        chunk_size = int(params.get('chunk_size', DEFAULT_CHUNK_SIZE))
+    except ValueError:
+        chunk_size = 0
+    if not 0 < chunk_size <= MAX_CHUNK_SIZE:
+        return JsonResponse({'error': f"chunk_size must be between 1 and {MAX_CHUNK_SIZE}."}, status=400)
+    compress = params.get('gzip', '').lower() in ('1', 'true', 'yes')
+
+    model = filterset_class._meta.model
+    filterset = filterset_class(
+        data={key: value for key, value in params.items() if key not in OPTIONS},
+        queryset=model.objects.all(),
+    )
+    if not filterset.is_valid():
+        return JsonResponse({'error': filterset.errors}, status=400)
+
+    encode = encode_csv if fmt == 'csv' else encode_ndjson
+    blocks = encode(rows(filterset.qs, chunk_size), columns)
+    filename = f"{kind}.{fmt}"
+    content_type = 'text/csv; charset=utf-8' if fmt == 'csv' else 'application/x-ndjson'
+    if compress:
+        blocks = gzipped(blocks)
+        filename += '.gz'
+        content_type = 'application/gzip'
+    if isinstance(request, ASGIRequest):
+        # A sync iterator would be buffered whole by the ASGI handler.
+        blocks = aiterate(blocks)
+
+    response = StreamingHttpResponse(blocks, content_type=content_type)
+    response['Content-Disposition'] = f'attachment; filename="{filename}"'
+    return response
@@ -1,5 +1,7 @@
 import django_filters
+from django.db import connections
 from .models import Customer, Product, Order
+from .search import search, search_ids, search_terms
 
 class CustomerFilter(django_filters.FilterSet):
     name_icontains = django_filters.CharFilter(field_name="name", lookup_expr="icontains")
@@ -7,13 +9,21 @@ class CustomerFilter(django_filters.FilterSet):
     created_at_gte = django_filters.DateFilter(field_name="created_at", lookup_expr="gte")
     created_at_lte = django_filters.DateFilter(field_name="created_at", lookup_expr="lte")
     phone_pattern = django_filters.CharFilter(method="filter_phone_pattern")
+    search = django_filters.CharFilter(method="filter_search")
 
     class Meta:
         model = Customer
         fields = []
 
+    def filter_search(self, queryset, name, value):
+        return search(queryset, value)
+
     def filter_phone_pattern(self, queryset, name, value):
-        return queryset.filter(phone__startswith=value)
+        queryset = queryset.filter(phone__startswith=value)
+        if value and connections[queryset.db].vendor == 'sqlite':
+            # SQLite can't serve LIKE from a BINARY index, but it can seek a byte-wise range.
+            queryset = queryset.filter(phone__gte=value, phone__lt=value[:-1] + chr(ord(value[-1]) + 1))
+        return queryset
 
 class ProductFilter(django_filters.FilterSet):
     name_icontains = django_filters.CharFilter(field_name="name", lookup_expr="icontains")
@@ -21,17 +31,22 @@ class ProductFilter(django_filters.FilterSet):
     price_lte = django_filters.NumberFilter(field_name="price", lookup_expr="lte")
     stock_gte = django_filters.NumberFilter(field_name="stock", lookup_expr="gte")
     stock_lte = django_filters.NumberFilter(field_name="stock", lookup_expr="lte")
+    search = django_filters.CharFilter(method="filter_search")
 
     class Meta:
         model = Product
         fields = []
 
+    def filter_search(self, queryset, name, value):
+        return search(queryset, value)
+
 class OrderFilter(django_filters.FilterSet):
     total_amount_gte = django_filters.NumberFilter(field_name="total_amount", lookup_expr="gte")
     total_amount_lte = django_filters.NumberFilter(field_name="total_amount", lookup_expr="lte")
     order_date_gte = django_filters.DateFilter(field_name="order_date", lookup_expr="gte")
     order_date_lte = django_filters.DateFilter(field_name="order_date", lookup_expr="lte")
     customer_name = django_filters.CharFilter(field_name="customer__name", lookup_expr="icontains")
+    customer_search = django_filters.CharFilter(method="filter_customer_search")
     product_name = django_filters.CharFilter(method="filter_product_name")
     product_id = django_filters.NumberFilter(method="filter_product_id")
 
@@ -44,3 +59,8 @@ class OrderFilter(django_filters.FilterSet):
 
     def filter_product_id(self, queryset, name, value):
         return queryset.filter(products__id=value).distinct()
+
+    def filter_customer_search(self, queryset, name, value):
+        if not search_terms(value):
+            return queryset.none()
+        return queryset.filter(customer_id__in=search_ids(Customer, value, queryset.db))
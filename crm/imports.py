@@ -0,0 +1,253 @@
+import csv
+import json
+import re
+from pathlib import Path
+from types import SimpleNamespace
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+
+from .models import ImportChunk, ImportJob
+from .seed import chunked
+
+# -----------------------------
+# Bulk imports
+# -----------------------------
+#
+# start_import() streams a CSV or NDJSON file (an upload or a file under
+# CRM_IMPORT['ROOT']), checks each row's required fields, and dispatches every
+# CHUNK_SIZE valid rows as one crm.tasks.import_chunk Celery task. The rows
+# travel in the task message, so workers need no access to the file. Each
+# chunk is inserted with the set-based BulkCreateCustomers / CreateOrders
+# paths in one transaction with its status update, so a redelivered task
+# never inserts a chunk twice. Progress is kept on the ImportJob row with F()
+# updates, so chunks running on different workers never overwrite each other.
+# With CELERY_TASK_ALWAYS_EAGER the chunks run inline, without a broker.
+
+DEFAULTS = {
+    'ROOT': None,
+    'CHUNK_SIZE': 1000,
+    'MAX_CHUNK_SIZE': 10000,
+}
+
+FORMATS = {'.csv': 'csv', '.ndjson': 'ndjson', '.jsonl': 'ndjson'}
+
+REQUIRED_FIELDS = {
+    'customers': ('name', 'email'),
+    'orders': ('customer_id', 'product_ids'),
+}
+
+ORDER_ERROR = re.compile(r'^Order (\d+): ')
+
+
+class ImportJobError(Exception):
+    """The import can't start: bad path, unknown format, invalid chunk size."""
+
+
+def import_settings():
+    return {**DEFAULTS, **getattr(settings, 'CRM_IMPORT', {})}
+
+
+def format_for(name, format=None):
+    if format:
+        return format
+    fmt = FORMATS.get(Path(name).suffix.lower())
+    if fmt is None:
+        raise ImportJobError(f"Can't tell the format of {name!r}; pass format CSV or NDJSON.")
+    return fmt
+
+
+def resolve_path(path, root=None):
+    """Return `path` under the import root, refusing anything outside it."""
+    root = root or import_settings()['ROOT']
+    if not root:
+        raise ImportJobError("Server-side imports are disabled; set CRM_IMPORT['ROOT'].")
+    root = Path(root).resolve()
+    resolved = (root / path).resolve()
+    if not resolved.is_relative_to(root):
+        raise ImportJobError(f"{path!r} is outside the import directory.")
+    if not resolved.is_file():
+        raise ImportJobError(f"{path!r} does not exist.")
+    return resolved
+
+
+def text_lines(fileobj):
+    """Iterate the lines of a text or binary file as str, dropping a UTF-8 BOM."""
+    first = True
+    for line in fileobj:
+        if isinstance(line, bytes):
+            line = line.decode('utf-8')
+        if first:
+            line = line.lstrip('﻿')
+            first = False
+        yield line
+
+
+def read_rows(lines, format):
+    """Yield (row number, dict or None, error) for every record; numbers are 1-based data rows."""
+    if format == 'csv':
+        for number, row in enumerate(csv.DictReader(lines), start=1):
+            yield number, {key: value for key, value in row.items() if key is not None}, None
+    elif format == 'ndjson':
+        number = 0
+        for line in lines:
+            if not line.strip():
+                continue
+            number += 1
+            try:
+                row = json.loads(line)
+            except ValueError as e:
+                yield number, None, f"invalid JSON ({e})"
+                continue
+            if not isinstance(row, dict):
+                yield number, None, "expected a JSON object"
+                continue
+            yield number, row, None
+    else:
+        raise ImportJobError(f"Unknown import format {format!r}.")
+
+
+def clean_row(kind, row):
+    """Normalize a row for its kind; return (row, error)."""
+    missing = [name for name in REQUIRED_FIELDS[kind] if row.get(name) in (None, '', [])]
+    if missing:
+        return None, f"missing {', '.join(missing)}"
+    if kind == 'customers':
+        return {'name': str(row['name']), 'email': str(row['email']), 'phone': row.get('phone') or None}, None
+    product_ids = row['product_ids']
+    if isinstance(product_ids, str):
+        product_ids = [pk for pk in re.split(r'[;,\s]+', product_ids) if pk]
+    if not isinstance(product_ids, list):
+        return None, "product_ids must be a list or a ;-separated string"
+    return {'customer_id': str(row['customer_id']), 'product_ids': [str(pk) for pk in product_ids]}, None
+
+
+def start_import(kind, fileobj, source, format=None, chunk_size=None):
+    """Split `fileobj` into chunks, dispatch them, and return the ImportJob."""
+    from .tasks import import_chunk
+
+    config = import_settings()
+    chunk_size = chunk_size or config['CHUNK_SIZE']
+    if kind not in REQUIRED_FIELDS:
+        raise ImportJobError(f"Unknown import kind {kind!r}.")
+    if not 0 < chunk_size <= config['MAX_CHUNK_SIZE']:
+        raise ImportJobError(f"chunkSize must be between 1 and {config['MAX_CHUNK_SIZE']}.")
+    format = format_for(source, format)
+
+    job = ImportJob.objects.create(kind=kind, source=source, format=format, chunk_size=chunk_size)
+    errors = []
+    total = 0
+
+    def valid_rows():
+        nonlocal total
+        try:
+            for number, row, error in read_rows(text_lines(fileobj), format):
+                total = number
+                if error is None:
+                    row, error = clean_row(kind, row)
+                if error is None:
+                    yield {'row': number, **row}
+                else:
+                    errors.append(f"Row {number}: {error}")
+        except (UnicodeDecodeError, csv.Error) as e:
+            # The rest of the file can't be read; import what was read so far.
+            errors.append(f"Row {total + 1}: {e}")
+
+    index = 0
+    for index, rows in enumerate(chunked(valid_rows(), chunk_size), start=1):
+        chunk = ImportChunk.objects.create(
+            job=job, index=index, first_row=rows[0]['row'], last_row=rows[-1]['row'], row_count=len(rows),
+        )
+        # Workers must see the chunk row, so dispatch once it is committed.
+        transaction.on_commit(lambda chunk_id=chunk.pk, rows=rows: import_chunk.delay(chunk_id, rows))
+
+    ImportJob.objects.filter(pk=job.pk).update(
+        chunk_count=index, total_rows=total, errors=errors, error_count=F('error_count') + len(errors),
+    )
+    finish_if_complete(job.pk)
+    job.refresh_from_db()
+    return job
+
+
+def start_path_import(kind, path, format=None, chunk_size=None):
+    resolved = resolve_path(path)
+    with open(resolved, newline='', encoding='utf-8') as f:
+        return start_import(kind, f, str(path), format, chunk_size)
+
+
+def insert_rows(kind, rows, batch_size):
+    """Insert one chunk with the set-based mutation code; return (created count, errors)."""
+    from .schema import BulkCreateCustomers, CreateOrders
+
+    records = [SimpleNamespace(**{k: v for k, v in row.items() if k != 'row'}) for row in rows]
+    if kind == 'customers':
+        result = BulkCreateCustomers.create(records, batch_size)
+        return len(result.customers), list(result.errors)
+
+    result = CreateOrders.create(records, batch_size)
+    # CreateOrders numbers errors by position in the chunk; report file rows instead.
+    errors = [
+        ORDER_ERROR.sub(lambda m: f"Row {rows[int(m.group(1))]['row']}: ", error)
+        for error in result.errors
+    ]
+    return len(result.orders), errors
+
+
+def run_chunk(chunk_id, rows):
+    """Insert one chunk and record its outcome on the chunk and its job.
+
+    The chunk is claimed (pending -> running), inserted and marked done in one
+    transaction. A redelivered task finds the chunk no longer pending and
+    returns; if the worker died mid-chunk, everything rolled back and the
+    redelivery finds it pending and runs it once.
+    """
+    now = timezone.now()
+    chunk = ImportChunk.objects.select_related('job').get(pk=chunk_id)
+    ImportJob.objects.filter(pk=chunk.job_id, started_at__isnull=True).update(status='running', started_at=now)
+
+    try:
+        with transaction.atomic():
+            if not claim_chunk(chunk, now):
+                return chunk  # redelivered task
+            created, errors = insert_rows(chunk.job.kind, rows, chunk.job.chunk_size)
+            record_outcome(chunk, 'done', created, errors)
+    except Exception as e:
+        with transaction.atomic():
+            if not claim_chunk(chunk, now):
+                return chunk
+            record_outcome(chunk, 'failed', 0, [f"Rows {chunk.first_row}-{chunk.last_row}: {e}"])
+    finish_if_complete(chunk.job_id)
+    return chunk
+
+
+def claim_chunk(chunk, now):
+    """Move a pending chunk to running; False if another delivery already has it."""
+    return ImportChunk.objects.filter(pk=chunk.pk, status='pending').update(status='running', started_at=now) == 1
+
+
+def record_outcome(chunk, status, created, errors):
+    ImportChunk.objects.filter(pk=chunk.pk).update(
+        status=status, created_count=created, errors=errors, finished_at=timezone.now(),
+    )
+    ImportJob.objects.filter(pk=chunk.job_id).update(
+        chunks_done=F('chunks_done') + 1,
+        created_count=F('created_count') + created,
+        error_count=F('error_count') + len(errors),
+    )
+
+
+def finish_if_complete(job_id):
+    """Mark the job done (or failed, if a chunk failed) once every chunk has run."""
+    failed = ImportChunk.objects.filter(job_id=job_id, status='failed').exists()
+    ImportJob.objects.filter(pk=job_id, chunks_done=F('chunk_count'), finished_at__isnull=True).update(
+        status='failed' if failed else 'done', finished_at=timezone.now(),
+    )
+
+
+def rows_per_second(created, started_at, finished_at):
+    if started_at is None:
+        return None
+    elapsed = ((finished_at or timezone.now()) - started_at).total_seconds()
+    return round(created / elapsed, 1) if elapsed > 0 else None
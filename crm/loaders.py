@@ -0,0 +1,175 @@
+import asyncio
+from collections import defaultdict
+
+from django.db.models import F, Window
+from django.db.models.functions import RowNumber
+
+from .aio import alist, in_event_loop
+from .models import Customer, Order
+
+# -----------------------------
+# Request-scoped DataLoaders
+# -----------------------------
+#
+# graphene-django executes resolvers synchronously, so a loader cannot wait
+# for sibling resolvers to queue their keys. Instead, every list of instances
+# handed to GraphQL is tagged with its "peers" (the other instances fetched at
+# the same level), and the first resolver that misses the cache loads the keys
+# of all its peers with a single IN query. Relation loaders are windowed: they
+# load the first `limit` rows of each key, ranked with ROW_NUMBER(), so a page
+# of a nested connection never reads every row of a busy customer or product.
+
+
+class DataLoader:
+    """Caches batch-loaded values by key for the lifetime of one request.
+
+    `query_fn(keys)` returns the rows for a batch and `group_fn(rows)` maps
+    them to {key: value}. On the event loop, load() returns an awaitable that
+    evaluates the query with async iteration; concurrent loads of keys already
+    being fetched wait for that batch instead of starting another.
+    """
+
+    def __init__(self, query_fn, group_fn, default_factory=None):
+        self.query_fn = query_fn
+        self.group_fn = group_fn
+        self.default_factory = default_factory
+        self.cache = {}
+        self.pending = {}
+
+    def _store(self, keys, loaded):
+        for key in keys:
+            if key in loaded:
+                self.cache[key] = loaded[key]
+            else:
+                self.cache[key] = self.default_factory() if self.default_factory else None
+
+    def load_many(self, keys):
+        missing = [key for key in dict.fromkeys(keys) if key not in self.cache]
+        if missing:
+            self._store(missing, self.group_fn(list(self.query_fn(missing))))
+        return [self.cache[key] for key in keys]
+
+    def load(self, key, peer_keys=()):
+        if in_event_loop():
+            return self.aload(key, peer_keys)
+        self.load_many([key, *peer_keys])
+        return self.cache[key]
+
+    async def aload(self, key, peer_keys=()):
+        missing = [k for k in dict.fromkeys([key, *peer_keys]) if k not in self.cache and k not in self.pending]
+        if missing:
+            batch = asyncio.ensure_future(self._abatch(missing))
+            for k in missing:
+                self.pending[k] = batch
+        if key in self.pending:
+            await self.pending[key]
+        return self.cache[key]
+
+    async def _abatch(self, keys):
+        try:
+            self._store(keys, self.group_fn(await alist(self.query_fn(keys))))
+        finally:
+            for key in keys:
+                self.pending.pop(key, None)
+
+    def prime(self, key, value):
+        self.cache.setdefault(key, value)
+
+
+def attach_peers(instances):
+    """Mark instances as fetched together so their relations load in one batch."""
+    instances = list(instances)
+    for instance in instances:
+        instance._loader_peers = instances
+    return instances
+
+
+def peers_of(instance):
+    return getattr(instance, '_loader_peers', None) or [instance]
+
+
+# -----------------------------
+# Batch queries and grouping
+# -----------------------------
+def customers_query(customer_ids):
+    return Customer.objects.filter(pk__in=customer_ids)
+
+
+def group_customers(customers):
+    return {customer.pk: customer for customer in attach_peers(customers)}
+
+
+def first_rows(queryset, partition, limit, order='pk'):
+    """The first `limit` rows of `queryset` for each value of `partition`, ordered by `order`."""
+    rank = Window(RowNumber(), partition_by=F(partition), order_by=F(order).asc())
+    return queryset.annotate(_rank=rank).filter(_rank__lte=limit).order_by(order)
+
+
+def orders_by_customer_query(customer_ids, limit):
+    return first_rows(Order.objects.filter(customer_id__in=customer_ids), 'customer_id', limit)
+
+
+def group_orders_by_customer(orders):
+    grouped = defaultdict(list)
+    for order in attach_peers(orders):
+        grouped[order.customer_id].append(order)
+    return grouped
+
+
+def products_by_order_query(order_ids, limit):
+    through = Order.products.through
+    return first_rows(through.objects.filter(order_id__in=order_ids).select_related('product'), 'order_id', limit, 'product_id')
+
+
+def orders_by_product_query(product_ids, limit):
+    through = Order.products.through
+    return first_rows(through.objects.filter(product_id__in=product_ids).select_related('order'), 'product_id', limit, 'order_id')
+
+
+def group_through_rows(key_attr, target_attr):
+    def group(rows):
+        # The same target row can appear under several keys; share one instance.
+        instances = {}
+        grouped = defaultdict(list)
+        for row in rows:
+            target = getattr(row, target_attr)
+            target = instances.setdefault(target.pk, target)
+            grouped[getattr(row, key_attr)].append(target)
+        attach_peers(instances.values())
+        return grouped
+    return group
+
+
+# -----------------------------
+# Per-request registry
+# -----------------------------
+class Loaders:
+    def __init__(self):
+        self.customer = DataLoader(customers_query, group_customers)
+        self.windows = {}
+
+    def windowed(self, query_fn, group_fn, limit):
+        loader = self.windows.get((query_fn, limit))
+        if loader is None:
+            loader = DataLoader(lambda keys: query_fn(keys, limit), group_fn, list)
+            self.windows[query_fn, limit] = loader
+        return loader
+
+    def orders_by_customer(self, limit):
+        return self.windowed(orders_by_customer_query, group_orders_by_customer, limit)
+
+    def products_by_order(self, limit):
+        return self.windowed(products_by_order_query, group_through_rows('order_id', 'product'), limit)
+
+    def orders_by_product(self, limit):
+        return self.windowed(orders_by_product_query, group_through_rows('product_id', 'order'), limit)
+
+
+def get_loaders(context):
+    """Return the loaders bound to this request, creating them on first use."""
+    loaders = getattr(context, '_crm_loaders', None)
+    if loaders is None:
+        loaders = Loaders()
+        if context is not None:
+            context._crm_loaders = loaders
+    return loaders
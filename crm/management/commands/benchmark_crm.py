@@ -0,0 +1,72 @@
+import json
+import subprocess
+from datetime import datetime, timezone
+
+from django.core.management.base import BaseCommand, CommandError
+
+from alx_backend_graphql.schema import schema
+from crm import benchmarks
+
+
+def git_revision():
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+class Command(BaseCommand):
+    help = "Benchmark representative GraphQL operations on the current dataset (see seed_crm)."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--iterations', type=int, default=50)
+        parser.add_argument('--warmup', type=int, default=3)
+        parser.add_argument('--operation', action='append', dest='operations',
+                            choices=[operation.name for operation in benchmarks.OPERATIONS],
+                            help="Only run this operation; may be repeated.")
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument('--output', help="Write results as JSON to this file.")
+        parser.add_argument('--compare', help="Print changes against a JSON file from an earlier --output.")
+
+    def handle(self, *args, **options):
+        if options['iterations'] <= 0:
+            raise CommandError("--iterations must be positive.")
+
+        baseline = None
+        if options['compare']:
+            with open(options['compare']) as f:
+                baseline = json.load(f)['results']
+
+        try:
+            results = benchmarks.run(
+                schema,
+                iterations=options['iterations'],
+                warmup=options['warmup'],
+                names=options['operations'],
+                random_seed=options['seed'],
+            )
+        except ValueError as e:
+            raise CommandError(str(e))
+
+        report = {
+            'revision': git_revision(),
+            'timestamp': datetime.now(timezone.utc).isoformat(),
+            'iterations': options['iterations'],
+            'dataset': benchmarks.dataset_size(),
+            'results': results,
+        }
+        if options['output']:
+            with open(options['output'], 'w') as f:
+                json.dump(report, f, indent=2)
+
+        self.stdout.write(f"Dataset: {report['dataset']}  revision: {report['revision']}")
+        self.stdout.write(f"{'operation':<24}{'p50 ms':>10}{'p95 ms':>10}{'queries':>10}{'ops/s':>10}")
+        changes = benchmarks.compare(results, baseline) if baseline else {}
+        for name, row in results.items():
+            line = f"{name:<24}{row['p50_ms']:>10}{row['p95_ms']:>10}{row['queries']:>10}{row['ops_per_sec']:>10}"
+            change = changes.get(name)
+            if change and change['p50_ms'] is not None:
+                line += f"  p50 {change['p50_ms']:+.1%}  p95 {change['p95_ms'] or 0:+.1%}"
+            self.stdout.write(line)
@@ -0,0 +1,42 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from crm import cleanup
+
+
+class Command(BaseCommand):
+    help = "Delete customers with no orders in the last N days, in small batches."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int, default=365,
+                            help="Inactive means created, and not ordering, in the last N days.")
+        parser.add_argument('--batch-size', type=int, default=500, help="Customers deleted per transaction.")
+        parser.add_argument('--pause', type=float, default=0.1, help="Seconds to sleep between batches.")
+        parser.add_argument('--dry-run', action='store_true', help="Only count the inactive customers.")
+
+    def progress(self, customers, orders):
+        self.stdout.write(f"  deleted {customers} customers, {orders} orders")
+
+    def handle(self, *args, **options):
+        for name in ('days', 'batch_size'):
+            if options[name] <= 0:
+                raise CommandError(f"--{name.replace('_', '-')} must be positive.")
+        if options['pause'] < 0:
+            raise CommandError("--pause cannot be negative.")
+
+        cutoff = cleanup.cutoff_for(options['days'])
+        if options['dry_run']:
+            count = cleanup.inactive_customers(cutoff).count()
+            self.stdout.write(f"Would delete {count} inactive customers")
+            return
+
+        start = time.perf_counter()
+        customers, orders = cleanup.delete_inactive_customers(
+            cutoff,
+            batch_size=options['batch_size'],
+            pause=options['pause'],
+            progress=self.progress if options['verbosity'] > 1 else None,
+        )
+        elapsed = time.perf_counter() - start
+        self.stdout.write(f"Deleted {customers} inactive customers ({orders} orders) in {elapsed:.1f}s")
@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from crm import rollups
+
+
+class Command(BaseCommand):
+    help = "Rebuild the DailyOrderStats rollup table from Order and Customer."
+
+    def handle(self, *args, **options):
+        days = rollups.rebuild()
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt order stats for {days} days."))
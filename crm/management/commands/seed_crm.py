@@ -0,0 +1,53 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from crm import seed
+
+
+class Command(BaseCommand):
+    help = "Insert synthetic customers, products and orders for load testing."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--customers', type=int, default=1000)
+        parser.add_argument('--products', type=int, default=100)
+        parser.add_argument('--orders', type=int, default=5000)
+        parser.add_argument('--products-per-order', type=int, default=3,
+                            help="Maximum products per order; each order gets 1..N.")
+        parser.add_argument('--days', type=int, default=365,
+                            help="Spread customer and order dates over the last N days.")
+        parser.add_argument('--batch-size', type=int, default=5000)
+        parser.add_argument('--seed', type=int, default=0, help="Random seed, for reproducible datasets.")
+        parser.add_argument('--samples', action='store_true',
+                            help="Only create the two sample customers and products.")
+
+    def progress(self, model, done):
+        self.stdout.write(f"  {model._meta.verbose_name_plural}: {done}")
+
+    def handle(self, *args, **options):
+        if options['samples']:
+            seed.seed_samples()
+            self.stdout.write(self.style.SUCCESS("Sample customers and products created."))
+            return
+
+        for name in ('customers', 'products', 'orders'):
+            if options[name] < 0:
+                raise CommandError(f"--{name} cannot be negative.")
+        for name in ('products_per_order', 'days', 'batch_size'):
+            if options[name] <= 0:
+                raise CommandError(f"--{name.replace('_', '-')} must be positive.")
+
+        start = time.perf_counter()
+        created = seed.seed(
+            customers=options['customers'],
+            products=options['products'],
+            orders=options['orders'],
+            products_per_order=options['products_per_order'],
+            days=options['days'],
+            batch_size=options['batch_size'],
+            random_seed=options['seed'],
+            progress=self.progress if options['verbosity'] > 1 else None,
+        )
+        elapsed = time.perf_counter() - start
+        summary = ", ".join(f"{count} {model._meta.verbose_name_plural}" for model, count in created.items())
+        self.stdout.write(self.style.SUCCESS(f"Created {summary} in {elapsed:.1f}s."))
@@ -0,0 +1,180 @@
+import inspect
+import os
+import time
+from contextlib import ExitStack, asynccontextmanager, contextmanager
+
+from asgiref.sync import sync_to_async
+from django.db import connections
+from django.http import HttpResponse
+from prometheus_client import CONTENT_TYPE_LATEST, REGISTRY, CollectorRegistry, Counter, Gauge, Histogram, generate_latest
+from prometheus_client import multiprocess
+
+# -----------------------------
+# Prometheus metrics
+# -----------------------------
+#
+# With PROMETHEUS_MULTIPROC_DIR set (to the same directory for gunicorn
+# workers, celery workers and cron runs) every process writes its samples to
+# mmap-backed files there and /metrics aggregates them. Without it the
+# samples are per-process, which is fine for runserver.
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100, 200, 500)
+TASK_BUCKETS = (0.1, 0.5, 1.0, 5.0, 15.0, 60.0, 300.0, 900.0)
+
+graphql_requests = Counter(
+    'graphql_requests_total', 'GraphQL operations served.', ['operation', 'type', 'status'],
+)
+graphql_latency = Histogram(
+    'graphql_request_duration_seconds', 'GraphQL operation latency.', ['operation'], buckets=LATENCY_BUCKETS,
+)
+graphql_db_queries = Histogram(
+    'graphql_request_db_queries', 'SQL queries run per GraphQL request.', ['operation'], buckets=QUERY_COUNT_BUCKETS,
+)
+mutation_errors = Counter(
+    'graphql_mutation_errors_total', 'Failed GraphQL mutation fields.', ['mutation'],
+)
+cache_lookups = Counter(
+    'graphql_cache_lookups_total', 'GraphQL cache lookups by result.', ['cache', 'result'],
+)
+cache_invalidations = Counter(
+    'graphql_cache_invalidations_total', 'Model writes that invalidated cached GraphQL data.', ['cache'],
+)
+task_duration = Histogram(
+    'celery_task_duration_seconds', 'Celery task run time.', ['task', 'state'], buckets=TASK_BUCKETS,
+)
+heartbeat_timestamp = Gauge(
+    'crm_heartbeat_timestamp_seconds', 'Unix time of the last CRM heartbeat.', multiprocess_mode='max',
+)
+heartbeat_up = Gauge(
+    'crm_heartbeat_graphql_up', 'Whether the last heartbeat GraphQL query succeeded.',
+    multiprocess_mode='mostrecent',
+)
+heartbeat_latency = Gauge(
+    'crm_heartbeat_graphql_latency_seconds', 'Latency of the last heartbeat GraphQL query.',
+    multiprocess_mode='mostrecent',
+)
+
+
+class QueryCounter:
+    def __init__(self):
+        self.count = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        self.count += 1
+        return execute(sql, params, many, context)
+
+
+@contextmanager
+def count_queries():
+    counter = QueryCounter()
+    with ExitStack() as stack:
+        for connection in connections.all():
+            stack.enter_context(connection.execute_wrapper(counter))
+        yield counter
+
+
+@asynccontextmanager
+async def acount_queries():
+    """count_queries() for async views.
+
+    Installs the counter in the thread the async ORM runs this request's
+    queries in, which Django's ASGI handler keeps per request.
+    """
+    counter = QueryCounter()
+    stack = ExitStack()
+
+    def install():
+        for connection in connections.all():
+            stack.enter_context(connection.execute_wrapper(counter))
+
+    await sync_to_async(install)()
+    try:
+        yield counter
+    finally:
+        await sync_to_async(stack.close)()
+
+
+def operation_label(operation_ast):
+    """The operation's root fields, which the schema bounds; client-chosen operation names are not."""
+    if operation_ast is None:
+        return 'unknown'
+    fields = sorted({selection.name.value for selection in operation_ast.selection_set.selections if hasattr(selection, 'name')})
+    return ','.join(fields) or 'anonymous'
+
+
+def observe_request(operation_ast, result, duration, db_queries):
+    operation = operation_label(operation_ast)
+    operation_type = operation_ast.operation.value if operation_ast is not None else 'unknown'
+    status = 'error' if result.errors else 'ok'
+    graphql_requests.labels(operation, operation_type, status).inc()
+    graphql_latency.labels(operation).observe(duration)
+    graphql_db_queries.labels(operation).observe(db_queries)
+
+
+class MutationErrorMiddleware:
+    """Counts failed root mutation fields.
+
+    A mutation fails when it raises, returns a non-empty `errors` list, or
+    returns its record field (customer, product, order) as null.
+    """
+
+    def resolve(self, next, root, info, **args):
+        if info.path.prev is not None or info.operation.operation.value != 'mutation':
+            return next(root, info, **args)
+        try:
+            payload = next(root, info, **args)
+        except Exception:
+            mutation_errors.labels(info.field_name).inc()
+            raise
+        if inspect.isawaitable(payload):
+            # Under AsyncGraphQLView mutations return coroutines; count once they finish.
+            return self.aresolve(payload, info)
+        count_failures(info.field_name, payload)
+        return payload
+
+    async def aresolve(self, payload, info):
+        try:
+            payload = await payload
+        except Exception:
+            mutation_errors.labels(info.field_name).inc()
+            raise
+        count_failures(info.field_name, payload)
+        return payload
+
+
+def count_failures(mutation, payload):
+    failures = payload_errors(payload)
+    if failures:
+        mutation_errors.labels(mutation).inc(failures)
+
+
+def payload_errors(payload):
+    errors = getattr(payload, 'errors', None)
+    if errors:
+        return len(errors)
+    fields = getattr(getattr(type(payload), '_meta', None), 'fields', None) or {}
+    records = [name for name, field in fields.items() if hasattr(getattr(field.type, '_meta', None), 'model')]
+    return int(any(getattr(payload, name, None) is None for name in records))
+
+
+def record_cache_lookup(cache, hit):
+    cache_lookups.labels(cache, 'hit' if hit else 'miss').inc()
+
+
+def record_heartbeat(ok, latency):
+    heartbeat_timestamp.set(time.time())
+    heartbeat_up.set(1 if ok else 0)
+    heartbeat_latency.set(latency)
+
+
+def registry():
+    if 'PROMETHEUS_MULTIPROC_DIR' not in os.environ:
+        return REGISTRY
+    collector_registry = CollectorRegistry()
+    multiprocess.MultiProcessCollector(collector_registry)
+    return collector_registry
+
+
+def metrics_view(request):
+    return HttpResponse(generate_latest(registry()), content_type=CONTENT_TYPE_LATEST)
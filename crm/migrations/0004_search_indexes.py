@@ -0,0 +1,67 @@
+from django.db import migrations
+
+# Full-text search indexes used by crm.search.
+# SQLite: FTS5 external-content tables kept in sync by triggers, so rows
+# written with bulk_create() or update() are indexed too.
+# PostgreSQL: GIN expression indexes matching crm.search.search_vector().
+
+FTS_TABLES = [
+    ('crm_customer', 'crm_customer_fts', ['name', 'email']),
+    ('crm_product', 'crm_product_fts', ['name']),
+]
+
+
+def sqlite_statements(table, fts, columns):
+    cols = ', '.join(columns)
+    new_cols = ', '.join(f'new.{c}' for c in columns)
+    old_cols = ', '.join(f'old.{c}' for c in columns)
+    return [
+        f"CREATE VIRTUAL TABLE {fts} USING fts5({cols}, content='{table}', content_rowid='id')",
+        f"CREATE TRIGGER {fts}_ai AFTER INSERT ON {table} BEGIN "
+        f"INSERT INTO {fts}(rowid, {cols}) VALUES (new.id, {new_cols}); END",
+        f"CREATE TRIGGER {fts}_ad AFTER DELETE ON {table} BEGIN "
+        f"INSERT INTO {fts}({fts}, rowid, {cols}) VALUES ('delete', old.id, {old_cols}); END",
+        f"CREATE TRIGGER {fts}_au AFTER UPDATE ON {table} BEGIN "
+        f"INSERT INTO {fts}({fts}, rowid, {cols}) VALUES ('delete', old.id, {old_cols}); "
+        f"INSERT INTO {fts}(rowid, {cols}) VALUES (new.id, {new_cols}); END",
+        f"INSERT INTO {fts}({fts}) VALUES ('rebuild')",
+    ]
+
+
+def create_search_indexes(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == 'sqlite':
+        for table, fts, columns in FTS_TABLES:
+            for statement in sqlite_statements(table, fts, columns):
+                schema_editor.execute(statement)
+    elif vendor == 'postgresql':
+        from django.contrib.postgres.indexes import GinIndex
+        from django.contrib.postgres.search import SearchVector
+
+        for model_name, fields in (('Customer', ['name', 'email']), ('Product', ['name'])):
+            model = apps.get_model('crm', model_name)
+            index = GinIndex(SearchVector(*fields, config='simple'), name=f'crm_{model_name.lower()}_search_idx')
+            schema_editor.add_index(model, index)
+
+
+def drop_search_indexes(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == 'sqlite':
+        for table, fts, columns in FTS_TABLES:
+            for suffix in ('ai', 'ad', 'au'):
+                schema_editor.execute(f"DROP TRIGGER IF EXISTS {fts}_{suffix}")
+            schema_editor.execute(f"DROP TABLE IF EXISTS {fts}")
+    elif vendor == 'postgresql':
+        for model_name in ('customer', 'product'):
+            schema_editor.execute(f"DROP INDEX IF EXISTS crm_{model_name}_search_idx")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('crm', '0003_filter_indexes'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_indexes, drop_search_indexes),
+    ]
@@ -0,0 +1,54 @@
+# Generated by Django 5.2.18 on 2026-10-18 18:05
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('crm', '0004_search_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ImportJob',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('customers', 'Customers'), ('orders', 'Orders')], max_length=20)),
+                ('source', models.CharField(max_length=255)),
+                ('format', models.CharField(max_length=10)),
+                ('status', models.CharField(choices=[('pending', 'Pending'), ('running', 'Running'), ('done', 'Done'), ('failed', 'Failed')], default='pending', max_length=10)),
+                ('chunk_size', models.PositiveIntegerField()),
+                ('total_rows', models.PositiveIntegerField(default=0)),
+                ('chunk_count', models.PositiveIntegerField(blank=True, null=True)),
+                ('chunks_done', models.PositiveIntegerField(default=0)),
+                ('created_count', models.PositiveIntegerField(default=0)),
+                ('error_count', models.PositiveIntegerField(default=0)),
+                ('errors', models.JSONField(blank=True, default=list)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('started_at', models.DateTimeField(blank=True, null=True)),
+                ('finished_at', models.DateTimeField(blank=True, null=True)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='ImportChunk',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('index', models.PositiveIntegerField()),
+                ('first_row', models.PositiveIntegerField()),
+                ('last_row', models.PositiveIntegerField()),
+                ('row_count', models.PositiveIntegerField()),
+                ('status', models.CharField(choices=[('pending', 'Pending'), ('running', 'Running'), ('done', 'Done'), ('failed', 'Failed')], default='pending', max_length=10)),
+                ('created_count', models.PositiveIntegerField(default=0)),
+                ('errors', models.JSONField(blank=True, default=list)),
+                ('started_at', models.DateTimeField(blank=True, null=True)),
+                ('finished_at', models.DateTimeField(blank=True, null=True)),
+                ('job', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='chunks', to='crm.importjob')),
+            ],
+            options={
+                'ordering': ['job', 'index'],
+                'constraints': [models.UniqueConstraint(fields=('job', 'index'), name='crm_importchunk_job_index_uniq')],
+            },
+        ),
+    ]
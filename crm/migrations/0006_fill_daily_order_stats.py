@@ -0,0 +1,23 @@
+from django.db import migrations
+
+# 0002 created DailyOrderStats empty; fill it from the orders and customers
+# already in the database, as `manage.py rebuild_order_stats` does.
+
+
+def fill_daily_order_stats(apps, schema_editor):
+    from crm.rollups import rebuild_from
+
+    rebuild_from(
+        apps.get_model('crm', 'Order'), apps.get_model('crm', 'Customer'), apps.get_model('crm', 'DailyOrderStats'),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('crm', '0005_import_jobs'),
+    ]
+
+    operations = [
+        migrations.RunPython(fill_daily_order_stats, migrations.RunPython.noop),
+    ]
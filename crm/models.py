@@ -4,6 +4,15 @@ class Customer(models.Model):
     name = models.CharField(max_length=100)
     email = models.EmailField(unique=True)
     phone = models.CharField(max_length=20, blank=True, null=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            # CustomerFilter.created_at_gte/lte
+            models.Index(fields=['created_at', 'id'], name='crm_customer_created_id_idx'),
+            # CustomerFilter.phone_pattern (prefix match)
+            models.Index(fields=['phone'], name='crm_customer_phone_idx', opclasses=['varchar_pattern_ops']),
+        ]
 
     def __str__(self):
         return self.name
@@ -13,6 +22,13 @@ class Product(models.Model):
     price = models.DecimalField(max_digits=10, decimal_places=2)
     stock = models.PositiveIntegerField(default=0)
 
+    class Meta:
+        indexes = [
+            # ProductFilter price/stock ranges, order_by price/stock and keyset cursors
+            models.Index(fields=['price', 'id'], name='crm_product_price_id_idx'),
+            models.Index(fields=['stock', 'id'], name='crm_product_stock_id_idx'),
+        ]
+
     def __str__(self):
         return self.name
 
@@ -22,5 +38,70 @@ class Order(models.Model):
     total_amount = models.DecimalField(max_digits=12, decimal_places=2, default=0)
     order_date = models.DateTimeField(auto_now_add=True)
 
+    class Meta:
+        indexes = [
+            # OrderFilter order_date/total_amount ranges, order_by and keyset cursors
+            models.Index(fields=['order_date', 'id'], name='crm_order_date_id_idx'),
+            models.Index(fields=['total_amount', 'id'], name='crm_order_total_id_idx'),
+            # Customer.orders lookups, newest first
+            models.Index(fields=['customer', 'order_date'], name='crm_order_customer_date_idx'),
+        ]
+
     def __str__(self):
         return f"Order {self.id} for {self.customer.name}"
+
+class DailyOrderStats(models.Model):
+    """Per-day rollup of order and customer counters, kept current by crm.rollups."""
+    date = models.DateField(unique=True)
+    order_count = models.IntegerField(default=0)
+    revenue = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    new_customers = models.IntegerField(default=0)
+
+    def __str__(self):
+        return f"Stats for {self.date}"
+
+class ImportJob(models.Model):
+    """A bulk import split into ImportChunks, each inserted by a Celery task (see crm.imports)."""
+    KINDS = [('customers', 'Customers'), ('orders', 'Orders')]
+    STATUSES = [('pending', 'Pending'), ('running', 'Running'), ('done', 'Done'), ('failed', 'Failed')]
+
+    kind = models.CharField(max_length=20, choices=KINDS)
+    source = models.CharField(max_length=255)
+    format = models.CharField(max_length=10)
+    status = models.CharField(max_length=10, choices=STATUSES, default='pending')
+    chunk_size = models.PositiveIntegerField()
+    total_rows = models.PositiveIntegerField(default=0)
+    # Set once the file is fully split; chunks finishing before that can't complete the job.
+    chunk_count = models.PositiveIntegerField(null=True, blank=True)
+    chunks_done = models.PositiveIntegerField(default=0)
+    created_count = models.PositiveIntegerField(default=0)
+    error_count = models.PositiveIntegerField(default=0)
+    # Rows rejected while splitting (bad JSON, missing columns)
+    errors = models.JSONField(default=list, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    def __str__(self):
+        return f"Import {self.id} of {self.kind} from {self.source}"
+
+class ImportChunk(models.Model):
+    job = models.ForeignKey(ImportJob, on_delete=models.CASCADE, related_name='chunks')
+    index = models.PositiveIntegerField()
+    first_row = models.PositiveIntegerField()
+    last_row = models.PositiveIntegerField()
+    row_count = models.PositiveIntegerField()
+    status = models.CharField(max_length=10, choices=ImportJob.STATUSES, default='pending')
+    created_count = models.PositiveIntegerField(default=0)
+    errors = models.JSONField(default=list, blank=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ['job', 'index']
+        constraints = [
+            models.UniqueConstraint(fields=['job', 'index'], name='crm_importchunk_job_index_uniq'),
+        ]
+
+    def __str__(self):
+        return f"Chunk {self.index} of import {self.job_id}"
@@ -0,0 +1,205 @@
+import base64
+import json
+from functools import partial
+
+from django.db.models import F, Q
+from graphene.relay.connection import connection_adapter, page_info_adapter
+from graphql import GraphQLError
+from graphql_relay import connection_from_array_slice, cursor_to_offset, get_offset_with_default, offset_to_cursor
+
+from .aio import alist
+
+# -----------------------------
+# Keyset (seek) pagination
+# -----------------------------
+#
+# Offset cursors make the database scan and discard every row before the
+# requested page. Keyset cursors instead encode the sort key values of the
+# last row seen (plus the primary key as a tie-breaker), and the next page is
+# fetched with a `WHERE (sort_key, id) > (...)` predicate that an index on the
+# same columns can seek to directly.
+
+CURSOR_PREFIX = 'keyset:'
+
+
+def ordering_keys(queryset):
+    """Return [(field path, descending), ...] for the queryset ordering, ending with pk."""
+    keys = []
+    for term in queryset.query.order_by or ('pk',):
+        if not isinstance(term, str):
+            raise GraphQLError("Keyset pagination only supports ordering by field names.")
+        descending = term.startswith('-')
+        name = term.lstrip('-+')
+        if name in ('pk', queryset.model._meta.pk.name):
+            name = 'pk'
+        keys.append((name, descending))
+    if keys[-1][0] != 'pk':
+        keys.append(('pk', keys[0][1]))
+    return keys
+
+
+def encode_cursor(values):
+    payload = json.dumps(values, default=str, separators=(',', ':'))
+    return base64.urlsafe_b64encode((CURSOR_PREFIX + payload).encode()).decode()
+
+
+def decode_cursor(cursor, keys, output_fields):
+    try:
+        payload = base64.urlsafe_b64decode(cursor.encode()).decode()
+        if not payload.startswith(CURSOR_PREFIX):
+            raise ValueError(payload)
+        values = json.loads(payload[len(CURSOR_PREFIX):])
+    except ValueError:
+        raise GraphQLError(f"Invalid keyset cursor: {cursor}")
+    if len(values) != len(keys):
+        raise GraphQLError("Cursor does not match the requested ordering.")
+    return [field.to_python(value) for field, value in zip(output_fields, values)]
+
+
+def seek(keys, values, forward):
+    """Build the expanded row-value predicate `(k1, k2, ...) >/< (v1, v2, ...)`."""
+    predicate = Q()
+    for i, (name, descending) in enumerate(keys):
+        lookup = 'lt' if descending == forward else 'gt'
+        clause = Q(**{f'{name}__{lookup}': values[i]})
+        for (prev_name, _), prev_value in zip(keys[:i], values[:i]):
+            clause &= Q(**{prev_name: prev_value})
+        predicate |= clause
+    return predicate
+
+
+def keyset_page(connection, args, queryset, max_limit=None):
+    """Return (page queryset, build) where build(rows) makes the connection from the fetched rows."""
+    if args.get('offset') is not None:
+        raise GraphQLError("`offset` cannot be combined with keyset pagination.")
+
+    first = args.get('first')
+    last = args.get('last')
+    after = args.get('after')
+    before = args.get('before')
+    if first is None and last is None:
+        first = max_limit
+
+    keys = ordering_keys(queryset)
+    aliases = [f'_keyset_{i}' for i in range(len(keys))]
+    queryset = queryset.annotate(**{alias: F(name) for alias, (name, _) in zip(aliases, keys)})
+    output_fields = [queryset.query.annotations[alias].output_field for alias in aliases]
+
+    if after:
+        queryset = queryset.filter(seek(keys, decode_cursor(after, keys, output_fields), forward=True))
+    if before:
+        queryset = queryset.filter(seek(keys, decode_cursor(before, keys, output_fields), forward=False))
+
+    if first is not None:
+        forward_ordering = [f"{'-' if descending else ''}{name}" for name, descending in keys]
+        page = queryset.order_by(*forward_ordering)[:first + 1]
+    else:
+        backward_ordering = [f"{'' if descending else '-'}{name}" for name, descending in keys]
+        page = queryset.order_by(*backward_ordering)[:last + 1]
+
+    def build(nodes):
+        if first is not None:
+            has_next = len(nodes) > first
+            nodes = nodes[:first]
+            if last is not None and len(nodes) > last:
+                nodes = nodes[len(nodes) - last:]
+                has_previous = True
+            else:
+                has_previous = bool(after)
+        else:
+            has_previous = len(nodes) > last
+            nodes = nodes[:last][::-1]
+            has_next = bool(before)
+
+        edges = [
+            connection.Edge(node=node, cursor=encode_cursor([getattr(node, alias) for alias in aliases]))
+            for node in nodes
+        ]
+        page_info = page_info_adapter(
+            startCursor=edges[0].cursor if edges else None,
+            endCursor=edges[-1].cursor if edges else None,
+            hasPreviousPage=has_previous,
+            hasNextPage=has_next,
+        )
+        return connection_adapter(connection, edges, page_info)
+
+    return page, build
+
+
+def keyset_connection(connection, args, queryset, max_limit=None):
+    """Resolve a relay connection page with keyset cursors instead of offsets."""
+    page, build = keyset_page(connection, args, queryset, max_limit)
+    return build(list(page))
+
+
+async def akeyset_connection(connection, args, queryset, max_limit=None):
+    page, build = keyset_page(connection, args, queryset, max_limit)
+    return build(await alist(page))
+
+
+# -----------------------------
+# Offset pagination
+# -----------------------------
+#
+# The same windowing as DjangoConnectionField.resolve_connection, but the
+# row count is passed in (it may come from crm/counts.py) and may be None:
+# a forward page is then fetched with one extra row to tell whether another
+# page follows, without counting at all.
+
+
+def offset_window(args, length, max_limit=None):
+    """Return (start, end) rows to fetch; `end` is None for "to the end"."""
+    offset = args.pop('offset', None)
+    after = args.get('after')
+    if offset:
+        if after:
+            offset += cursor_to_offset(after) + 1
+        args['after'] = offset_to_cursor(offset - 1)
+    if max_limit is not None and args.get('first') is None and args.get('last') is None:
+        args['first'] = max_limit
+
+    start = max(get_offset_with_default(args.get('after'), -1) + 1, 0)
+    if length is None:
+        first = args.get('first')
+        return start, None if first is None else start + first + 1
+    start = min(start, length)
+    end = min(get_offset_with_default(args.get('before'), length), length)
+    if args.get('first') is not None:
+        end = min(end, start + args['first'])
+    if args.get('last') is not None:
+        start = max(start, end - args['last'])
+    return start, end
+
+
+def offset_result(connection, args, queryset, rows, start, length):
+    if length is None and rows:
+        first = args.get('first')
+        if first is None or len(rows) <= first:
+            length = start + len(rows)  # the page reached the last row
+    result = connection_from_array_slice(
+        rows,
+        args,
+        slice_start=start,
+        array_length=start + len(rows) if length is None else length,
+        array_slice_length=len(rows),
+        connection_type=partial(connection_adapter, connection),
+        edge_type=connection.Edge,
+        page_info_type=page_info_adapter,
+    )
+    result.iterable = queryset
+    result.length = length
+    return result
+
+
+def offset_connection(connection, args, queryset, length, max_limit=None):
+    """Resolve an offset-paginated connection page of `length` rows in all (None: unknown)."""
+    start, end = offset_window(args, length, max_limit)
+    rows = list(queryset[start:end]) if end is None or end > start else []
+    return offset_result(connection, args, queryset, rows, start, length)
+
+
+async def aoffset_connection(connection, args, queryset, length, max_limit=None):
+    """Async counterpart of offset_connection: fetches only the window with async iteration."""
+    start, end = offset_window(args, length, max_limit)
+    rows = await alist(queryset[start:end]) if end is None or end > start else []
+    return offset_result(connection, args, queryset, rows, start, length)
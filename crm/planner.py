@@ -0,0 +1,165 @@
+from django.core.exceptions import FieldDoesNotExist
+from django.db.models import Prefetch
+from graphene.utils.str_converters import to_snake_case
+from graphene_django.settings import graphene_settings
+from graphql.language import FieldNode, FragmentSpreadNode, InlineFragmentNode
+from graphql.utilities import value_from_ast_untyped
+from graphql_relay import cursor_to_offset
+
+PAGINATION_ARGS = {'first', 'last', 'before', 'after', 'offset'}
+COUNT_FIELDS = {'totalCount', 'totalCountIsExact'}
+
+# -----------------------------
+# Selection-set driven query planner
+# -----------------------------
+#
+# Walks the fields a client selected under a connection and turns them into
+# select_related() for forward FKs, prefetch_related() with nested Prefetch
+# querysets for M2M and reverse relations, and only() so unrequested columns
+# are never fetched. Nested connections fetch only the first rows of each
+# parent that their page can be cut from (see window_size).
+
+
+def plan_queryset(queryset, info):
+    """Shape a connection queryset from the node fields selected in `info`."""
+    fields = connection_node_fields(info, info.field_nodes)
+    return _apply_plan(queryset, fields, info)
+
+
+def selected_fields(info, selection_set):
+    """Return {field name: [FieldNode, ...]} for a selection set, expanding fragments."""
+    fields = {}
+    if selection_set is None:
+        return fields
+    for selection in selection_set.selections:
+        if isinstance(selection, FieldNode):
+            fields.setdefault(selection.name.value, []).append(selection)
+        else:
+            if isinstance(selection, FragmentSpreadNode):
+                selection = info.fragments[selection.name.value]
+            elif not isinstance(selection, InlineFragmentNode):
+                continue
+            for name, nodes in selected_fields(info, selection.selection_set).items():
+                fields.setdefault(name, []).extend(nodes)
+    return fields
+
+
+def connection_node_fields(info, field_nodes):
+    """Merge the `edges { node { ... } }` selections of one or more connection fields."""
+    fields = {}
+    for field_node in field_nodes:
+        for edges in selected_fields(info, field_node.selection_set).get('edges', []):
+            for node in selected_fields(info, edges.selection_set).get('node', []):
+                for name, nodes in selected_fields(info, node.selection_set).items():
+                    fields.setdefault(name, []).extend(nodes)
+    return fields
+
+
+def window_attr(name):
+    return f'_first_{name}'
+
+
+def prefetched_list(instance, name):
+    """Return the prefetched objects for relation `name`, or None if not prefetched."""
+    window = getattr(instance, window_attr(name), None)
+    if window is not None:
+        return window
+    cache = getattr(instance, '_prefetched_objects_cache', {})
+    if name in cache:
+        return list(cache[name])
+    return None
+
+
+def argument_values(info, field_node):
+    # graphql-core 3.3 wraps the coerced variables; older versions pass the dict itself.
+    variables = getattr(info.variable_values, 'coerced', info.variable_values)
+    return {
+        to_snake_case(argument.name.value): value_from_ast_untyped(argument.value, variables)
+        for argument in field_node.arguments or ()
+    }
+
+
+def window_size(args, info, field_nodes):
+    """Rows per parent a nested connection page is cut from, or None if it needs them all.
+
+    Pages are offset based: `first` rows after `offset` and the `after` cursor,
+    plus one to tell whether there is a next page. `last`, `before` and
+    totalCount need every row, so those connections query each parent instead.
+    """
+    if args.get('last') is not None or args.get('before') is not None:
+        return None
+    if any(COUNT_FIELDS & set(selected_fields(info, node.selection_set)) for node in field_nodes):
+        return None
+    first, max_limit = args.get('first'), graphene_settings.RELAY_CONNECTION_MAX_LIMIT
+    if first is None or (max_limit and first > max_limit):
+        first = max_limit
+    if first is None or first < 0:
+        return None
+    start = args.get('offset') or 0
+    if args.get('after') is not None:
+        after = cursor_to_offset(args['after'])
+        if after is None:
+            return None
+        start += after + 1
+    return start + first + 1
+
+
+def _has_filter_args(field_nodes):
+    return any(
+        argument.name.value not in PAGINATION_ARGS
+        for field_node in field_nodes
+        for argument in field_node.arguments or ()
+    )
+
+
+def _apply_plan(queryset, fields, info, required=()):
+    only, select, prefetch = _plan(queryset.model, fields, info, prefix='')
+    if select:
+        queryset = queryset.select_related(*select)
+    if prefetch:
+        queryset = queryset.prefetch_related(*prefetch)
+    return queryset.only(*only, *required)
+
+
+def _plan(model, fields, info, prefix):
+    only = [prefix + model._meta.pk.name]
+    select = []
+    prefetch = []
+
+    for name, field_nodes in fields.items():
+        try:
+            field = model._meta.get_field(to_snake_case(name))
+        except FieldDoesNotExist:
+            continue
+
+        if not field.is_relation:
+            only.append(prefix + field.name)
+        elif field.many_to_one or (field.one_to_one and field.concrete):
+            path = prefix + field.name
+            sub_fields = {}
+            for field_node in field_nodes:
+                for sub_name, nodes in selected_fields(info, field_node.selection_set).items():
+                    sub_fields.setdefault(sub_name, []).extend(nodes)
+            sub_only, sub_select, sub_prefetch = _plan(field.related_model, sub_fields, info, path + '__')
+            only.append(path)
+            only.extend(sub_only)
+            select.append(path)
+            select.extend(sub_select)
+            prefetch.extend(sub_prefetch)
+        elif field.many_to_many or field.one_to_many:
+            # Filtered nested connections are resolved through the related manager.
+            if _has_filter_args(field_nodes):
+                continue
+            windows = [window_size(argument_values(info, node), info, [node]) for node in field_nodes]
+            if None in windows:
+                continue
+            accessor = field.get_accessor_name() if field.auto_created else field.name
+            # Reverse FK prefetches need the FK column to group rows by parent.
+            required = [field.field.attname] if field.one_to_many else []
+            related = field.related_model._default_manager.order_by('pk')
+            sub_fields = connection_node_fields(info, field_nodes)
+            # Django fetches a sliced prefetch with ROW_NUMBER() per parent; it must go to a list attribute.
+            queryset = _apply_plan(related, sub_fields, info, required)[:max(windows)]
+            prefetch.append(Prefetch(prefix + accessor, queryset=queryset, to_attr=window_attr(accessor)))
+
+    return only, select, prefetch
@@ -0,0 +1,120 @@
+import threading
+from collections import defaultdict
+from contextlib import contextmanager
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import Count, F, Sum
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+from .models import Customer, DailyOrderStats, Order
+
+# -----------------------------
+# Daily order/customer rollups
+# -----------------------------
+#
+# Reports read DailyOrderStats instead of scanning Order and Customer. Every
+# write path keeps the rollup current: model signals cover save()/delete(),
+# and bulk_create() callers report their rows explicitly.
+
+
+_pending = threading.local()
+
+
+@contextmanager
+def batched():
+    """Merge the deltas of record_* calls made inside the block and apply them once, on exit.
+
+    For batch deletes, whose post_delete signals would otherwise update the
+    rollup once per row. Use inside the transaction doing the writes.
+    """
+    if getattr(_pending, 'deltas', None) is not None:
+        yield
+        return
+    _pending.deltas = defaultdict(lambda: defaultdict(int))
+    try:
+        yield
+        deltas = _pending.deltas
+    finally:
+        _pending.deltas = None
+    _write(deltas)
+
+
+def _apply(deltas):
+    """Add {date: {field: delta}} to the rollup rows, or to the enclosing batched() block."""
+    pending = getattr(_pending, 'deltas', None)
+    if pending is None:
+        _write(deltas)
+        return
+    for date, fields in deltas.items():
+        for name, value in fields.items():
+            pending[date][name] += value
+
+
+def _write(deltas):
+    """Add {date: {field: delta}} to the rollup rows with F() updates."""
+    for date, fields in deltas.items():
+        DailyOrderStats.objects.get_or_create(date=date)
+        DailyOrderStats.objects.filter(date=date).update(
+            **{name: F(name) + value for name, value in fields.items()}
+        )
+
+
+def record_orders(orders, sign=1):
+    deltas = defaultdict(lambda: {'order_count': 0, 'revenue': Decimal('0')})
+    for order in orders:
+        day = deltas[timezone.localdate(order.order_date)]
+        day['order_count'] += sign
+        day['revenue'] += sign * Decimal(str(order.total_amount))
+    _apply(deltas)
+
+
+def record_customers(customers, sign=1):
+    deltas = defaultdict(lambda: {'new_customers': 0})
+    for customer in customers:
+        deltas[timezone.localdate(customer.created_at)]['new_customers'] += sign
+    _apply(deltas)
+
+
+@transaction.atomic
+def rebuild():
+    """Recompute every rollup row from the Order and Customer tables."""
+    return rebuild_from(Order, Customer, DailyOrderStats)
+
+
+def rebuild_from(Order, Customer, DailyOrderStats):
+    """rebuild() over the given models; data migrations pass their historical ones."""
+    days = defaultdict(dict)
+    orders = (
+        Order.objects.annotate(day=TruncDate('order_date'))
+        .values('day')
+        .annotate(order_count=Count('pk'), revenue=Sum('total_amount'))
+    )
+    for row in orders:
+        days[row['day']].update(order_count=row['order_count'], revenue=row['revenue'])
+    customers = Customer.objects.annotate(day=TruncDate('created_at')).values('day').annotate(new_customers=Count('pk'))
+    for row in customers:
+        days[row['day']]['new_customers'] = row['new_customers']
+
+    DailyOrderStats.objects.all().delete()
+    DailyOrderStats.objects.bulk_create(
+        [DailyOrderStats(date=date, **fields) for date, fields in sorted(days.items())],
+        batch_size=1000,
+    )
+    return len(days)
+
+
+def totals(start=None, end=None):
+    """Sum the rollup rows between two dates (inclusive); constant in the size of Order."""
+    rows = DailyOrderStats.objects.all()
+    if start is not None:
+        rows = rows.filter(date__gte=start)
+    if end is not None:
+        rows = rows.filter(date__lte=end)
+    result = rows.aggregate(
+        orders=Sum('order_count'), revenue=Sum('revenue'), customers=Sum('new_customers')
+    )
+    result = {key: value or 0 for key, value in result.items()}
+    result['revenue'] = Decimal(result['revenue']).quantize(Decimal('0.01'))
+    return result
@@ -0,0 +1,149 @@
+import itertools
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.db.utils import DatabaseError, InterfaceError, OperationalError
+from django.utils.connection import ConnectionDoesNotExist
+from graphql import OperationType
+
+# -----------------------------
+# Primary/replica routing
+# -----------------------------
+#
+# CachedGraphQLView runs each query operation inside read_from(alias) with a
+# replica picked by replica_for(); PrimaryReplicaRouter sends the ORM reads
+# made meanwhile to that alias. Everything else (mutations, cron jobs,
+# imports, the admin) reads and writes the primary. A mutation pins its
+# client to the primary for STICKY_SECONDS, within the request and through a
+# cookie, so the client reads its own writes. A replica that can't be
+# reached, or whose query fails with a connection error, is skipped for
+# RETRY_AFTER seconds and the operation is retried on the primary.
+
+DEFAULTS = {
+    'REPLICAS': [],
+    'STICKY_SECONDS': 5,
+    'RETRY_AFTER': 30,
+    'COOKIE': 'crm_primary_until',
+}
+
+CONNECTION_ERRORS = (OperationalError, InterfaceError)
+
+_read_alias = ContextVar('crm_read_alias', default=None)
+_down_until = {}
+_lock = threading.Lock()
+_turn = itertools.count()
+
+
+def routing_settings():
+    return {**DEFAULTS, **getattr(settings, 'CRM_DATABASE_ROUTING', {})}
+
+
+class PrimaryReplicaRouter:
+    """Reads go to the alias chosen for the current GraphQL query, writes to the primary."""
+
+    def db_for_read(self, model, **hints):
+        return _read_alias.get()
+
+    def db_for_write(self, model, **hints):
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Replicas hold the same rows as the primary.
+        return True
+
+
+@contextmanager
+def read_from(alias):
+    token = _read_alias.set(alias)
+    try:
+        yield
+    finally:
+        _read_alias.reset(token)
+
+
+def is_read_only(operation_ast):
+    return operation_ast is not None and operation_ast.operation == OperationType.QUERY
+
+
+# -----------------------------
+# Read-your-writes
+# -----------------------------
+def pin(request):
+    """Send this client's reads to the primary: for the rest of the request, and via the response cookie."""
+    request._crm_pinned = True
+
+
+def is_pinned(request):
+    if getattr(request, '_crm_pinned', False):
+        return True
+    try:
+        until = float(request.COOKIES.get(routing_settings()['COOKIE'], 0))
+    except ValueError:
+        return False
+    return until > time.time()
+
+
+def remember_writes(request, response):
+    """Set the pin cookie on the response of a request that ran a mutation."""
+    if getattr(request, '_crm_pinned', False):
+        config = routing_settings()
+        seconds = config['STICKY_SECONDS']
+        response.set_cookie(
+            config['COOKIE'], f"{time.time() + seconds:.3f}", max_age=seconds, httponly=True, samesite='Lax',
+        )
+    return response
+
+
+# -----------------------------
+# Replica health
+# -----------------------------
+def mark_down(alias):
+    with _lock:
+        _down_until[alias] = time.monotonic() + routing_settings()['RETRY_AFTER']
+
+
+def is_healthy(alias):
+    """Whether `alias` can take reads; connects to it if this thread hasn't yet."""
+    if _down_until.get(alias, 0) > time.monotonic():
+        return False
+    try:
+        connections[alias].ensure_connection()
+    except (ConnectionDoesNotExist, DatabaseError):
+        mark_down(alias)
+        return False
+    with _lock:
+        _down_until.pop(alias, None)
+    return True
+
+
+def replica_for(request):
+    """The alias to run a query operation on: a healthy replica, or the primary."""
+    replicas = routing_settings()['REPLICAS']
+    if not replicas or is_pinned(request):
+        return DEFAULT_DB_ALIAS
+    start = next(_turn)
+    for offset in range(len(replicas)):
+        alias = replicas[(start + offset) % len(replicas)]
+        if is_healthy(alias):
+            return alias
+    return DEFAULT_DB_ALIAS
+
+
+def failed_on_replica(result, alias):
+    """Mark `alias` down and return True if `result` failed on a lost replica connection."""
+    if alias == DEFAULT_DB_ALIAS or not result.errors:
+        return False
+    if any(isinstance(getattr(error, 'original_error', error), CONNECTION_ERRORS) for error in result.errors):
+        mark_down(alias)
+        return True
+    return False
+
+
+def health():
+    """{alias: seconds until it is retried, or 0 if in use} for every configured replica."""
+    now = time.monotonic()
+    return {alias: max(0.0, round(_down_until.get(alias, 0) - now, 1)) for alias in routing_settings()['REPLICAS']}
@@ -1,12 +1,144 @@
+import asyncio
+import inspect
+from datetime import timedelta
+
+from asgiref.sync import sync_to_async
 import graphene
 from graphene_django import DjangoObjectType
 from graphene_django.filter import DjangoFilterConnectionField
+from graphene_django.filter.utils import get_filtering_args_from_filterset
 from graphene import relay
+from graphene.utils.str_converters import to_snake_case
+from django.core.exceptions import ValidationError
 from django.core.validators import RegexValidator
 from django.db import IntegrityError, transaction
-from .models import Customer, Product, Order
+from django.db.models import F, QuerySet
+from django.utils import timezone
+from graphql import GraphQLError
+from graphql_relay import from_global_id
+from .models import Customer, ImportChunk, ImportJob, Product, Order
 from crm.models import Product
+from . import counts, imports, rollups, stats
+from .aio import alist, call_sync, in_event_loop
+from .cache import invalidate_models
 from .filters import CustomerFilter, ProductFilter, OrderFilter
+from .loaders import attach_peers, get_loaders, peers_of
+from .pagination import akeyset_connection, aoffset_connection, keyset_connection, offset_connection
+from .planner import PAGINATION_ARGS, plan_queryset, prefetched_list, window_size
+
+
+def is_filtered(kwargs):
+    return any(key not in PAGINATION_ARGS for key in kwargs)
+
+# -----------------------------
+# Connection fields
+# -----------------------------
+class BatchedConnectionField(DjangoFilterConnectionField):
+    """Connection field that accepts loader lists and tags each page for batching."""
+
+    def __init__(self, type_, *args, order_by=None, **kwargs):
+        # DjangoFilterConnectionField swallows `order_by`; expose it as a field argument.
+        if order_by is not None:
+            kwargs.setdefault('args', {})['order_by'] = order_by
+        super().__init__(type_, *args, **kwargs)
+
+    @classmethod
+    def resolve_queryset(cls, connection, iterable, info, args, filtering_args, filterset_class):
+        # Lists come from a DataLoader and are already scoped to their parent;
+        # awaitables are DataLoader loads on the event loop.
+        if isinstance(iterable, list) or inspect.isawaitable(iterable):
+            return iterable
+        return super().resolve_queryset(connection, iterable, info, args, filtering_args, filterset_class)
+
+    @classmethod
+    def resolve_connection(cls, connection, args, iterable, max_limit=None):
+        if in_event_loop():
+            return cls.aresolve_connection(connection, args, iterable, max_limit)
+        strategy = count_strategy(args)
+        if args.get('keyset') and isinstance(iterable, QuerySet):
+            connection = keyset_connection(connection, args, iterable, max_limit=max_limit)
+            connection.iterable = iterable
+        elif strategy != counts.EXACT and isinstance(iterable, QuerySet):
+            length = counts.page_length(iterable, strategy, args)
+            connection = offset_connection(connection, args, iterable, length, max_limit=max_limit)
+        else:
+            connection = super().resolve_connection(connection, args, iterable, max_limit=max_limit)
+        connection.count_strategy = strategy
+        if isinstance(iterable, QuerySet):
+            attach_peers(edge.node for edge in connection.edges)
+        return connection
+
+    @classmethod
+    async def aresolve_connection(cls, connection, args, iterable, max_limit=None):
+        if inspect.isawaitable(iterable):
+            iterable = await iterable
+        if not isinstance(iterable, QuerySet):
+            return super().resolve_connection(connection, args, iterable, max_limit=max_limit)
+        strategy = count_strategy(args)
+        if args.get('keyset'):
+            connection = await akeyset_connection(connection, args, iterable, max_limit=max_limit)
+            connection.iterable = iterable
+        else:
+            if strategy == counts.EXACT:
+                length = await iterable.acount()
+            else:
+                length = await sync_to_async(counts.page_length)(iterable, strategy, args)
+            connection = await aoffset_connection(connection, args, iterable, length, max_limit=max_limit)
+        connection.count_strategy = strategy
+        attach_peers(edge.node for edge in connection.edges)
+        return connection
+
+
+class CountStrategy(graphene.Enum):
+    """How totalCount is found; see crm/counts.py."""
+    EXACT = counts.EXACT
+    CACHED = counts.CACHED
+    APPROXIMATE = counts.APPROXIMATE
+
+
+def count_strategy(args):
+    strategy = args.get('count_strategy')
+    return getattr(strategy, 'value', strategy) or counts.EXACT
+
+
+def _pick(total, index):
+    if isinstance(total, tuple):
+        return total[index]
+
+    async def picked():
+        return (await total)[index]
+    return picked()
+
+
+class CountedConnection(relay.Connection):
+    """Relay connection with totalCount, found by the field's countStrategy only when selected."""
+
+    class Meta:
+        abstract = True
+
+    total_count = graphene.Int()
+    total_count_is_exact = graphene.Boolean(description="False when totalCount is an estimate.")
+
+    def total(self):
+        """(count, exact), computed once per page; on the event loop, a future."""
+        total = getattr(self, '_total', None)
+        if total is None:
+            length = getattr(self, 'length', None)
+            strategy = getattr(self, 'count_strategy', counts.EXACT)
+            if length is not None:
+                total = (length, True)
+            elif in_event_loop():
+                total = asyncio.ensure_future(sync_to_async(counts.total_count)(self.iterable, strategy))
+            else:
+                total = counts.total_count(self.iterable, strategy)
+            self._total = total
+        return total
+
+    def resolve_total_count(self, info):
+        return _pick(self.total(), 0)
+
+    def resolve_total_count_is_exact(self, info):
+        return _pick(self.total(), 1)
 
 # -----------------------------
 # GraphQL Types
@@ -14,48 +146,235 @@ from .filters import CustomerFilter, ProductFilter, OrderFilter
 
 # Relay-enabled types with filtering
 class CustomerNode(DjangoObjectType):
+    orders = BatchedConnectionField(lambda: OrderNode, required=True)
+
     class Meta:
         model = Customer
         interfaces = (relay.Node,)
         filterset_class = CustomerFilter
+        connection_class = CountedConnection
+
+    def resolve_orders(self, info, **kwargs):
+        limit = window_size(kwargs, info, info.field_nodes)
+        if is_filtered(kwargs) or limit is None:
+            return self.orders.order_by('pk')
+        prefetched = prefetched_list(self, 'orders')
+        if prefetched is not None:
+            return prefetched
+        peer_keys = [c.pk for c in peers_of(self)]
+        return get_loaders(info.context).orders_by_customer(limit).load(self.pk, peer_keys)
 
 class ProductNode(DjangoObjectType):
+    orders = BatchedConnectionField(lambda: OrderNode, required=True)
+
     class Meta:
         model = Product
         interfaces = (relay.Node,)
         filterset_class = ProductFilter
+        connection_class = CountedConnection
+
+    def resolve_orders(self, info, **kwargs):
+        limit = window_size(kwargs, info, info.field_nodes)
+        if is_filtered(kwargs) or limit is None:
+            return self.orders.order_by('pk')
+        prefetched = prefetched_list(self, 'orders')
+        if prefetched is not None:
+            return prefetched
+        peer_keys = [p.pk for p in peers_of(self)]
+        return get_loaders(info.context).orders_by_product(limit).load(self.pk, peer_keys)
 
 class OrderNode(DjangoObjectType):
+    products = BatchedConnectionField(ProductNode, required=True)
+
     class Meta:
         model = Order
         interfaces = (relay.Node,)
         filterset_class = OrderFilter
+        connection_class = CountedConnection
+
+    def resolve_customer(self, info):
+        if Order.customer.is_cached(self):
+            return self.customer
+        peer_keys = [o.customer_id for o in peers_of(self)]
+        return get_loaders(info.context).customer.load(self.customer_id, peer_keys)
+
+    def resolve_products(self, info, **kwargs):
+        limit = window_size(kwargs, info, info.field_nodes)
+        if is_filtered(kwargs) or limit is None:
+            return self.products.order_by('pk')
+        prefetched = prefetched_list(self, 'products')
+        if prefetched is not None:
+            return prefetched
+        peer_keys = [o.pk for o in peers_of(self)]
+        return get_loaders(info.context).products_by_order(limit).load(self.pk, peer_keys)
+
+class ImportChunkType(DjangoObjectType):
+    errors = graphene.List(graphene.String)
+    rows_per_second = graphene.Float()
+
+    class Meta:
+        model = ImportChunk
+        fields = (
+            'index', 'first_row', 'last_row', 'row_count', 'status', 'created_count',
+            'errors', 'started_at', 'finished_at',
+        )
+        convert_choices_to_enum = False
+
+    def resolve_rows_per_second(self, info):
+        return imports.rows_per_second(self.created_count, self.started_at, self.finished_at)
+
+class ImportJobNode(DjangoObjectType):
+    errors = graphene.List(graphene.String, description="Rows rejected before insertion; see chunks for the rest.")
+    chunks = graphene.List(graphene.NonNull(ImportChunkType))
+    progress = graphene.Float(description="Fraction of chunks finished.")
+    rows_per_second = graphene.Float()
+
+    class Meta:
+        model = ImportJob
+        interfaces = (relay.Node,)
+        fields = (
+            'kind', 'source', 'format', 'status', 'chunk_size', 'total_rows', 'chunk_count', 'chunks_done',
+            'created_count', 'error_count', 'errors', 'created_at', 'started_at', 'finished_at',
+        )
+        convert_choices_to_enum = False
+
+    def resolve_chunks(self, info):
+        chunks = self.chunks.all()
+        return alist(chunks) if in_event_loop() else list(chunks)
+
+    def resolve_progress(self, info):
+        if not self.chunk_count:
+            return 1.0 if self.finished_at else 0.0
+        return self.chunks_done / self.chunk_count
+
+    def resolve_rows_per_second(self, info):
+        return imports.rows_per_second(self.created_count, self.started_at, self.finished_at)
+
+def filter_input(name, filterset_class, node):
+    """InputObjectType with the same fields as the filter arguments of `node` connections."""
+    arguments = get_filtering_args_from_filterset(filterset_class, node)
+    fields = {key: graphene.InputField(argument.type) for key, argument in arguments.items()}
+    return type(name, (graphene.InputObjectType,), fields)
+
+OrderFilterInput = filter_input('OrderFilterInput', OrderFilter, OrderNode)
+
+class OrderStatsGroup(graphene.Enum):
+    DAY = 'day'
+    WEEK = 'week'
+    CUSTOMER = 'customer'
+    PRODUCT = 'product'
+
+class OrderStatsRow(graphene.ObjectType):
+    key = graphene.String(description="Day or week start (YYYY-MM-DD, weeks start on Monday), customer or product id.")
+    label = graphene.String(description="Customer or product name.")
+    order_count = graphene.Int(required=True)
+    revenue = graphene.Decimal(required=True)
+    average_order_value = graphene.Decimal(required=True)
+
+class OrderStats(graphene.ObjectType):
+    rows = graphene.List(graphene.NonNull(OrderStatsRow), required=True)
+    has_next_page = graphene.Boolean(required=True)
+    totals = graphene.Field(OrderStatsRow, description="Over every matching order, not only this page.")
+
+    @staticmethod
+    def load(group_by, filters, order_by, first, offset):
+        try:
+            rows, has_next_page = stats.order_stats(group_by, filters, order_by, first, offset)
+        except stats.OrderStatsError as e:
+            raise GraphQLError(str(e))
+        result = OrderStats(rows=rows, has_next_page=has_next_page)
+        result.filters = filters
+        return result
+
+    def resolve_totals(self, info):
+        return call_sync(stats.order_totals, self.filters)
 
 # -----------------------------
 # Queries
 # -----------------------------
 class Query(graphene.ObjectType):
-    all_customers = DjangoFilterConnectionField(CustomerNode)
-    all_products = DjangoFilterConnectionField(ProductNode, order_by=graphene.String())
-    all_orders = DjangoFilterConnectionField(OrderNode, order_by=graphene.String())
+    all_customers = BatchedConnectionField(
+        CustomerNode, keyset=graphene.Boolean(default_value=False), count_strategy=CountStrategy(default_value=CountStrategy.EXACT)
+    )
+    all_products = BatchedConnectionField(
+        ProductNode, order_by=graphene.String(), keyset=graphene.Boolean(default_value=False)
+    )
+    all_orders = BatchedConnectionField(
+        OrderNode, order_by=graphene.String(), keyset=graphene.Boolean(default_value=False),
+        count_strategy=CountStrategy(default_value=CountStrategy.EXACT),
+    )
+
+    # Orders placed in the last N days, oldest first, for jobs that walk them page by page.
+    recent_orders = BatchedConnectionField(
+        OrderNode, last_days=graphene.Int(required=True), keyset=graphene.Boolean(default_value=True)
+    )
+
+    import_job = graphene.Field(ImportJobNode, id=graphene.ID(required=True))
+
+    # One row per day, week, customer or product of the matching orders, aggregated in the database.
+    order_stats = graphene.Field(
+        OrderStats,
+        group_by=OrderStatsGroup(required=True),
+        filter=OrderFilterInput(),
+        order_by=graphene.String(
+            default_value='key', description="key, orderCount, revenue or averageOrderValue; prefix - to reverse."
+        ),
+        first=graphene.Int(default_value=100),
+        offset=graphene.Int(default_value=0),
+    )
+
+    def resolve_all_customers(root, info, **kwargs):
+        return plan_queryset(Customer.objects.all(), info)
 
     def resolve_all_products(root, info, order_by=None, **kwargs):
-        qs = Product.objects.all()
+        qs = plan_queryset(Product.objects.all(), info)
         if order_by:
             qs = qs.order_by(order_by)
         return qs
 
     def resolve_all_orders(root, info, order_by=None, **kwargs):
-        qs = Order.objects.prefetch_related('products').all()
+        qs = plan_queryset(Order.objects.all(), info)
         if order_by:
             qs = qs.order_by(order_by)
         return qs
 
+    def resolve_recent_orders(root, info, last_days, **kwargs):
+        if last_days <= 0:
+            raise GraphQLError("lastDays must be positive.")
+        return plan_queryset(recent_orders(last_days), info)
+
+    def resolve_import_job(root, info, id):
+        # Accept the relay ID returned by startImport or a plain primary key.
+        try:
+            type_name, pk = from_global_id(id)
+        except Exception:
+            type_name = None
+        if type_name != ImportJobNode._meta.name:
+            pk = id
+        job = ImportJob.objects.filter(pk=_to_pk(pk))
+        return job.afirst() if in_event_loop() else job.first()
+
+    def resolve_order_stats(root, info, group_by, filter=None, order_by='key', first=100, offset=0):
+        group_by = getattr(group_by, 'value', group_by)
+        filters = {key: value for key, value in (filter or {}).items() if value is not None}
+        return call_sync(OrderStats.load, group_by, filters, to_snake_case(order_by), first, offset)
+
+
+def recent_orders(last_days, now=None):
+    """Orders from the last `last_days` days in (order_date, id) order, served by crm_order_date_id_idx."""
+    since = (now or timezone.now()) - timedelta(days=last_days)
+    return Order.objects.filter(order_date__gte=since).order_by('order_date', 'pk')
+
 # -----------------------------
 # Mutations
 # -----------------------------
 
 # ----------- CreateCustomer -----------
+PHONE_VALIDATOR = RegexValidator(
+    regex=r'^(\+\d{10,15}|\d{3}-\d{3}-\d{4})$',
+    message="Phone must be in +1234567890 or 123-456-7890 format."
+)
+
 class CreateCustomerInput(graphene.InputObjectType):
     name = graphene.String(required=True)
     email = graphene.String(required=True)
@@ -70,13 +389,11 @@ class CreateCustomer(graphene.Mutation):
 
     @staticmethod
     def mutate(root, info, input):
-        phone_validator = RegexValidator(
-            regex=r'^(\+\d{10,15}|\d{3}-\d{3}-\d{4})$',
-            message="Phone must be in +1234567890 or 123-456-7890 format."
-        )
+        if in_event_loop():
+            return CreateCustomer.amutate(root, info, input)
         try:
             if input.phone:
-                phone_validator(input.phone)
+                PHONE_VALIDATOR(input.phone)
             customer = Customer.objects.create(
                 name=input.name,
                 email=input.email,
@@ -88,39 +405,94 @@ class CreateCustomer(graphene.Mutation):
         except Exception as e:
             return CreateCustomer(customer=None, message=str(e))
 
+    @staticmethod
+    async def amutate(root, info, input):
+        try:
+            if input.phone:
+                PHONE_VALIDATOR(input.phone)
+            customer = await Customer.objects.acreate(
+                name=input.name,
+                email=input.email,
+                phone=input.phone
+            )
+            return CreateCustomer(customer=customer, message="Customer created successfully.")
+        except IntegrityError:
+            return CreateCustomer(customer=None, message="Email already exists.")
+        except Exception as e:
+            return CreateCustomer(customer=None, message=str(e))
+
 # ----------- BulkCreateCustomers -----------
+BULK_CREATE_BATCH_SIZE = 1000
+
 class BulkCreateCustomers(graphene.Mutation):
     class Arguments:
         input = graphene.List(CreateCustomerInput, required=True)
+        batch_size = graphene.Int(default_value=BULK_CREATE_BATCH_SIZE)
 
     customers = graphene.List(CustomerNode)
     errors = graphene.List(graphene.String)
 
+    @staticmethod
+    def mutate(root, info, input, batch_size=BULK_CREATE_BATCH_SIZE):
+        return call_sync(BulkCreateCustomers.create, input, batch_size)
+
     @staticmethod
     @transaction.atomic
-    def mutate(root, info, input):
-        created = []
+    def create(input, batch_size):
+        if batch_size < 1:
+            return BulkCreateCustomers(customers=[], errors=["batchSize must be positive."])
+
         errors = []
+        candidates = {}
 
+        # Validate in memory and drop duplicates within the batch (first row wins).
         for c in input:
             try:
                 if c.phone:
-                    RegexValidator(
-                        regex=r'^(\+\d{10,15}|\d{3}-\d{3}-\d{4})$',
-                        message="Phone must be in +1234567890 or 123-456-7890 format."
-                    )(c.phone)
-                customer = Customer.objects.create(
-                    name=c.name,
-                    email=c.email,
-                    phone=c.phone
-                )
-                created.append(customer)
-            except IntegrityError:
-                errors.append(f"Email '{c.email}' already exists.")
-            except Exception as e:
+                    PHONE_VALIDATOR(c.phone)
+            except ValidationError as e:
                 errors.append(f"{c.email if c.email else c.name}: {str(e)}")
+                continue
+            if c.email in candidates:
+                errors.append(f"Email '{c.email}' is duplicated in this batch.")
+                continue
+            candidates[c.email] = Customer(name=c.name, email=c.email, phone=c.phone)
+
+        emails = list(candidates)
+        for start in range(0, len(emails), batch_size):
+            chunk = emails[start:start + batch_size]
+            for email in Customer.objects.filter(email__in=chunk).values_list('email', flat=True):
+                del candidates[email]
+                errors.append(f"Email '{email}' already exists.")
 
-        return BulkCreateCustomers(customers=created, errors=errors)
+        created = []
+        rows = list(candidates.values())
+        for start in range(0, len(rows), batch_size):
+            created.extend(_bulk_create_customers(rows[start:start + batch_size], errors))
+
+        transaction.on_commit(lambda: invalidate_models(Customer))
+        return BulkCreateCustomers(customers=attach_peers(created), errors=errors)
+
+
+def _bulk_create_customers(rows, errors):
+    try:
+        with transaction.atomic():
+            created = Customer.objects.bulk_create(rows)
+            rollups.record_customers(created)
+            return created
+    except IntegrityError:
+        pass
+    # A concurrent insert claimed one of the emails; retry this chunk row by row.
+    created = []
+    for customer in rows:
+        try:
+            with transaction.atomic():
+                customer.save(force_insert=True)
+            created.append(customer)
+        except IntegrityError:
+            customer.pk = None
+            errors.append(f"Email '{customer.email}' already exists.")
+    return created
 
 # ----------- CreateProduct -----------
 class CreateProductInput(graphene.InputObjectType):
@@ -141,6 +513,8 @@ class CreateProduct(graphene.Mutation):
             return CreateProduct(product=None, message="Price must be positive.")
         if input.stock < 0:
             return CreateProduct(product=None, message="Stock cannot be negative.")
+        if in_event_loop():
+            return CreateProduct.acreate(input)
         product = Product.objects.create(
             name=input.name,
             price=input.price,
@@ -148,6 +522,15 @@ class CreateProduct(graphene.Mutation):
         )
         return CreateProduct(product=product, message="Product created successfully.")
 
+    @staticmethod
+    async def acreate(input):
+        product = await Product.objects.acreate(
+            name=input.name,
+            price=input.price,
+            stock=input.stock
+        )
+        return CreateProduct(product=product, message="Product created successfully.")
+
 # ----------- CreateOrder -----------
 class CreateOrderInput(graphene.InputObjectType):
     customer_id = graphene.ID(required=True)
@@ -163,6 +546,8 @@ class CreateOrder(graphene.Mutation):
 
     @staticmethod
     def mutate(root, info, input):
+        if in_event_loop():
+            return CreateOrder.amutate(root, info, input)
         try:
             customer = Customer.objects.get(pk=input.customer_id)
         except Customer.DoesNotExist:
@@ -171,37 +556,220 @@ class CreateOrder(graphene.Mutation):
         if not input.product_ids:
             return CreateOrder(order=None, message="At least one product must be selected.")
 
-        products = Product.objects.filter(pk__in=input.product_ids)
-        if products.count() != len(input.product_ids):
+        products = list(Product.objects.filter(pk__in=input.product_ids))
+        if len(products) != len(input.product_ids):
             return CreateOrder(order=None, message="Some products not found.")
 
-        total_amount = sum([p.price for p in products])
-        order = Order.objects.create(customer=customer, total_amount=total_amount)
-        order.products.set(products)
-        order.save()
+        return CreateOrder(order=CreateOrder.create(customer, products), message="Order created successfully.")
+
+    @staticmethod
+    async def amutate(root, info, input):
+        try:
+            customer = await Customer.objects.aget(pk=input.customer_id)
+        except Customer.DoesNotExist:
+            return CreateOrder(order=None, message="Customer not found.")
+
+        if not input.product_ids:
+            return CreateOrder(order=None, message="At least one product must be selected.")
 
+        products = await alist(Product.objects.filter(pk__in=input.product_ids))
+        if len(products) != len(input.product_ids):
+            return CreateOrder(order=None, message="Some products not found.")
+
+        order = await call_sync(CreateOrder.create, customer, products)
         return CreateOrder(order=order, message="Order created successfully.")
 
+    @staticmethod
+    @transaction.atomic
+    def create(customer, products):
+        order = Order.objects.create(customer=customer, total_amount=sum(p.price for p in products))
+        order.products.add(*products)
+        return order
+
+# ----------- CreateOrders -----------
+def _to_pk(value):
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
+def _in_bulk(model, pks, batch_size):
+    pks = list({pk for pk in pks if pk is not None})
+    found = {}
+    for start in range(0, len(pks), batch_size):
+        found.update(model.objects.in_bulk(pks[start:start + batch_size]))
+    return found
+
+class CreateOrders(graphene.Mutation):
+    class Arguments:
+        input = graphene.List(graphene.NonNull(CreateOrderInput), required=True)
+        batch_size = graphene.Int(default_value=BULK_CREATE_BATCH_SIZE)
+
+    orders = graphene.List(OrderNode)
+    errors = graphene.List(graphene.String)
+
+    @staticmethod
+    def mutate(root, info, input, batch_size=BULK_CREATE_BATCH_SIZE):
+        return call_sync(CreateOrders.create, input, batch_size)
+
+    @staticmethod
+    @transaction.atomic
+    def create(input, batch_size):
+        if batch_size < 1:
+            return CreateOrders(orders=[], errors=["batchSize must be positive."])
+
+        customers = _in_bulk(Customer, (_to_pk(o.customer_id) for o in input), batch_size)
+        products = _in_bulk(Product, (_to_pk(pk) for o in input for pk in o.product_ids or ()), batch_size)
+
+        errors = []
+        orders = []
+        order_products = []
+        for i, o in enumerate(input):
+            customer = customers.get(_to_pk(o.customer_id))
+            if customer is None:
+                errors.append(f"Order {i}: Customer not found.")
+                continue
+            if not o.product_ids:
+                errors.append(f"Order {i}: At least one product must be selected.")
+                continue
+            pks = {_to_pk(pk) for pk in o.product_ids}
+            selected = [products[pk] for pk in pks if pk in products]
+            if len(selected) != len(o.product_ids):
+                errors.append(f"Order {i}: Some products not found.")
+                continue
+            orders.append(Order(customer=customer, total_amount=sum(p.price for p in selected)))
+            order_products.append(selected)
+
+        Order.objects.bulk_create(orders, batch_size=batch_size)
+        through = Order.products.through
+        through.objects.bulk_create(
+            (
+                through(order_id=order.pk, product_id=product.pk)
+                for order, selected in zip(orders, order_products)
+                for product in selected
+            ),
+            batch_size=batch_size,
+        )
+        rollups.record_orders(orders)
+
+        if orders:
+            transaction.on_commit(lambda: invalidate_models(Order))
+        return CreateOrders(orders=attach_peers(orders), errors=errors)
+
 # ----------- UpdateLowStockProducts -----------
 class UpdateLowStockProducts(graphene.Mutation):
     class Arguments:
-        pass
+        threshold = graphene.Int(default_value=10)
+        increment = graphene.Int(default_value=10)
+        counts_only = graphene.Boolean(default_value=False)
+        chunk_size = graphene.Int(default_value=1000)
 
     updated_products = graphene.List(ProductNode)
+    updated_count = graphene.Int()
     message = graphene.String()
 
     @staticmethod
-    def mutate(root, info):
-        low_stock_products = Product.objects.filter(stock__lt=10)
-        updated = []
+    def mutate(root, info, threshold=10, increment=10, counts_only=False, chunk_size=1000):
+        return call_sync(UpdateLowStockProducts.restock, threshold, increment, counts_only, chunk_size)
+
+    @staticmethod
+    def restock(threshold, increment, counts_only, chunk_size):
+        if threshold < 0:
+            return UpdateLowStockProducts(updated_count=0, message="Threshold cannot be negative.")
+        if increment <= 0:
+            return UpdateLowStockProducts(updated_count=0, message="Increment must be positive.")
+        if chunk_size <= 0:
+            return UpdateLowStockProducts(updated_count=0, message="Chunk size must be positive.")
+
+        low_stock = Product.objects.filter(stock__lt=threshold).order_by('pk')
+        updated_count = 0
+        updated = None if counts_only else []
+        last_pk = None
+
+        # One short UPDATE ... SET stock = stock + N per chunk_size low-stock rows,
+        # taken in primary-key order after the previous chunk's last pk, so
+        # concurrent orders never wait on a whole-table lock or lose a write,
+        # and gaps in the primary keys cost no extra queries.
+        while True:
+            chunk = low_stock if last_pk is None else low_stock.filter(pk__gt=last_pk)
+            with transaction.atomic():
+                if counts_only:
+                    ids = list(chunk.values_list('pk', flat=True)[:chunk_size])
+                    # Rechecked in the UPDATE: a concurrent order may have restocked a row since.
+                    rows = Product.objects.filter(pk__in=ids, stock__lt=threshold)
+                    updated_count += rows.update(stock=F('stock') + increment)
+                else:
+                    ids = list(chunk.select_for_update().values_list('pk', flat=True)[:chunk_size])
+                    if ids:
+                        updated_count += Product.objects.filter(pk__in=ids).update(stock=F('stock') + increment)
+                        updated.extend(Product.objects.filter(pk__in=ids).order_by('pk'))
+            if len(ids) < chunk_size:
+                break
+            last_pk = ids[-1]
+
+        if updated_count:
+            transaction.on_commit(lambda: invalidate_models(Product))
+        if updated is not None:
+            attach_peers(updated)
+
+        msg = f"{updated_count} products restocked successfully." if updated_count else "No products needed restocking."
+        return UpdateLowStockProducts(updated_products=updated, updated_count=updated_count, message=msg)
+
+# ----------- StartImport -----------
+class Upload(graphene.Scalar):
+    """A file sent as a GraphQL multipart request (see CachedGraphQLView.parse_body)."""
 
-        for product in low_stock_products:
-            product.stock += 10
-            product.save()
-            updated.append(product)
+    @staticmethod
+    def serialize(value):
+        return getattr(value, 'name', None)
+
+    @staticmethod
+    def parse_value(value):
+        return value
 
-        msg = f"{len(updated)} products restocked successfully." if updated else "No products needed restocking."
-        return UpdateLowStockProducts(updated_products=updated, message=msg)
+    @staticmethod
+    def parse_literal(node, _variables=None):
+        return None
+
+class ImportKind(graphene.Enum):
+    CUSTOMERS = 'customers'
+    ORDERS = 'orders'
+
+class ImportFormat(graphene.Enum):
+    CSV = 'csv'
+    NDJSON = 'ndjson'
+
+class StartImport(graphene.Mutation):
+    """Split a CSV/NDJSON file into chunks inserted by Celery workers; poll importJob(id) for progress."""
+
+    class Arguments:
+        kind = ImportKind(required=True)
+        file = Upload()
+        path = graphene.String(description="File under CRM_IMPORT['ROOT'] on the server.")
+        format = ImportFormat(description="Defaults to the file extension.")
+        chunk_size = graphene.Int()
+
+    job = graphene.Field(ImportJobNode)
+    message = graphene.String()
+
+    @staticmethod
+    def mutate(root, info, kind, file=None, path=None, format=None, chunk_size=None):
+        kind = getattr(kind, 'value', kind)
+        format = getattr(format, 'value', format)
+        return call_sync(StartImport.start, kind, file, path, format, chunk_size)
+
+    @staticmethod
+    def start(kind, file, path, format, chunk_size):
+        if (file is None) == (path is None):
+            return StartImport(job=None, message="Pass either file or path.")
+        try:
+            if file is not None:
+                job = imports.start_import(kind, file, file.name, format, chunk_size)
+            else:
+                job = imports.start_path_import(kind, path, format, chunk_size)
+        except imports.ImportJobError as e:
+            return StartImport(job=None, message=str(e))
+        return StartImport(job=job, message=f"Import started: {job.total_rows} rows in {job.chunk_count} chunks.")
 
 # -----------------------------
 # Root Mutation
@@ -211,5 +779,7 @@ class Mutation(graphene.ObjectType):
     bulk_create_customers = BulkCreateCustomers.Field()
     create_product = CreateProduct.Field()
     create_order = CreateOrder.Field()
+    create_orders = CreateOrders.Field()
     update_low_stock_products = UpdateLowStockProducts.Field()
+    start_import = StartImport.Field()
 
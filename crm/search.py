@@ -0,0 +1,97 @@
+import re
+from functools import reduce
+from operator import and_, or_
+
+from django.db import connections
+from django.db.models import FloatField, Q
+from django.db.models.expressions import RawSQL
+
+# -----------------------------
+# Full-text search
+# -----------------------------
+#
+# SQLite: FTS5 external-content tables (crm_customer_fts, crm_product_fts)
+# kept in sync with the base tables by triggers, see migration 0004.
+# PostgreSQL: GIN expression indexes over to_tsvector('simple', ...).
+# Any other backend falls back to the icontains filters.
+
+SEARCH_FIELDS = {
+    'crm.customer': ('name', 'email'),
+    'crm.product': ('name',),
+}
+
+FTS_TABLES = {
+    'crm.customer': 'crm_customer_fts',
+    'crm.product': 'crm_product_fts',
+}
+
+
+def search_terms(value):
+    return re.findall(r'\w+', value or '')
+
+
+def search_ids(model, value, using):
+    """Return an expression selecting the primary keys of `model` rows matching `value`."""
+    terms = search_terms(value)
+    vendor = connections[using].vendor
+    if vendor == 'sqlite':
+        table = FTS_TABLES[model._meta.label_lower]
+        return RawSQL(f'SELECT rowid FROM {table} WHERE {table} MATCH %s', [_fts5_query(terms)])
+    manager = model._default_manager.using(using)
+    if vendor == 'postgresql':
+        return _pg_search(manager.all(), terms).values('pk')
+    return manager.filter(_icontains(model, terms)).values('pk')
+
+
+def search(queryset, value):
+    """Filter `queryset` to rows matching `value`, ordered by relevance unless already ordered."""
+    terms = search_terms(value)
+    if not terms:
+        return queryset.none()
+    model = queryset.model
+    vendor = connections[queryset.db].vendor
+
+    if vendor == 'sqlite':
+        table = FTS_TABLES[model._meta.label_lower]
+        rank = RawSQL(
+            f'SELECT bm25({table}) FROM {table} WHERE {table} MATCH %s AND rowid = {model._meta.db_table}.id',
+            [_fts5_query(terms)],
+            output_field=FloatField(),
+        )
+        queryset = queryset.filter(pk__in=search_ids(model, value, queryset.db)).annotate(search_rank=rank)
+        # bm25() is negative; lower means more relevant.
+        return queryset if queryset.query.order_by else queryset.order_by('search_rank', 'pk')
+
+    if vendor == 'postgresql':
+        queryset = _pg_search(queryset, terms)
+        return queryset if queryset.query.order_by else queryset.order_by('-search_rank', 'pk')
+
+    return queryset.filter(_icontains(model, terms))
+
+
+def search_vector(model):
+    from django.contrib.postgres.search import SearchVector
+
+    # Must stay identical to the GIN expression index created in migration 0004.
+    return SearchVector(*SEARCH_FIELDS[model._meta.label_lower], config='simple')
+
+
+def _pg_search(queryset, terms):
+    from django.contrib.postgres.search import SearchQuery, SearchRank
+
+    vector = search_vector(queryset.model)
+    query = SearchQuery(' & '.join(f'{term}:*' for term in terms), search_type='raw', config='simple')
+    return queryset.annotate(search_document=vector, search_rank=SearchRank(vector, query)).filter(
+        search_document=query
+    )
+
+
+def _icontains(model, terms):
+    fields = SEARCH_FIELDS[model._meta.label_lower]
+    clauses = [reduce(or_, (Q(**{f'{field}__icontains': term}) for field in fields)) for term in terms]
+    return reduce(and_, clauses)
+
+
+def _fts5_query(terms):
+    # Quote every term so user input can't inject FTS5 syntax; match prefixes.
+    return ' '.join(f'"{term}"*' for term in terms)
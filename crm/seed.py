@@ -1,14 +1,150 @@
-from .models import Customer, Product
-customers = [
+import random
+from datetime import timedelta
+from decimal import Decimal
+from itertools import islice
+
+from django.db import transaction
+from django.db.models import Max
+from django.utils import timezone
+
+from . import rollups
+from .cache import invalidate_models
+from .models import Customer, Order, Product
+
+# -----------------------------
+# Synthetic data
+# -----------------------------
+#
+# Rows are generated lazily and written with chunked bulk_create(), one
+# transaction per chunk, so memory stays flat and millions of rows take
+# minutes. Only primary keys and product prices are kept in memory.
+# bulk_create() skips signals, so rollups and the response cache are
+# refreshed once at the end.
+
+SAMPLE_CUSTOMERS = [
     {"name": "Alice", "email": "alice@example.com", "phone": "+1234567890"},
     {"name": "Bob", "email": "bob@example.com", "phone": "123-456-7890"},
 ]
-for c in customers:
-    Customer.objects.get_or_create(email=c["email"], defaults=c)
 
-products = [
+SAMPLE_PRODUCTS = [
     {"name": "Laptop", "price": 999.99, "stock": 10},
     {"name": "Mouse", "price": 49.99, "stock": 50},
 ]
-for p in products:
-    Product.objects.get_or_create(name=p["name"], defaults=p)
+
+FIRST_NAMES = ['Alice', 'Bob', 'Carol', 'Dave', 'Erin', 'Frank', 'Grace', 'Heidi', 'Ivan', 'Judy', 'Mallory', 'Oscar']
+LAST_NAMES = ['Smith', 'Jones', 'Brown', 'Garcia', 'Miller', 'Davis', 'Lopez', 'Wilson', 'Clark', 'Young']
+PRODUCT_WORDS = ['Laptop', 'Mouse', 'Keyboard', 'Monitor', 'Cable', 'Dock', 'Headset', 'Webcam', 'Lamp', 'Chair']
+PRODUCT_KINDS = ['Pro', 'Mini', 'Max', 'Lite', 'Plus', 'Air', 'Basic']
+
+
+def seed_samples():
+    """Create the two sample customers and products used in the README examples."""
+    for c in SAMPLE_CUSTOMERS:
+        Customer.objects.get_or_create(email=c["email"], defaults=c)
+    for p in SAMPLE_PRODUCTS:
+        Product.objects.get_or_create(name=p["name"], defaults=p)
+
+
+def bulk_create_dated(model, objs, field):
+    """bulk_create() keeping each object's `field` value, which auto_now_add replaces with now().
+
+    The dates are written back with a post-insert bulk_update(), leaving the
+    model field (shared by the whole process) untouched.
+    """
+    dates = [getattr(obj, field) for obj in objs]
+    objs = model.objects.bulk_create(objs)
+    for obj, date in zip(objs, dates):
+        setattr(obj, field, date)
+    model.objects.bulk_update(objs, [field])
+    return objs
+
+
+def chunked(iterable, size):
+    iterator = iter(iterable)
+    while chunk := list(islice(iterator, size)):
+        yield chunk
+
+
+def random_date(rng, now, days):
+    return now - timedelta(seconds=rng.randrange(max(days, 1) * 86400))
+
+
+def customer_rows(rng, count, start, now, days):
+    for n in range(start, start + count):
+        phone = f"+1{rng.randrange(10 ** 9, 10 ** 10)}" if rng.random() < 0.7 else None
+        yield Customer(
+            name=f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}",
+            email=f"customer{n}@seed.example.com",
+            phone=phone,
+            created_at=random_date(rng, now, days),
+        )
+
+
+def product_rows(rng, count, start):
+    for n in range(start, start + count):
+        yield Product(
+            name=f"{rng.choice(PRODUCT_WORDS)} {rng.choice(PRODUCT_KINDS)} {n}",
+            price=Decimal(rng.randrange(100, 200000)) / 100,
+            stock=rng.randrange(0, 500),
+        )
+
+
+def order_rows(rng, count, customer_ids, products, products_per_order, now, days):
+    """Yield (Order, product ids) pairs; totals are the sum of the chosen product prices."""
+    for _ in range(count):
+        chosen = rng.sample(products, min(rng.randint(1, products_per_order), len(products)))
+        order = Order(
+            customer_id=rng.choice(customer_ids),
+            total_amount=sum(price for _, price in chosen),
+            order_date=random_date(rng, now, days),
+        )
+        yield order, [pk for pk, _ in chosen]
+
+
+def _next_index(model, field='id'):
+    return (model.objects.aggregate(last=Max(field))['last'] or 0) + 1
+
+
+def seed(customers=1000, products=100, orders=5000, products_per_order=3, days=365,
+         batch_size=5000, random_seed=0, progress=None):
+    """Insert synthetic customers, products and orders; return the number of rows created per model."""
+    rng = random.Random(random_seed)
+    now = timezone.now()
+    progress = progress or (lambda model, done: None)
+    Through = Order.products.through
+    created = {Customer: 0, Product: 0, Order: 0}
+
+    customer_ids = []
+    for chunk in chunked(customer_rows(rng, customers, _next_index(Customer), now, days), batch_size):
+        with transaction.atomic():
+            customer_ids.extend(c.pk for c in bulk_create_dated(Customer, chunk, 'created_at'))
+        created[Customer] = len(customer_ids)
+        progress(Customer, created[Customer])
+
+    catalog = []
+    for chunk in chunked(product_rows(rng, products, _next_index(Product)), batch_size):
+        with transaction.atomic():
+            catalog.extend((p.pk, p.price) for p in Product.objects.bulk_create(chunk))
+        created[Product] = len(catalog)
+        progress(Product, created[Product])
+
+    if not customer_ids:
+        customer_ids = list(Customer.objects.values_list('pk', flat=True))
+    if not catalog:
+        catalog = list(Product.objects.values_list('pk', 'price'))
+
+    if customer_ids and catalog:
+        rows = order_rows(rng, orders, customer_ids, catalog, products_per_order, now, days)
+        for chunk in chunked(rows, batch_size):
+            with transaction.atomic():
+                new_orders = bulk_create_dated(Order, [order for order, _ in chunk], 'order_date')
+                Through.objects.bulk_create(
+                    [Through(order_id=order.pk, product_id=pk) for order, (_, pks) in zip(new_orders, chunk) for pk in pks],
+                    batch_size=batch_size,
+                )
+            created[Order] += len(new_orders)
+            progress(Order, created[Order])
+
+    rollups.rebuild()
+    transaction.on_commit(lambda: invalidate_models(Customer, Product, Order))
+    return created
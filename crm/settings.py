@@ -45,6 +45,10 @@ INSTALLED_APPS = [
     'django_celery_beat',
 ]
 
+GRAPHENE = {
+    'SCHEMA': 'alx_backend_graphql.schema.schema',
+}
+
 
 # Celery Configuration
 CELERY_BROKER_URL = 'redis://localhost:6379/0'
@@ -0,0 +1,103 @@
+import time
+from types import SimpleNamespace
+
+from celery.signals import task_postrun, task_prerun
+from django.db import transaction
+from django.db.models.signals import m2m_changed, post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from . import metrics, rollups
+from .cache import invalidate_models
+from .models import Customer, Order, Product
+
+
+@receiver(post_save, sender=Customer)
+@receiver(post_save, sender=Product)
+@receiver(post_save, sender=Order)
+@receiver(post_delete, sender=Customer)
+@receiver(post_delete, sender=Product)
+@receiver(post_delete, sender=Order)
+def invalidate_cached_responses(sender, **kwargs):
+    # Wait for the commit so a concurrent read can't re-cache the old rows.
+    transaction.on_commit(lambda: invalidate_models(sender))
+
+
+@receiver(m2m_changed, sender=Order.products.through)
+def invalidate_cached_order_products(sender, action, **kwargs):
+    if action.startswith('post_'):
+        transaction.on_commit(lambda: invalidate_models(Order))
+
+
+# The fields each model contributes to DailyOrderStats; an update that changes
+# one of them moves its count (and revenue) from the old day to the new one.
+ROLLUP_FIELDS = {Order: ('order_date', 'total_amount'), Customer: ('created_at',)}
+
+
+@receiver(pre_save, sender=Order)
+@receiver(pre_save, sender=Customer)
+def remember_rollup_fields(sender, instance, raw=False, update_fields=None, **kwargs):
+    fields = ROLLUP_FIELDS[sender]
+    instance._rollup_previous = None
+    if raw or instance.pk is None:
+        return
+    if update_fields is not None and not set(fields) & set(update_fields):
+        return
+    instance._rollup_previous = sender.objects.filter(pk=instance.pk).values(*fields).first()
+
+
+def _rollup_change(sender, instance):
+    """Return the stored rollup fields as an object if the save changed them, else None."""
+    previous = getattr(instance, '_rollup_previous', None)
+    instance._rollup_previous = None
+    if previous is None or all(previous[name] == getattr(instance, name) for name in previous):
+        return None
+    return SimpleNamespace(**previous)
+
+
+@receiver(post_save, sender=Order)
+def record_saved_order(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    if created:
+        rollups.record_orders([instance])
+    elif (previous := _rollup_change(sender, instance)) is not None:
+        with rollups.batched():
+            rollups.record_orders([previous], sign=-1)
+            rollups.record_orders([instance])
+
+
+@receiver(post_delete, sender=Order)
+def record_deleted_order(sender, instance, **kwargs):
+    rollups.record_orders([instance], sign=-1)
+
+
+@receiver(post_save, sender=Customer)
+def record_saved_customer(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    if created:
+        rollups.record_customers([instance])
+    elif (previous := _rollup_change(sender, instance)) is not None:
+        with rollups.batched():
+            rollups.record_customers([previous], sign=-1)
+            rollups.record_customers([instance])
+
+
+@receiver(post_delete, sender=Customer)
+def record_deleted_customer(sender, instance, **kwargs):
+    rollups.record_customers([instance], sign=-1)
+
+
+_task_started = {}
+
+
+@task_prerun.connect
+def start_task_timer(task_id=None, **kwargs):
+    _task_started[task_id] = time.perf_counter()
+
+
+@task_postrun.connect
+def observe_task_duration(task_id=None, task=None, state=None, **kwargs):
+    started = _task_started.pop(task_id, None)
+    if started is not None:
+        metrics.task_duration.labels(task.name, state or 'UNKNOWN').observe(time.perf_counter() - started)
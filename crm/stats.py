@@ -0,0 +1,118 @@
+from decimal import Decimal
+
+from django.db.models import Avg, Count, DateField, F, FloatField, Sum
+from django.db.models.functions import Cast, TruncDate, TruncWeek
+
+from .filters import OrderFilter
+from .models import DailyOrderStats, Order
+
+# -----------------------------
+# Order statistics
+# -----------------------------
+#
+# orderStats groups the orders matching OrderFilter by day, week, customer
+# or product and returns one row per group with its order count, revenue
+# and average order value, computed with values()/annotate() in a single
+# GROUP BY query. Day and week groups over all orders (or orders since a
+# date) read the DailyOrderStats rollup instead of scanning Order. Product
+# revenue is the sum of the prices of the product's order lines, which is
+# how order totals are made up.
+
+GROUPS = ('day', 'week', 'customer', 'product')
+ORDER_FIELDS = ('key', 'order_count', 'revenue', 'average_order_value')
+MAX_ROWS = 1000
+CENT = Decimal('0.01')
+
+
+class OrderStatsError(Exception):
+    """Invalid groupBy, orderBy, page size or filter."""
+
+
+def filtered_orders(filters):
+    """Orders matching the OrderFilter arguments in `filters`, one row per order."""
+    filterset = OrderFilter(data=filters or {}, queryset=Order.objects.all())
+    if not filterset.is_valid():
+        raise OrderStatsError(
+            '; '.join(f"{name}: {' '.join(errors)}" for name, errors in filterset.errors.items())
+        )
+    orders = filterset.qs.order_by()
+    if orders.query.distinct:
+        # productName/productId join order lines; aggregate over each order once.
+        orders = Order.objects.filter(pk__in=orders.values('pk'))
+    return orders
+
+
+def uses_rollup(group_by, filters):
+    # OrderFilter's order_date_gte compares with midnight of that date, i.e. rollup rows from that date on.
+    return group_by in ('day', 'week') and set(filters or {}) <= {'order_date_gte'}
+
+
+def rollup_rows(group_by, filters):
+    days = DailyOrderStats.objects.filter(order_count__gt=0)
+    if (filters or {}).get('order_date_gte'):
+        days = days.filter(date__gte=filters['order_date_gte'])
+    key = F('date') if group_by == 'day' else TruncWeek('date')
+    return (
+        days.values(key=key)
+        .annotate(order_count=Sum('order_count'), revenue=Sum('revenue'))
+        # For orderBy only; format_row computes the value. Whole-number revenue
+        # is an integer on SQLite, which would make this an integer division.
+        .annotate(average_order_value=Cast('revenue', FloatField()) / F('order_count'))
+    )
+
+
+def grouped_rows(group_by, orders):
+    if group_by == 'product':
+        lines = Order.products.through.objects.all()
+        if orders.query.where:
+            lines = lines.filter(order_id__in=orders.values('pk'))
+        return lines.values(key=F('product_id'), label=F('product__name')).annotate(
+            order_count=Count('order_id'), revenue=Sum('product__price'), average_order_value=Avg('product__price'),
+        )
+    if group_by == 'customer':
+        rows = orders.values(key=F('customer_id'), label=F('customer__name'))
+    else:
+        trunc = TruncDate('order_date') if group_by == 'day' else TruncWeek('order_date', output_field=DateField())
+        rows = orders.values(key=trunc)
+    return rows.annotate(order_count=Count('pk'), revenue=Sum('total_amount'), average_order_value=Avg('total_amount'))
+
+
+def order_stats(group_by, filters=None, order_by='key', first=100, offset=0):
+    """Return (rows, has_next_page): one dict per group, ordered by `order_by` (prefix '-' to reverse)."""
+    if group_by not in GROUPS:
+        raise OrderStatsError(f"groupBy must be one of {', '.join(GROUPS)}.")
+    if order_by.lstrip('-') not in ORDER_FIELDS:
+        raise OrderStatsError("orderBy must be key, orderCount, revenue or averageOrderValue, optionally prefixed with '-'.")
+    if not 0 < first <= MAX_ROWS:
+        raise OrderStatsError(f"first must be between 1 and {MAX_ROWS}.")
+    if offset < 0:
+        raise OrderStatsError("offset cannot be negative.")
+
+    if uses_rollup(group_by, filters):
+        rows = rollup_rows(group_by, filters)
+    else:
+        rows = grouped_rows(group_by, filtered_orders(filters))
+    descending = order_by.startswith('-')
+    rows = rows.order_by(order_by, '-key' if descending else 'key')
+    page = list(rows[offset:offset + first + 1])
+    return [format_row(row) for row in page[:first]], len(page) > first
+
+
+def order_totals(filters=None):
+    """Order count, revenue and average order value over every matching order."""
+    totals = filtered_orders(filters).aggregate(order_count=Count('pk'), revenue=Sum('total_amount'))
+    return format_row({'key': None, **totals})
+
+
+def format_row(row):
+    key = row['key']
+    order_count = row['order_count'] or 0
+    revenue = Decimal(row['revenue'] or 0)
+    return {
+        'key': key.isoformat() if hasattr(key, 'isoformat') else key,
+        'label': row.get('label'),
+        'order_count': order_count,
+        'revenue': revenue.quantize(CENT),
+        # Every group's average order value is its revenue over its order count.
+        'average_order_value': (revenue / order_count if order_count else revenue).quantize(CENT),
+    }
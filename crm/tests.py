@@ -1,3 +1,985 @@
-from django.test import TestCase
+import base64
+import gzip
+import io
+import json
+import tempfile
+from datetime import timedelta
+from decimal import Decimal
+from pathlib import Path
+from types import SimpleNamespace
+from unittest import mock
 
-# Create your tests here.
+from asgiref.sync import async_to_sync
+from django.core.management import CommandError, call_command
+from django.db import connection
+from django.test import AsyncRequestFactory, RequestFactory, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from graphql_relay import from_global_id
+from prometheus_client import REGISTRY
+
+from .filters import CustomerFilter, OrderFilter, ProductFilter
+from . import cron, executor, imports, loaders, rollups, routing, seed, views
+from .cache import count_cache, response_cache
+from .celery import app as celery_app
+from .cron_jobs import send_order_reminders
+from .executor import GraphQLClientError, LocalClient, get_client
+from .models import Customer, ImportJob, Order, Product
+from .schema import BulkCreateCustomers, UpdateLowStockProducts, recent_orders
+from .views import AsyncGraphQLView, persisted_queries, query_hash
+
+
+# -----------------------------
+# Query plan regression checks
+# -----------------------------
+class FilterQueryPlanTests(TestCase):
+    """Fail when a filter or sort path in crm/filters.py falls back to a full table scan."""
+
+    # (FilterSet, filter data, order_by) for every path that an index should serve.
+    INDEXED_PATHS = [
+        (CustomerFilter, {'created_at_gte': '2026-01-01'}, None),
+        (CustomerFilter, {'created_at_lte': '2026-01-01'}, None),
+        (CustomerFilter, {'phone_pattern': '+1'}, None),
+        (CustomerFilter, {'search': 'customer1'}, None),
+        (ProductFilter, {'price_gte': '10'}, None),
+        (ProductFilter, {'price_lte': '10'}, None),
+        (ProductFilter, {'stock_gte': '5'}, None),
+        (ProductFilter, {'stock_lte': '5'}, None),
+        (ProductFilter, {'search': 'product'}, None),
+        (ProductFilter, {}, 'price'),
+        (ProductFilter, {}, '-price'),
+        (ProductFilter, {}, 'stock'),
+        (OrderFilter, {'total_amount_gte': '100'}, None),
+        (OrderFilter, {'total_amount_lte': '100'}, None),
+        (OrderFilter, {'order_date_gte': '2026-01-01'}, None),
+        (OrderFilter, {'order_date_lte': '2026-01-01'}, None),
+        (OrderFilter, {'product_id': '1'}, None),
+        (OrderFilter, {'customer_search': 'customer1'}, None),
+        (OrderFilter, {}, 'order_date'),
+        (OrderFilter, {}, '-order_date'),
+        (OrderFilter, {}, 'total_amount'),
+    ]
+
+    # Substring matches (LIKE '%x%') cannot use a b-tree index; `search` is the indexed alternative.
+    UNINDEXABLE = {'name_icontains', 'email_icontains', 'customer_name', 'product_name'}
+
+    @classmethod
+    def setUpTestData(cls):
+        customers = Customer.objects.bulk_create(
+            Customer(name=f"Customer {i}", email=f"customer{i}@example.com", phone=f"+1555000{i:04d}")
+            for i in range(200)
+        )
+        products = Product.objects.bulk_create(
+            Product(name=f"Product {i}", price=Decimal(i % 50) + Decimal('0.99'), stock=i % 30)
+            for i in range(200)
+        )
+        orders = Order.objects.bulk_create(
+            Order(customer=customers[i % 200], total_amount=Decimal(i % 500)) for i in range(1000)
+        )
+        Order.products.through.objects.bulk_create(
+            Order.products.through(order_id=order.pk, product_id=products[i % 200].pk)
+            for i, order in enumerate(orders)
+        )
+        with connection.cursor() as cursor:
+            cursor.execute('ANALYZE')
+
+    def setUp(self):
+        if connection.vendor == 'postgresql':
+            with connection.cursor() as cursor:
+                cursor.execute('SET enable_seqscan = off')
+
+    def assertNoFullScan(self, queryset, label):
+        plan = queryset.explain()
+        table = queryset.model._meta.db_table
+        if connection.vendor == 'sqlite':
+            full_scans = [
+                line for line in plan.splitlines()
+                if line.split('SCAN ', 1)[-1].strip() in (table, f'{table} AS T')
+            ]
+        else:
+            full_scans = [line for line in plan.splitlines() if f'Seq Scan on {table}' in line]
+        self.assertFalse(full_scans, f"{label} scans the whole {table} table:\n{plan}")
+
+    def test_filter_paths_use_indexes(self):
+        for filterset_class, data, order_by in self.INDEXED_PATHS:
+            label = f"{filterset_class.__name__}({data}, order_by={order_by})"
+            with self.subTest(label):
+                filterset = filterset_class(data=data, queryset=filterset_class._meta.model.objects.all())
+                self.assertTrue(filterset.is_valid(), filterset.errors)
+                queryset = filterset.qs
+                if order_by:
+                    queryset = queryset.order_by(order_by, 'pk')[:20]
+                self.assertNoFullScan(queryset, label)
+
+    def test_every_filter_is_covered(self):
+        covered = {key for _, data, _ in self.INDEXED_PATHS for key in data}
+        for filterset_class in (CustomerFilter, ProductFilter, OrderFilter):
+            for name in filterset_class.base_filters:
+                if name not in self.UNINDEXABLE:
+                    self.assertIn(name, covered, f"{filterset_class.__name__}.{name} has no query plan check")
+
+    def test_recent_orders_use_date_index(self):
+        self.assertNoFullScan(recent_orders(7)[:100], "recentOrders(lastDays: 7)")
+
+
+# -----------------------------
+# Full-text search
+# -----------------------------
+class SearchTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        # Created first, so pk order alone would list Ann before Smith.
+        cls.ann = Customer.objects.create(name="Ann Smith", email="ann@example.com")
+        cls.smith = Customer.objects.create(name="Smith", email="smith@smith.example.com")
+        cls.bob = Customer.objects.create(name="Bob Jones", email="bob@example.com")
+        for customer in (cls.ann, cls.smith, cls.bob):
+            Order.objects.create(customer=customer, total_amount=Decimal('1.00'))
+
+    def names(self, value):
+        customers = CustomerFilter(data={'search': value}, queryset=Customer.objects.all()).qs
+        return list(customers.values_list('name', flat=True))
+
+    def order_customers(self, value):
+        orders = OrderFilter(data={'customer_search': value}, queryset=Order.objects.all()).qs
+        return sorted(orders.values_list('customer__name', flat=True))
+
+    def test_matches_ranked_by_relevance(self):
+        # "smith" appears in every field of the first customer, once in the second.
+        self.assertEqual(self.names('smith'), ["Smith", "Ann Smith"])
+        self.assertEqual(self.names('smi ann'), ["Ann Smith"])
+        self.assertEqual(sorted(self.names('example')), ["Ann Smith", "Bob Jones", "Smith"])
+        self.assertEqual(self.names('"nobody" OR *'), [])
+        self.assertEqual(self.order_customers('smith'), ["Ann Smith", "Smith"])
+
+    def test_index_follows_updates_and_deletes(self):
+        Customer.objects.filter(pk=self.bob.pk).update(name="Bob Smith")
+        self.ann.delete()
+        self.assertEqual(self.names('smith'), ["Smith", "Bob Smith"])
+        self.assertEqual(self.names('jones'), [])
+        self.assertEqual(self.names('ann'), [])
+        self.assertEqual(self.order_customers('smith'), ["Bob Smith", "Smith"])
+
+
+# -----------------------------
+# Nested connections
+# -----------------------------
+class NestedConnectionTests(TestCase):
+    QUERY = '{ allCustomers { edges { node { name orders(%s) { %s edges { node { totalAmount } } } } } } }'
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.ann = Customer.objects.create(name="Ann", email="ann@example.com")
+        cls.bob = Customer.objects.create(name="Bob", email="bob@example.com")
+        for total in ('1.00', '2.00', '3.00', '4.00'):
+            Order.objects.create(customer=cls.ann, total_amount=Decimal(total))
+        Order.objects.create(customer=cls.bob, total_amount=Decimal('5.00'))
+
+    def pages(self, args, extra='pageInfo { hasNextPage endCursor }'):
+        response = self.client.post('/graphql', json.dumps({'query': self.QUERY % (args, extra)}),
+                                    content_type='application/json')
+        return {edge['node']['name']: edge['node']['orders'] for edge in response.json()['data']['allCustomers']['edges']}
+
+    def amounts(self, page):
+        return [edge['node']['totalAmount'] for edge in page['edges']]
+
+    def test_window_pages(self):
+        first = self.pages('first: 2')
+        self.assertEqual(self.amounts(first['Ann']), ['1.00', '2.00'])
+        self.assertEqual(first['Ann']['pageInfo']['hasNextPage'], True)
+        self.assertEqual(self.amounts(first['Bob']), ['5.00'])
+        self.assertEqual(first['Bob']['pageInfo']['hasNextPage'], False)
+
+        second = self.pages('first: 2, after: "%s"' % first['Ann']['pageInfo']['endCursor'])['Ann']
+        self.assertEqual(self.amounts(second), ['3.00', '4.00'])
+        self.assertEqual(second['pageInfo']['hasNextPage'], False)
+        self.assertEqual(self.amounts(self.pages('first: 1, offset: 2')['Ann']), ['3.00'])
+
+    def test_window_from_variables(self):
+        query = 'query($n: Int, $after: String) { allCustomers { edges { node { name orders(first: $n, after: $after) {'
+        query += ' edges { node { totalAmount } } } } } } }'
+        response = self.client.post('/graphql', json.dumps({'query': query, 'variables': {'n': 2, 'after': None}}),
+                                    content_type='application/json')
+        ann = response.json()['data']['allCustomers']['edges'][0]['node']
+        self.assertEqual(self.amounts(ann['orders']), ['1.00', '2.00'])
+
+    def test_last_and_total_count_read_every_row(self):
+        page = self.pages('last: 1', 'totalCount')['Ann']
+        self.assertEqual((page['totalCount'], self.amounts(page)), (4, ['4.00']))
+        self.assertEqual(self.pages('first: 1', 'totalCount')['Ann']['totalCount'], 4)
+
+    def test_loader_loads_first_rows_per_parent(self):
+        orders = loaders.orders_by_customer_query([self.ann.pk, self.bob.pk], 2)
+        self.assertEqual(sorted(str(order.total_amount) for order in orders), ['1.00', '2.00', '5.00'])
+        # The counted alias needs every row, so the planner leaves both aliases to the resolvers.
+        response = self.client.post('/graphql', json.dumps({'query': '''{ allCustomers { edges { node {
+            orders(first: 2) { pageInfo { hasNextPage } edges { node { totalAmount } } }
+            counted: orders { totalCount } } } } }'''}), content_type='application/json')
+        ann = response.json()['data']['allCustomers']['edges'][0]['node']
+        self.assertEqual(self.amounts(ann['orders']), ['1.00', '2.00'])
+        self.assertEqual((ann['orders']['pageInfo']['hasNextPage'], ann['counted']['totalCount']), (True, 4))
+
+
+class QueryCountTests(TestCase):
+    """Nested selections are fetched per level, not per row: a fixed query count for any page size."""
+
+    ORDERS = '''{ allOrders(first: 10) { edges { node { totalAmount customer { name }
+        products(first: 10) { edges { node { name } } } } } } }'''
+    CUSTOMERS = '''{ allCustomers(first: 10) { edges { node { name orders(first: 10) { edges { node { totalAmount
+        customer { email } products(first: 10) { edges { node { name } } } } } } } } } }'''
+    # (query, queries): the count, the page, then one query per prefetched connection level.
+    EXPECTED = [(ORDERS, 3), (CUSTOMERS, 4)]
+
+    @classmethod
+    def setUpTestData(cls):
+        products = [Product.objects.create(name=f"P{i}", price=Decimal('1.00')) for i in range(3)]
+        for i in range(4):
+            customer = Customer.objects.create(name=f"C{i}", email=f"c{i}@example.com")
+            for j in range(2):
+                Order.objects.create(customer=customer, total_amount=Decimal('2.00')).products.set(products[j:j + 2])
+
+    def test_sync_view(self):
+        for query, queries in self.EXPECTED:
+            with self.assertNumQueries(queries):
+                response = self.client.post('/graphql', json.dumps({'query': query}), content_type='application/json')
+            self.assertNotIn('errors', response.json())
+
+    def test_async_view(self):
+        view = async_to_sync(AsyncGraphQLView.as_view())
+        for query, queries in self.EXPECTED:
+            request = AsyncRequestFactory().post('/graphql', json.dumps({'query': query}), content_type='application/json')
+            with self.assertNumQueries(queries):
+                response = view(request)
+            self.assertNotIn('errors', json.loads(response.content))
+
+
+# -----------------------------
+# Keyset pagination
+# -----------------------------
+class KeysetPaginationTests(TestCase):
+    QUERY = '{ allOrders(keyset: true, orderBy: "%s", %s) { edges { node { id } } pageInfo { %s } } }'
+    PAGE_INFO = 'hasNextPage hasPreviousPage startCursor endCursor'
+
+    @classmethod
+    def setUpTestData(cls):
+        bob = Customer.objects.create(name="Bob", email="bob@example.com")
+        ann = Customer.objects.create(name="Ann", email="ann@example.com")
+        # Orders of the same customer tie on customer__name; pk breaks the tie.
+        cls.orders = [Order.objects.create(customer=customer, total_amount=Decimal('1.00'))
+                      for customer in (bob, ann, bob, ann, bob)]
+
+    def page(self, order_by, args):
+        query = self.QUERY % (order_by, args, self.PAGE_INFO)
+        return self.client.post('/graphql', json.dumps({'query': query}), content_type='application/json').json()
+
+    def walk(self, order_by, forward):
+        """Page through every order two at a time; return the ids in the order they were seen."""
+        seen, cursor = [], None
+        while True:
+            if forward:
+                args = 'first: 2' + (f', after: "{cursor}"' if cursor else '')
+            else:
+                args = 'last: 2' + (f', before: "{cursor}"' if cursor else '')
+            data = self.page(order_by, args)['data']['allOrders']
+            ids = [int(from_global_id(edge['node']['id'])[1]) for edge in data['edges']]
+            info = data['pageInfo']
+            if forward:
+                seen += ids
+                cursor, more = info['endCursor'], info['hasNextPage']
+            else:
+                seen = ids + seen
+                cursor, more = info['startCursor'], info['hasPreviousPage']
+            if not more:
+                return seen
+
+    def test_forward_and_backward(self):
+        expected = sorted(order.pk for order in self.orders)
+        self.assertEqual(self.walk('pk', forward=True), expected)
+        self.assertEqual(self.walk('pk', forward=False), expected)
+        self.assertEqual(self.walk('-pk', forward=True), expected[::-1])
+
+    def test_related_field_with_pk_tiebreak(self):
+        ann, bob = self.orders[1].customer, self.orders[0].customer
+        expected = [order.pk for customer in (ann, bob) for order in self.orders if order.customer == customer]
+        self.assertEqual(self.walk('customer__name', forward=True), expected)
+        self.assertEqual(self.walk('customer__name', forward=False), expected)
+        self.assertEqual(self.walk('-customer__name', forward=True), expected[::-1])
+
+    def test_rejects_malformed_cursor(self):
+        for cursor in ('not-a-cursor', base64.urlsafe_b64encode(b'keyset:[1]').decode()):
+            errors = self.page('customer__name', f'first: 2, after: "{cursor}"')['errors']
+            self.assertRegex(errors[0]['message'], 'Invalid keyset cursor|does not match the requested ordering')
+
+    def test_rejects_offset(self):
+        errors = self.page('pk', 'first: 2, offset: 2')['errors']
+        self.assertEqual(errors[0]['message'], "`offset` cannot be combined with keyset pagination.")
+
+
+# -----------------------------
+# Query cost
+# -----------------------------
+@override_settings(GRAPHQL_QUERY_COST={'MAX_COST': 5000, 'MAX_DEPTH': 5})
+class QueryCostTests(TestCase):
+    NESTED = '''query($first: Int) { allCustomers(first: $first) { edges { node { orders(first: $first) {
+        edges { node { products(first: $first) { edges { node { name } } } } } } } } } }'''
+
+    def post(self, query, variables=None):
+        return self.client.post('/graphql', json.dumps({'query': query, 'variables': variables}),
+                                content_type='application/json').json()
+
+    def test_over_budget_query_is_rejected_before_running(self):
+        with self.assertNumQueries(0):
+            result = self.post(self.NESTED, {'first': 100})
+        self.assertNotIn('data', result)
+        self.assertEqual(result['errors'][0]['extensions']['code'], 'QUERY_TOO_EXPENSIVE')
+        self.assertGreater(result['extensions']['cost']['cost'], result['extensions']['cost']['maxCost'])
+        # The same document within budget runs.
+        self.assertEqual(self.post(self.NESTED, {'first': 5})['data'], {'allCustomers': {'edges': []}})
+
+    def test_too_deep_query_is_rejected(self):
+        deep = '{ allOrders(first: 1) { edges { node { customer { orders(first: 1) { edges { node { customer {'
+        deep += ' orders(first: 1) { edges { node { products(first: 1) { edges { node { orders(first: 1) {'
+        deep += ' edges { node { id } } } } } } } } } } } } } } } } } }'
+        error = self.post(deep)['errors'][0]
+        self.assertEqual(error['extensions']['code'], 'QUERY_TOO_EXPENSIVE')
+        self.assertIn('depth', error['message'])
+
+
+# -----------------------------
+# Persisted queries and response cache
+# -----------------------------
+class CacheTests(TestCase):
+    PRODUCTS = '{ allProducts(first: 10) { edges { node { name stock } } } }'
+
+    @classmethod
+    def setUpTestData(cls):
+        Product.objects.create(name="A", price=Decimal('2.50'), stock=3)
+
+    def setUp(self):
+        response_cache.backend.clear()
+        persisted_queries.clear()
+
+    def post(self, body):
+        return self.client.post('/graphql', json.dumps(body), content_type='application/json').json()
+
+    def products(self):
+        return sorted((edge['node']['name'], edge['node']['stock'])
+                      for edge in self.post({'query': self.PRODUCTS})['data']['allProducts']['edges'])
+
+    def lookups(self, cache, result):
+        return REGISTRY.get_sample_value('graphql_cache_lookups_total', {'cache': cache, 'result': result}) or 0
+
+    def test_persisted_query_miss_then_hit(self):
+        extensions = {'persistedQuery': {'version': 1, 'sha256Hash': query_hash(self.PRODUCTS)}}
+        misses = self.lookups('persisted_query', 'miss')
+        error = self.post({'extensions': extensions})['errors'][0]
+        self.assertEqual((error['message'], error['extensions']['code']), ('PersistedQueryNotFound', 'PERSISTED_QUERY_NOT_FOUND'))
+        self.assertEqual(self.lookups('persisted_query', 'miss'), misses + 1)
+
+        registered = self.post({'query': self.PRODUCTS, 'extensions': extensions})
+        hits = self.lookups('persisted_query', 'hit')
+        self.assertEqual(self.post({'extensions': extensions}), registered)
+        self.assertEqual(self.lookups('persisted_query', 'hit'), hits + 1)
+
+    def test_document_cache_hit(self):
+        query = '{ documentCacheTest: allProducts(first: 1) { edges { node { name } } } }'
+        hits = self.lookups('document', 'hit')
+        with mock.patch('crm.views.parse', wraps=views.parse) as parse:
+            first = self.post({'query': query})
+            response_cache.backend.clear()  # reach the document cache on the second request too
+            self.assertEqual(self.post({'query': query}), first)
+        self.assertEqual(parse.call_count, 1)
+        self.assertEqual(self.lookups('document', 'hit'), hits + 1)
+
+    def test_response_cache_hit(self):
+        first = self.products()
+        hits = self.lookups('response', 'hit')
+        with self.assertNumQueries(0):
+            self.assertEqual(self.products(), first)
+        self.assertEqual(self.lookups('response', 'hit'), hits + 1)
+
+    def test_writes_invalidate_cached_products(self):
+        self.assertEqual(self.products(), [('A', 3)])
+        with self.captureOnCommitCallbacks(execute=True):
+            self.post({'query': 'mutation { createProduct(input: {name: "B", price: 4, stock: 20}) { message } }'})
+        self.assertEqual(self.products(), [('A', 3), ('B', 20)])
+        with self.captureOnCommitCallbacks(execute=True):
+            self.post({'query': 'mutation { updateLowStockProducts(threshold: 10, increment: 5) { updatedCount } }'})
+        self.assertEqual(self.products(), [('A', 8), ('B', 20)])
+
+
+# -----------------------------
+# Bulk mutations
+# -----------------------------
+class BulkCreateCustomersTests(TestCase):
+    MUTATION = '''mutation($input: [CreateCustomerInput]!) {
+        bulkCreateCustomers(input: $input, batchSize: 2) { customers { name } errors } }'''
+
+    def test_row_errors(self):
+        Customer.objects.create(name="Taken", email="taken@example.com")
+        rows = [
+            {'name': "Ann", 'email': "ann@example.com", 'phone': "+12345678901"},
+            {'name': "Bad", 'email': "bad@example.com", 'phone': "12345"},
+            {'name': "Ann again", 'email': "ann@example.com"},
+            {'name': "Taken", 'email': "taken@example.com"},
+            {'name': "Bob", 'email': "bob@example.com"},
+        ]
+        response = self.client.post('/graphql', json.dumps({'query': self.MUTATION, 'variables': {'input': rows}}),
+                                    content_type='application/json')
+        data = response.json()['data']['bulkCreateCustomers']
+        self.assertEqual([customer['name'] for customer in data['customers']], ["Ann", "Bob"])
+        self.assertEqual(data['errors'], [
+            "bad@example.com: ['Phone must be in +1234567890 or 123-456-7890 format.']",
+            "Email 'ann@example.com' is duplicated in this batch.",
+            "Email 'taken@example.com' already exists.",
+        ])
+        self.assertEqual(sorted(Customer.objects.values_list('name', flat=True)), ["Ann", "Bob", "Taken"])
+
+    def test_queries_are_chunked(self):
+        rows = [SimpleNamespace(name=f"C{i}", email=f"c{i}@example.com", phone=None) for i in range(5)]
+        with CaptureQueriesContext(connection) as queries:
+            created = BulkCreateCustomers.create(rows, 2).customers
+        self.assertEqual(len(created), 5)
+        statements = [query['sql'] for query in queries.captured_queries]
+        # One existing-email check and one multi-row INSERT per chunk of two, whatever the row count.
+        self.assertEqual(sum(sql.startswith('SELECT "crm_customer"."email"') for sql in statements), 3)
+        self.assertEqual(sum(sql.startswith('INSERT INTO "crm_customer"') for sql in statements), 3)
+
+
+class CreateOrdersTests(TestCase):
+    MUTATION = '''mutation($input: [CreateOrderInput!]!) {
+        createOrders(input: $input, batchSize: 2) { orders { totalAmount customer { name } } errors } }'''
+
+    def test_bulk_path_writes_orders_lines_and_rollup(self):
+        ann = Customer.objects.create(name="Ann", email="ann@example.com")
+        a = Product.objects.create(name="A", price=Decimal('2.50'))
+        b = Product.objects.create(name="B", price=Decimal('4.00'))
+        rows = [
+            {'customerId': ann.pk, 'productIds': [a.pk, b.pk]},
+            {'customerId': 999999, 'productIds': [a.pk]},
+            {'customerId': ann.pk, 'productIds': [a.pk, 999999]},
+            {'customerId': ann.pk, 'productIds': [b.pk]},
+        ]
+        response = self.client.post('/graphql', json.dumps({'query': self.MUTATION, 'variables': {'input': rows}}),
+                                    content_type='application/json')
+        data = response.json()['data']['createOrders']
+        self.assertEqual(data['errors'], ["Order 1: Customer not found.", "Order 2: Some products not found."])
+        self.assertEqual([(order['totalAmount'], order['customer']['name']) for order in data['orders']],
+                         [('6.50', 'Ann'), ('4.00', 'Ann')])
+        self.assertEqual(sorted(Order.products.through.objects.values_list('order__total_amount', 'product__name')),
+                         [(Decimal('4.00'), 'B'), (Decimal('6.50'), 'A'), (Decimal('6.50'), 'B')])
+        self.assertEqual(rollups.totals(), {'orders': 2, 'revenue': Decimal('10.50'), 'customers': 1})
+
+
+class RestockTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        # Sparse primary keys: pk ranges of any fixed width would mostly be empty.
+        for pk, stock in ((1, 2), (40, 50), (1000, 0), (1001, 9), (90000, 3)):
+            Product.objects.create(pk=pk, name=f"P{pk}", price=Decimal('1.00'), stock=stock)
+
+    def restock(self, counts_only):
+        with CaptureQueriesContext(connection) as queries:
+            result = UpdateLowStockProducts.restock(threshold=10, increment=5, counts_only=counts_only, chunk_size=2)
+        updates = [query for query in queries.captured_queries if query['sql'].startswith('UPDATE "crm_product"')]
+        return result, len(updates)
+
+    def test_restock_chunks_by_primary_key(self):
+        result, updates = self.restock(counts_only=False)
+        self.assertEqual((result.updated_count, updates), (4, 2))
+        self.assertEqual([product.pk for product in result.updated_products], [1, 1000, 1001, 90000])
+        self.assertEqual(dict(Product.objects.values_list('pk', 'stock')), {1: 7, 40: 50, 1000: 5, 1001: 14, 90000: 8})
+
+    def test_restock_counts_only(self):
+        result, updates = self.restock(counts_only=True)
+        self.assertEqual((result.updated_count, result.updated_products, updates), (4, None, 2))
+        self.assertEqual(dict(Product.objects.values_list('pk', 'stock')), {1: 7, 40: 50, 1000: 5, 1001: 14, 90000: 8})
+
+
+# -----------------------------
+# GraphQL clients for scheduled jobs
+# -----------------------------
+class ExecutorTests(TestCase):
+    QUERY = '{ allProducts(first: 1) { edges { node { name } } } }'
+
+    def test_document_is_parsed_once(self):
+        client = LocalClient()
+        with mock.patch('crm.executor.parse', wraps=executor.parse) as parse:
+            client.execute(self.QUERY)
+            client.execute(self.QUERY)
+        self.assertEqual(parse.call_count, 1)
+        self.assertEqual((client.documents.misses, client.documents.hits), (1, 1))
+
+    def test_errors_raise(self):
+        with self.assertRaises(GraphQLClientError) as raised:
+            LocalClient().execute('{ allOrders(first: -1) { edges { node { id } } } }')
+        self.assertIn("must be a non-negative integer", str(raised.exception))
+        self.assertEqual(raised.exception.data, {'allOrders': None})
+        with self.assertRaisesMessage(GraphQLClientError, "Cannot query field 'nope'"):
+            LocalClient().execute('{ nope }')
+
+    def test_unknown_transport(self):
+        with self.assertRaisesMessage(ValueError, "Unknown GraphQL transport 'smtp'"):
+            get_client('smtp')
+
+    def test_low_stock_job_asks_for_counts_only(self):
+        Product.objects.create(name="Low", price=Decimal('1.00'), stock=2)
+        log = mock.mock_open()
+        with mock.patch.object(UpdateLowStockProducts, 'restock', wraps=UpdateLowStockProducts.restock) as restock, \
+                mock.patch('crm.cron.open', log, create=True):
+            cron.update_low_stock('local')
+        _threshold, _increment, counts_only, _chunk_size = restock.call_args.args
+        self.assertIs(counts_only, True)
+        self.assertEqual(Product.objects.get().stock, 12)
+        self.assertIn("1 products restocked", log().write.call_args.args[0])
+
+
+class OrderReminderTests(TestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.log = Path(directory.name) / 'reminders.log'
+        self.checkpoint = Path(directory.name) / 'checkpoint.json'
+        self.customer = Customer.objects.create(name="Ann", email="ann@example.com")
+        for total in ('1.00', '2.00', '3.00'):
+            Order.objects.create(customer=self.customer, total_amount=Decimal(total))
+
+    def send(self):
+        return send_order_reminders.send_reminders(LocalClient(), last_days=7, page_size=2,
+                                                   log_path=self.log, checkpoint_path=self.checkpoint)
+
+    def reminded(self):
+        return [line.split('Reminder for order ')[1].split(' ->')[0] for line in self.log.read_text().splitlines()]
+
+    def test_rerun_resumes_after_checkpoint(self):
+        self.assertEqual(self.send(), 3)
+        self.assertEqual(self.send(), 0)
+        self.assertEqual(len(self.reminded()), 3)
+
+        order = Order.objects.create(customer=self.customer, total_amount=Decimal('4.00'))
+        self.assertEqual(self.send(), 1)
+        self.assertEqual(from_global_id(self.reminded()[-1]), ('OrderNode', str(order.pk)))
+        self.assertEqual(len(self.reminded()), 4)
+
+    def test_rejects_non_positive_days(self):
+        with self.assertRaisesMessage(GraphQLClientError, "lastDays must be positive."):
+            send_order_reminders.send_reminders(LocalClient(), last_days=0, log_path=self.log, checkpoint_path=None)
+
+
+# -----------------------------
+# Inactive customer cleanup
+# -----------------------------
+class CleanupTests(TestCase):
+    def test_deletes_inactive_customers_orders_and_rollup(self):
+        old = timezone.now() - timedelta(days=400)
+        inactive, active, new = (Customer.objects.create(name=name, email=f"{name}@example.com")
+                                 for name in ("inactive", "active", "new"))
+        Customer.objects.filter(pk__in=[inactive.pk, active.pk]).update(created_at=old)
+        stale = Order.objects.create(customer=inactive, total_amount=Decimal('5.00'))
+        Order.objects.filter(pk=stale.pk).update(order_date=old)
+        Order.objects.create(customer=active, total_amount=Decimal('2.00'))
+        rollups.rebuild()
+        self.assertEqual(rollups.totals(), {'orders': 2, 'revenue': Decimal('7.00'), 'customers': 3})
+
+        out = io.StringIO()
+        call_command('clean_inactive_customers', '--days', '365', '--batch-size', '1', '--pause', '0', stdout=out)
+        self.assertIn("Deleted 1 inactive customers (1 orders)", out.getvalue())
+        self.assertEqual(sorted(Customer.objects.values_list('name', flat=True)), ["active", "new"])
+        self.assertFalse(Order.objects.filter(pk=stale.pk).exists())
+        # The deleted customer and order leave the rollup, which matches a rebuild from the tables.
+        after = rollups.totals()
+        self.assertEqual(after, {'orders': 1, 'revenue': Decimal('2.00'), 'customers': 2})
+        self.assertEqual(rollups.totals(end=timezone.localdate(old))['orders'], 0)
+        rollups.rebuild()
+        self.assertEqual(rollups.totals(), after)
+
+
+# -----------------------------
+# Bulk imports
+# -----------------------------
+class ImportTests(TestCase):
+    """Run import chunks inline with Celery's eager mode; no broker needed."""
+
+    def setUp(self):
+        # The app reads Django settings with the CELERY_ namespace, so override the namespaced key.
+        eager = celery_app.conf.task_always_eager
+        celery_app.conf.CELERY_TASK_ALWAYS_EAGER = True
+        self.addCleanup(setattr, celery_app.conf, 'CELERY_TASK_ALWAYS_EAGER', eager)
+
+    def start(self, kind, text, name, chunk_size=2):
+        with self.captureOnCommitCallbacks(execute=True):
+            job = imports.start_import(kind, io.BytesIO(text.encode()), name, chunk_size=chunk_size)
+        return ImportJob.objects.get(pk=job.pk)
+
+    def test_customers_csv(self):
+        Customer.objects.create(name="Existing", email="taken@example.com")
+        job = self.start('customers', (
+            "name,email,phone\n"
+            "Ann,ann@example.com,+12345678901\n"
+            "Ben,ben@example.com,\n"
+            "No Email,,\n"
+            "Taken,taken@example.com,\n"
+            "Cid,cid@example.com,bad\n"
+        ), 'customers.csv')
+
+        self.assertEqual((job.status, job.total_rows, job.chunk_count, job.chunks_done), ('done', 5, 2, 2))
+        self.assertEqual((job.created_count, job.error_count), (2, 3))
+        self.assertEqual(job.errors, ["Row 3: missing email"])
+        self.assertEqual([c.row_count for c in job.chunks.all()], [2, 2])
+        self.assertEqual(Customer.objects.count(), 3)
+
+    def test_orders_ndjson(self):
+        customer = Customer.objects.create(name="Ann", email="ann@example.com")
+        a = Product.objects.create(name="A", price=Decimal('2.50'))
+        b = Product.objects.create(name="B", price=Decimal('4.00'))
+        job = self.start('orders', "\n".join([
+            f'{{"customer_id": {customer.pk}, "product_ids": [{a.pk}, {b.pk}]}}',
+            '{"customer_id": ',
+            f'{{"customer_id": 0, "product_ids": "{a.pk}"}}',
+            f'{{"customer_id": {customer.pk}, "product_ids": "{b.pk}"}}',
+        ]), 'orders.ndjson')
+
+        self.assertEqual((job.status, job.created_count, job.error_count), ('done', 2, 2))
+        self.assertEqual(job.chunks.get(index=1).errors, ["Row 3: Customer not found."])
+        self.assertEqual(sorted(Order.objects.values_list('total_amount', flat=True)), [Decimal('4.00'), Decimal('6.50')])
+
+    def test_redelivered_chunk_inserts_once(self):
+        customer = Customer.objects.create(name="Ann", email="ann@example.com")
+        product = Product.objects.create(name="A", price=Decimal('2.50'))
+        line = f'{{"customer_id": {customer.pk}, "product_ids": [{product.pk}]}}'
+        with self.captureOnCommitCallbacks():  # dispatch nothing; deliver the chunk by hand
+            job = imports.start_import('orders', io.BytesIO(line.encode()), 'orders.ndjson')
+        chunk = job.chunks.get()
+        rows = [{'row': 1, 'customer_id': str(customer.pk), 'product_ids': [str(product.pk)]}]
+
+        def insert_then_die(*args):
+            real_insert(*args)
+            raise SystemExit("worker lost")
+
+        # A worker dying after the insert rolls the chunk back to pending with no orders.
+        real_insert = imports.insert_rows
+        with mock.patch.object(imports, 'insert_rows', insert_then_die), self.assertRaises(SystemExit):
+            imports.run_chunk(chunk.pk, rows)
+        chunk.refresh_from_db()
+        self.assertEqual((chunk.status, Order.objects.count()), ('pending', 0))
+
+        # The redelivery inserts the chunk; any later one finds it done and inserts nothing.
+        imports.run_chunk(chunk.pk, rows)
+        imports.run_chunk(chunk.pk, rows)
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.chunks_done, job.created_count), ('done', 1, 1))
+        self.assertEqual(Order.objects.count(), 1)
+
+
+# -----------------------------
+# Streaming exports
+# -----------------------------
+class ExportTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        customer = Customer.objects.create(name="Ann", email="ann@example.com")
+        a = Product.objects.create(name="A", price=Decimal('2.50'))
+        b = Product.objects.create(name="B", price=Decimal('4.00'))
+        for total, products in ((Decimal('6.50'), [a, b]), (Decimal('2.50'), [a]), (Decimal('9.00'), [b])):
+            Order.objects.create(customer=customer, total_amount=total).products.set(products)
+
+    def test_orders_ndjson_filtered(self):
+        with self.assertNumQueries(3):  # orders, then one products query per chunk of 1
+            response = self.client.get('/export/orders', {'format': 'ndjson', 'totalAmountGte': '3', 'chunk_size': '1'})
+            rows = [json.loads(line) for line in b''.join(response.streaming_content).splitlines()]
+        self.assertEqual([row['total_amount'] for row in rows], ['6.50', '9.00'])
+        self.assertEqual(rows[0]['product_names'], ['A', 'B'])
+        self.assertEqual(rows[0]['customer_email'], 'ann@example.com')
+
+    def test_orders_csv_gzip(self):
+        response = self.client.get('/export/orders', {'gzip': '1'})
+        self.assertEqual(response['Content-Disposition'], 'attachment; filename="orders.csv.gz"')
+        lines = gzip.decompress(b''.join(response.streaming_content)).decode().splitlines()
+        self.assertEqual(len(lines), 4)
+        self.assertTrue(lines[1].endswith(',A;B'))
+
+    def test_rejects_unknown_arguments(self):
+        self.assertEqual(self.client.get('/export/customers', {'totalAmountGte': '3'}).status_code, 400)
+
+
+# -----------------------------
+# Batched operations
+# -----------------------------
+class BatchTests(TestCase):
+    CUSTOMERS = '{ allCustomers(first: 10) { edges { node { name orders { edges { node { totalAmount } } } } } } }'
+    PRODUCTS = '{ allProducts(first: 10) { edges { node { name } } } }'
+
+    @classmethod
+    def setUpTestData(cls):
+        customer = Customer.objects.create(name="Ann", email="ann@example.com")
+        product = Product.objects.create(name="A", price=Decimal('2.50'))
+        Order.objects.create(customer=customer, total_amount=Decimal('2.50')).products.set([product])
+
+    def post(self, operations):
+        return self.client.post('/graphql', json.dumps(operations), content_type='application/json')
+
+    def test_results_in_order(self):
+        create = 'mutation { createProduct(input: {name: "B", price: 4}) { product { name } } }'
+        response = self.post([
+            {'query': self.CUSTOMERS, 'id': 'customers'},
+            {'query': create, 'id': 'create'},
+            {'query': self.PRODUCTS, 'id': 'products'},
+        ])
+        self.assertEqual(response.status_code, 200)
+        results = response.json()
+        self.assertEqual([result['id'] for result in results], ['customers', 'create', 'products'])
+        self.assertEqual(results[0]['data']['allCustomers']['edges'][0]['node']['name'], 'Ann')
+        names = [edge['node']['name'] for edge in results[2]['data']['allProducts']['edges']]
+        self.assertEqual(sorted(names), ['A', 'B'])
+
+    def test_failed_operation_does_not_affect_others(self):
+        response = self.post([
+            {'query': 'mutation { createProduct(input: {name: "B", price: 4}) { message } }'},
+            {'query': 'mutation { createCustomer(input: {name: "Ann", email: "ann@example.com"}) { message } }'},
+            {'query': self.PRODUCTS},
+        ])
+        created, duplicate, products = response.json()
+        self.assertEqual(created['data']['createProduct']['message'], "Product created successfully.")
+        self.assertEqual(duplicate['data']['createCustomer']['message'], "Email already exists.")
+        self.assertNotIn('errors', products)
+        self.assertEqual(sorted(edge['node']['name'] for edge in products['data']['allProducts']['edges']), ['A', 'B'])
+        self.assertTrue(Product.objects.filter(name="B").exists())
+
+    def test_mutation_bypasses_response_cache_for_rest_of_batch(self):
+        response_cache.backend.clear()
+        self.post([{'query': self.PRODUCTS}])
+        response = self.post([
+            {'query': 'mutation { createProduct(input: {name: "B", price: 4}) { message } }'},
+            {'query': self.PRODUCTS},
+        ])
+        products = response.json()[1]['data']['allProducts']['edges']
+        self.assertEqual(sorted(edge['node']['name'] for edge in products), ['A', 'B'])
+
+    def test_batch_size_limit(self):
+        response = self.post([{'query': self.PRODUCTS}] * 11)
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('exceeds the limit of 10', response.json()['errors'][0]['message'])
+        self.assertEqual(self.post([]).status_code, 400)
+
+
+# -----------------------------
+# Primary/replica routing
+# -----------------------------
+@override_settings(CRM_DATABASE_ROUTING={'REPLICAS': ['unreachable']})
+class RoutingTests(TestCase):
+    def tearDown(self):
+        routing._down_until.clear()
+
+    def post(self, query):
+        return self.client.post('/graphql', json.dumps({'query': query}), content_type='application/json')
+
+    def test_unreachable_replica_falls_back_to_primary(self):
+        Customer.objects.create(name="Ann", email="ann@example.com")
+        response = self.post('{ allCustomers { edges { node { name } } } }')
+        self.assertEqual(response.json()['data']['allCustomers']['edges'], [{'node': {'name': 'Ann'}}])
+        self.assertGreater(routing.health()['unreachable'], 0)
+
+    def test_mutation_pins_client_to_primary(self):
+        response = self.post('mutation { createProduct(input: {name: "A", price: 2}) { message } }')
+        cookie = response.cookies['crm_primary_until']
+        request = RequestFactory().get('/graphql')
+        request.COOKIES[cookie.key] = cookie.value
+        self.assertTrue(routing.is_pinned(request))
+        self.assertEqual(routing.replica_for(request), 'default')
+        self.assertNotIn('crm_primary_until', self.post('{ allProducts { edges { node { name } } } }').cookies)
+
+
+# -----------------------------
+# Metrics
+# -----------------------------
+class MetricsTests(TestCase):
+    DUPLICATE = 'mutation { createCustomer(input: {name: "Ann", email: "ann@example.com"}) { message } }'
+
+    @classmethod
+    def setUpTestData(cls):
+        Customer.objects.create(name="Ann", email="ann@example.com")
+
+    def failures(self):
+        return REGISTRY.get_sample_value('graphql_mutation_errors_total', {'mutation': 'createCustomer'}) or 0
+
+    def test_sync_view_counts_failed_mutations(self):
+        before = self.failures()
+        self.client.post('/graphql', json.dumps({'query': self.DUPLICATE}), content_type='application/json')
+        self.assertEqual(self.failures(), before + 1)
+
+    def test_requests_are_labelled_by_root_fields(self):
+        labels = {'operation': 'allProducts', 'type': 'query', 'status': 'ok'}
+        before = REGISTRY.get_sample_value('graphql_requests_total', labels) or 0
+        query = 'query Client%s { allProducts { edges { node { name } } } }'
+        for name in ('Name1', 'Name2'):
+            self.client.post('/graphql', json.dumps({'query': query % name}), content_type='application/json')
+        self.assertEqual(REGISTRY.get_sample_value('graphql_requests_total', labels), before + 2)
+        self.assertIsNone(REGISTRY.get_sample_value('graphql_requests_total', {**labels, 'operation': 'ClientName1'}))
+
+    async def test_async_view_counts_failed_mutations(self):
+        before = self.failures()
+        request = AsyncRequestFactory().post('/graphql', json.dumps({'query': self.DUPLICATE}),
+                                             content_type='application/json')
+        response = await AsyncGraphQLView.as_view()(request)
+        self.assertEqual(json.loads(response.content)['data']['createCustomer']['message'], "Email already exists.")
+        self.assertEqual(self.failures(), before + 1)
+
+
+# -----------------------------
+# Resolver tracing
+# -----------------------------
+class TracingTests(TestCase):
+    QUERY = '{ allCustomers { edges { node { name orders(last: 1) { edges { node { totalAmount } } } } } } }'
+
+    @classmethod
+    def setUpTestData(cls):
+        for name in ("Ann", "Bob", "Cid"):
+            customer = Customer.objects.create(name=name, email=f"{name.lower()}@example.com")
+            Order.objects.create(customer=customer, total_amount=Decimal('1.00'))
+
+    def post(self, **headers):
+        response = self.client.post('/graphql', json.dumps({'query': self.QUERY}), content_type='application/json',
+                                    headers=headers)
+        return response.json()
+
+    def test_untraced_by_default(self):
+        self.assertNotIn('tracing', self.post()['extensions'])
+
+    def test_apollo_trace_and_sql_per_field(self):
+        extensions = self.post(**{'X-GraphQL-Tracing': '1'})['extensions']
+        tracing = extensions['tracing']
+        self.assertEqual(tracing['version'], 1)
+        self.assertLess(tracing['startTime'], tracing['endTime'])
+        self.assertGreater(tracing['duration'], 0)
+        resolvers = {tuple(entry['path']): entry for entry in tracing['execution']['resolvers']}
+        for entry in resolvers.values():
+            self.assertTrue({'path', 'startOffset', 'duration'} <= entry.keys())
+
+        # Each customer's orders connection runs its own count and page query.
+        self.assertEqual(resolvers['allCustomers', 'edges', 0, 'node', 'name']['sqlCount'], 0)
+        for i in range(3):
+            self.assertEqual(resolvers['allCustomers', 'edges', i, 'node', 'orders']['sqlCount'], 2)
+        self.assertEqual(extensions['sql']['count'], sum(entry['sqlCount'] for entry in resolvers.values()))
+
+        n_plus_one = extensions['sql']['nPlusOne']
+        self.assertEqual({entry['path'] for entry in n_plus_one}, {'allCustomers.edges.*.node.orders'})
+        self.assertEqual([entry['count'] for entry in n_plus_one], [3, 3])
+
+
+# -----------------------------
+# Connection counts
+# -----------------------------
+class CountTests(TestCase):
+    QUERY = '{ allOrders(first: %d, countStrategy: %s) { totalCount totalCountIsExact pageInfo { hasNextPage } } }'
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.customer = Customer.objects.create(name="Ann", email="ann@example.com")
+        for total in ('1.00', '2.00', '3.00'):
+            Order.objects.create(customer=cls.customer, total_amount=Decimal(total))
+
+    def tearDown(self):
+        count_cache.backend.clear()
+
+    def query(self, first, strategy):
+        response = self.client.post('/graphql', json.dumps({'query': self.QUERY % (first, strategy)}),
+                                    content_type='application/json')
+        return response.json()['data']['allOrders']
+
+    def test_cached_count_invalidated_by_writes(self):
+        self.assertEqual(self.query(1, 'CACHED')['totalCount'], 3)
+        with self.assertNumQueries(1):  # the page only
+            self.assertEqual(self.query(1, 'CACHED')['totalCount'], 3)
+        with self.captureOnCommitCallbacks(execute=True):
+            Order.objects.create(customer=self.customer, total_amount=Decimal('4.00'))
+        self.assertEqual(self.query(1, 'CACHED'), {'totalCount': 4, 'totalCountIsExact': True,
+                                                   'pageInfo': {'hasNextPage': True}})
+
+    @override_settings(GRAPHQL_COUNTS={'SAMPLE_SIZE': 2, 'MIN_SAMPLE_MATCHES': 1})
+    def test_approximate_count(self):
+        self.assertEqual(self.query(1, 'APPROXIMATE'), {'totalCount': 3, 'totalCountIsExact': False,
+                                                        'pageInfo': {'hasNextPage': True}})
+        with self.assertNumQueries(1):  # a page that reaches the end gives the exact count
+            self.assertEqual(self.query(5, 'APPROXIMATE'), {'totalCount': 3, 'totalCountIsExact': True,
+                                                            'pageInfo': {'hasNextPage': False}})
+
+
+# -----------------------------
+# Order statistics
+# -----------------------------
+class OrderStatsTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        ann = Customer.objects.create(name="Ann", email="ann@example.com")
+        bob = Customer.objects.create(name="Bob", email="bob@example.com")
+        a = Product.objects.create(name="A", price=Decimal('2.50'))
+        b = Product.objects.create(name="B", price=Decimal('4.00'))
+        for customer, products in ((ann, [a, b]), (ann, [a]), (bob, [b])):
+            order = Order.objects.create(customer=customer, total_amount=sum(p.price for p in products))
+            order.products.set(products)
+
+    def stats(self, arguments, fields='rows { key label orderCount revenue averageOrderValue }'):
+        query = '{ orderStats(%s) { hasNextPage %s } }' % (arguments, fields)
+        response = self.client.post('/graphql', json.dumps({'query': query}), content_type='application/json')
+        return response.json()
+
+    def test_group_by_customer_and_product(self):
+        data = self.stats('groupBy: CUSTOMER, orderBy: "-revenue", first: 1')['data']['orderStats']
+        self.assertEqual(data, {'hasNextPage': True, 'rows': [
+            {'key': str(Customer.objects.get(name="Ann").pk), 'label': 'Ann', 'orderCount': 2,
+             'revenue': '9.00', 'averageOrderValue': '4.50'},
+        ]})
+        rows = self.stats('groupBy: PRODUCT, filter: {productName: "A"}')['data']['orderStats']['rows']
+        self.assertEqual([(row['label'], row['orderCount'], row['revenue']) for row in rows],
+                         [('A', 2, '5.00'), ('B', 1, '4.00')])
+
+    def test_day_rollup_matches_filtered_scan(self):
+        fields = 'rows { key orderCount revenue averageOrderValue } totals { orderCount revenue averageOrderValue }'
+        rollup = self.stats('groupBy: DAY', fields)['data']['orderStats']
+        scan = self.stats('groupBy: DAY, filter: {totalAmountGte: "0"}', fields)['data']['orderStats']
+        self.assertEqual(rollup, scan)
+        self.assertEqual(rollup['rows'][0]['averageOrderValue'], '4.33')
+        self.assertEqual(rollup['totals'], {'orderCount': 3, 'revenue': '13.00', 'averageOrderValue': '4.33'})
+
+    def test_edits_move_rollup_between_days(self):
+        earlier = timezone.now() - timedelta(days=3)
+        order = Order.objects.get(total_amount=Decimal('4.00'))
+        order.total_amount = Decimal('10.00')
+        order.order_date = earlier
+        order.save()
+        customer = Customer.objects.get(name="Bob")
+        customer.created_at = earlier
+        customer.save()
+        edited = rollups.totals()
+        self.assertEqual(edited, {'orders': 3, 'revenue': Decimal('19.00'), 'customers': 2})
+        self.assertEqual(rollups.totals(end=timezone.localdate(earlier)),
+                         {'orders': 1, 'revenue': Decimal('10.00'), 'customers': 1})
+        rollups.rebuild()
+        self.assertEqual(rollups.totals(), edited)
+        self.assertEqual(rollups.totals(end=timezone.localdate(earlier))['orders'], 1)
+
+    def test_rejects_unknown_order(self):
+        self.assertIn('orderBy must be', self.stats('groupBy: WEEK, orderBy: "name"')['errors'][0]['message'])
+
+
+# -----------------------------
+# Synthetic data and benchmarks
+# -----------------------------
+class SeedTests(TestCase):
+    def test_seed_row_counts_and_products(self):
+        created = seed.seed(customers=20, products=5, orders=30, products_per_order=3, days=30, batch_size=7)
+        self.assertEqual(created, {Customer: 20, Product: 5, Order: 30})
+        self.assertEqual((Customer.objects.count(), Product.objects.count(), Order.objects.count()), (20, 5, 30))
+        Through = Order.products.through
+        self.assertEqual(Through.objects.values('order_id').distinct().count(), 30)
+        for order in Order.objects.prefetch_related('products'):
+            prices = [product.price for product in order.products.all()]
+            self.assertTrue(1 <= len(prices) <= 3)
+            self.assertEqual(order.total_amount, sum(prices))
+        # The generated dates are kept, and later creates are still stamped with now().
+        self.assertTrue(Customer.objects.filter(created_at__lt=timezone.now() - timedelta(days=1)).exists())
+        self.assertIsNotNone(Customer.objects.create(name="New", email="new@example.com").created_at)
+        self.assertEqual(rollups.totals()['orders'], 30)
+
+    def test_benchmark_needs_data(self):
+        with self.assertRaisesMessage(CommandError, "createOrder: no customers or products"):
+            call_command('benchmark_crm', '--operation', 'createOrder', '--iterations', '1', stdout=io.StringIO())
@@ -0,0 +1,157 @@
+import re
+import time
+from collections import defaultdict
+from contextlib import ExitStack, contextmanager
+from datetime import datetime, timezone
+
+from django.conf import settings
+from django.db import connections
+
+# -----------------------------
+# Resolver tracing
+# -----------------------------
+#
+# A Tracer is a graphene middleware that times every resolved field and, via
+# connection.execute_wrapper, charges each SQL query to the field whose
+# resolver was running when it executed. Querysets evaluated after their
+# resolver returned (plain list fields) are charged to the field that resolved
+# last. The report follows the Apollo tracing format (extensions.tracing) with
+# per-resolver sqlCount/sqlDuration, plus an extensions.sql summary.
+
+DEFAULTS = {
+    'ENABLED': False,
+    'HEADER': 'X-GraphQL-Tracing',
+    'N_PLUS_ONE_THRESHOLD': 3,
+}
+
+PLACEHOLDER_LIST = re.compile(r'\((?:%s, )+%s\)')
+
+
+def tracing_settings():
+    return {**DEFAULTS, **getattr(settings, 'GRAPHQL_TRACING', {})}
+
+
+def tracing_requested(request, config=None):
+    config = config or tracing_settings()
+    header = request.headers.get(config['HEADER'], '')
+    return config['ENABLED'] or header.lower() in ('1', 'true', 'yes')
+
+
+def sql_shape(sql):
+    """Normalize `sql` so queries differing only in IN-list length compare equal."""
+    return PLACEHOLDER_LIST.sub('(...)', sql)
+
+
+def field_key(path):
+    return '.'.join('*' if isinstance(part, int) else str(part) for part in path)
+
+
+def _iso(timestamp_ns):
+    return datetime.fromtimestamp(timestamp_ns / 1e9, tz=timezone.utc).isoformat().replace('+00:00', 'Z')
+
+
+class Tracer:
+    def __init__(self, n_plus_one_threshold=None):
+        if n_plus_one_threshold is None:
+            n_plus_one_threshold = tracing_settings()['N_PLUS_ONE_THRESHOLD']
+        self.n_plus_one_threshold = n_plus_one_threshold
+        self.resolvers = []
+        self.queries = []
+        self.phases = {}
+        self._stack = []
+        self._last = None
+        self.start_time = time.time_ns()
+        self.start = time.perf_counter_ns()
+        self.end = None
+
+    def offset(self):
+        return time.perf_counter_ns() - self.start
+
+    @contextmanager
+    def phase(self, name):
+        start = self.offset()
+        try:
+            yield
+        finally:
+            self.phases[name] = {'startOffset': start, 'duration': self.offset() - start}
+
+    # graphene middleware
+    def resolve(self, next, root, info, **args):
+        entry = {
+            'path': info.path.as_list(),
+            'parentType': info.parent_type.name,
+            'fieldName': info.field_name,
+            'returnType': str(info.return_type),
+            'startOffset': self.offset(),
+            'duration': 0,
+            'sqlCount': 0,
+            'sqlDuration': 0,
+        }
+        self.resolvers.append(entry)
+        self._stack.append(entry)
+        try:
+            return next(root, info, **args)
+        finally:
+            entry['duration'] = self.offset() - entry['startOffset']
+            self._stack.pop()
+            self._last = entry
+
+    # connection.execute_wrapper
+    def execute_wrapper(self, execute, sql, params, many, context):
+        entry = self._stack[-1] if self._stack else self._last
+        start = time.perf_counter_ns()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            duration = time.perf_counter_ns() - start
+            self.queries.append((entry, sql, duration))
+            if entry is not None:
+                entry['sqlCount'] += 1
+                entry['sqlDuration'] += duration
+
+    @contextmanager
+    def capture_sql(self):
+        with ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(self.execute_wrapper))
+            yield
+
+    def finish(self):
+        self.end = self.offset()
+
+    def n_plus_one(self):
+        """Return SQL shapes repeated for many items of one list field."""
+        paths = defaultdict(set)
+        counts = defaultdict(int)
+        for entry, sql, _duration in self.queries:
+            if entry is None or not any(isinstance(part, int) for part in entry['path']):
+                continue
+            key = (field_key(entry['path']), sql_shape(sql))
+            paths[key].add(tuple(entry['path']))
+            counts[key] += 1
+        return [
+            {'path': path, 'sql': sql, 'count': counts[path, sql]}
+            for (path, sql), seen in paths.items()
+            if len(seen) >= self.n_plus_one_threshold
+        ]
+
+    def report(self):
+        """Return (tracing, sql) response extensions."""
+        if self.end is None:
+            self.finish()
+        tracing = {
+            'version': 1,
+            'startTime': _iso(self.start_time),
+            'endTime': _iso(self.start_time + self.end),
+            'duration': self.end,
+            # Parsing and validation are cached together, see CachedGraphQLView.get_document.
+            'parsing': self.phases.get('parsing', {'startOffset': 0, 'duration': 0}),
+            'validation': self.phases.get('validation', {'startOffset': 0, 'duration': 0}),
+            'execution': {'resolvers': self.resolvers},
+        }
+        sql = {
+            'count': len(self.queries),
+            'duration': sum(duration for _entry, _sql, duration in self.queries),
+            'nPlusOne': self.n_plus_one(),
+        }
+        return tracing, sql
@@ -1,3 +1,496 @@
-from django.shortcuts import render
+import hashlib
+import inspect
+import json
+import time
+from contextlib import nullcontext
+from typing import NamedTuple
 
-# Create your views here.
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import connection, transaction
+from django.http import HttpResponse, HttpResponseNotAllowed
+from django.http.response import HttpResponseBadRequest
+from django.utils.decorators import method_decorator
+from django.views.decorators.csrf import ensure_csrf_cookie
+from graphene_django.constants import MUTATION_ERRORS_FLAG
+from graphene_django.settings import graphene_settings
+from graphene_django.utils.utils import set_rollback
+from graphene_django.views import GraphQLView, HttpError
+from graphql import ExecutionResult, OperationType, execute, get_operation_ast, parse, validate_schema
+from graphql.error import GraphQLError
+from graphql.validation import validate
+
+from . import cost, metrics, routing
+from .cache import LRUCache, response_cache
+from .tracing import Tracer, tracing_requested
+
+
+# -----------------------------
+# Document cache
+# -----------------------------
+def query_hash(query):
+    return hashlib.sha256(query.encode('utf-8')).hexdigest()
+
+
+document_cache = LRUCache(getattr(settings, 'GRAPHQL_DOCUMENT_CACHE_SIZE', 256), name='document')
+persisted_queries = LRUCache(getattr(settings, 'GRAPHQL_PERSISTED_QUERY_CACHE_SIZE', 1024), name='persisted_query')
+max_batch_size = getattr(settings, 'GRAPHQL_MAX_BATCH_SIZE', 10)
+mutation_error_middleware = metrics.MutationErrorMiddleware()
+
+
+def set_path(target, keys, value):
+    """Set target[k1][k2]...[kn] = value, with integer keys for list items."""
+    for key in keys[:-1]:
+        target = target[int(key) if isinstance(target, list) else key]
+    last = keys[-1]
+    target[int(last) if isinstance(target, list) else last] = value
+
+
+# -----------------------------
+# GraphQL views
+# -----------------------------
+class PreparedOperation(NamedTuple):
+    schema: object
+    document: object
+    key: str
+    operation_ast: object
+    variables: object
+    operation_name: object
+    cost: dict
+
+
+class CachedGraphQLView(GraphQLView):
+    """GraphQLView that reuses parsed and validated documents and supports persisted queries.
+
+    Clients may send `extensions.persistedQuery.sha256Hash` instead of the
+    query text. An unknown hash answers `PersistedQueryNotFound`, after which
+    the client resends the hash together with the query to register it.
+
+    Operations are checked against the GRAPHQL_QUERY_COST budget before they
+    run, and the computed cost is returned in `extensions.cost`. Requests with
+    an `X-GraphQL-Tracing: 1` header (or GRAPHQL_TRACING['ENABLED']) also get
+    Apollo-style resolver timings and SQL attribution, see crm/tracing.py.
+    Query operations read from a replica when CRM_DATABASE_ROUTING lists
+    any, see crm/routing.py.
+
+    A POST body that is a JSON array is a batch: its operations run in order
+    on one connection, each in its own transaction, and share the request
+    context, so loaders and other per-request caches are reused across them.
+    Batches are limited to GRAPHQL_MAX_BATCH_SIZE operations.
+    """
+
+    document_cache = document_cache
+    persisted_queries = persisted_queries
+    response_cache = response_cache
+    max_batch_size = max_batch_size
+    tracer = None
+    operation_ast = None
+    batch_wrote = False
+
+    def __init__(self, document_cache=None, persisted_queries=None, response_cache=None, **kwargs):
+        super().__init__(**kwargs)
+        self.document_cache = document_cache or self.document_cache
+        self.persisted_queries = persisted_queries or self.persisted_queries
+        self.response_cache = response_cache or self.response_cache
+
+    def is_batch_request(self, request):
+        """Whether the request body is a list of operations, checked without parsing it."""
+        if self.batch:
+            return True
+        if request.method.lower() != "post":
+            return False
+        content_type = self.get_content_type(request)
+        if content_type == "application/json":
+            body = request.body.lstrip()
+        elif content_type == "multipart/form-data":
+            body = request.POST.get("operations", "").lstrip().encode()
+        else:
+            return False
+        return body[:1] == b"["
+
+    @method_decorator(ensure_csrf_cookie)
+    def dispatch(self, request, *args, **kwargs):
+        if not self.is_batch_request(request):
+            return routing.remember_writes(request, super().dispatch(request, *args, **kwargs))
+        self.batch, self.graphiql = True, False
+        return routing.remember_writes(request, super().dispatch(request, *args, **kwargs))
+
+    def parse_body(self, request):
+        operations = self.parse_operations(request)
+        if self.batch:
+            if not isinstance(operations, list) or not all(isinstance(entry, dict) for entry in operations):
+                raise HttpError(HttpResponseBadRequest("Batch requests should receive a list of operations."))
+            if not operations:
+                raise HttpError(HttpResponseBadRequest("Received an empty list in the batch request."))
+            if len(operations) > self.max_batch_size:
+                raise HttpError(HttpResponseBadRequest(
+                    f"Batch of {len(operations)} operations exceeds the limit of {self.max_batch_size}."
+                ))
+        return operations
+
+    def parse_operations(self, request):
+        # GraphQL multipart request spec: an `operations` JSON body, a `map` from
+        # file field to variable paths (e.g. "variables.file"), and the files.
+        if self.get_content_type(request) != "multipart/form-data" or "operations" not in request.POST:
+            return super().parse_body(request)
+        try:
+            operations = json.loads(request.POST["operations"])
+            files_map = json.loads(request.POST.get("map") or "{}")
+        except ValueError:
+            raise HttpError(HttpResponseBadRequest("Multipart operations or map are invalid JSON."))
+        for field, paths in files_map.items():
+            if field not in request.FILES:
+                raise HttpError(HttpResponseBadRequest(f"File {field} is missing from the request."))
+            for path in paths:
+                try:
+                    set_path(operations, path.split("."), request.FILES[field])
+                except (KeyError, IndexError, TypeError, ValueError):
+                    raise HttpError(HttpResponseBadRequest(f"Invalid map path {path}."))
+        return operations
+
+    @staticmethod
+    def get_persisted_query(request, data):
+        extensions = request.GET.get('extensions') or data.get('extensions')
+        if extensions and isinstance(extensions, str):
+            try:
+                extensions = json.loads(extensions)
+            except ValueError:
+                raise HttpError(HttpResponseBadRequest("Extensions are invalid JSON."))
+        persisted = (extensions or {}).get('persistedQuery')
+        if not persisted:
+            return None
+        if persisted.get('version', 1) != 1 or not persisted.get('sha256Hash'):
+            raise HttpError(HttpResponseBadRequest("Unsupported persisted query."))
+        return persisted['sha256Hash']
+
+    def resolve_query(self, request, data, query):
+        """Return (query, hash) after applying the persisted query protocol."""
+        sha256_hash = self.get_persisted_query(request, data)
+        if sha256_hash is None:
+            return query, query_hash(query) if query else None
+        if query:
+            if query_hash(query) != sha256_hash:
+                raise GraphQLError("provided sha does not match query", extensions={'code': 'INVALID_SHA256_HASH'})
+            self.persisted_queries.set(sha256_hash, query)
+            return query, sha256_hash
+        query = self.persisted_queries.get(sha256_hash)
+        if query is None:
+            raise GraphQLError("PersistedQueryNotFound", extensions={'code': 'PERSISTED_QUERY_NOT_FOUND'})
+        return query, sha256_hash
+
+    def get_document(self, schema, query, key):
+        """Parse and validate `query`, reusing a cached result for the same text."""
+        cached = self.document_cache.get(key)
+        if cached is not None:
+            return cached
+        document = parse(query)
+        validation_errors = validate(
+            schema,
+            document,
+            self.validation_rules,
+            graphene_settings.MAX_VALIDATION_ERRORS,
+        )
+        cached = (document, validation_errors)
+        self.document_cache.set(key, cached)
+        return cached
+
+    def get_middleware(self, request):
+        middleware = [*(super().get_middleware(request) or ()), mutation_error_middleware]
+        if self.tracer is not None:
+            middleware.append(self.tracer)
+        return middleware
+
+    def trace(self, phase):
+        return self.tracer.phase(phase) if self.tracer is not None else nullcontext()
+
+    def prepare_request(self, request, data, query, variables, operation_name, show_graphiql=False):
+        """Resolve, parse, validate and price the operation.
+
+        Returns a PreparedOperation, or the ExecutionResult (or None) to answer
+        with when the operation must not run.
+        """
+        try:
+            query, key = self.resolve_query(request, data, query)
+        except GraphQLError as e:
+            return ExecutionResult(errors=[e])
+
+        if not query:
+            if show_graphiql:
+                return None
+            raise HttpError(HttpResponseBadRequest("Must provide query string."))
+
+        schema = self.schema.graphql_schema
+
+        schema_validation_errors = validate_schema(schema)
+        if schema_validation_errors:
+            return ExecutionResult(data=None, errors=schema_validation_errors)
+
+        try:
+            with self.trace('validation'):
+                document, validation_errors = self.get_document(schema, query, key)
+        except Exception as e:
+            return ExecutionResult(errors=[e])
+
+        operation_ast = self.operation_ast = get_operation_ast(document, operation_name)
+
+        if (
+            request.method.lower() == "get"
+            and operation_ast is not None
+            and operation_ast.operation != OperationType.QUERY
+        ):
+            if show_graphiql:
+                return None
+            raise HttpError(
+                HttpResponseNotAllowed(
+                    ["POST"],
+                    f"Can only perform a {operation_ast.operation.value} operation from a POST request.",
+                )
+            )
+
+        if validation_errors:
+            return ExecutionResult(data=None, errors=validation_errors)
+
+        cost_report = cost.analyze(schema, document, operation_name, variables)
+        cost_error = cost.check_cost(cost_report)
+        if cost_error is not None:
+            return ExecutionResult(errors=[cost_error], extensions={'cost': cost_report})
+
+        return PreparedOperation(schema, document, key, operation_ast, variables, operation_name, cost_report)
+
+    def execute_graphql_request(self, request, data, query, variables, operation_name, show_graphiql=False):
+        self.tracer = Tracer() if tracing_requested(request) else None
+        prepared = self.prepare_request(request, data, query, variables, operation_name, show_graphiql)
+        if not isinstance(prepared, PreparedOperation):
+            return prepared
+
+        extensions = {'cost': prepared.cost}
+        if self.tracer is None:
+            result = self.execute_document(request, prepared)
+        else:
+            with self.tracer.capture_sql():
+                result = self.execute_document(request, prepared)
+            extensions['tracing'], extensions['sql'] = self.tracer.report()
+        result.extensions = {**(result.extensions or {}), **extensions}
+        return result
+
+    def cached_response(self, prepared):
+        """Return (cache key, cached ExecutionResult or None); the key is None for uncacheable operations."""
+        # Traced requests always execute so their resolvers show up. After a
+        # mutation in a batch, cached responses may predate its writes.
+        if self.response_cache is None or self.tracer is not None or self.batch_wrote:
+            return None, None
+        tags = self.response_cache.plan(prepared.schema, prepared.document, prepared.key)
+        if tags is None:
+            return None, None
+        cache_key = self.response_cache.key(prepared.key, prepared.operation_name, prepared.variables, tags)
+        data = self.response_cache.get(cache_key)
+        return cache_key, (ExecutionResult(data=data) if data is not None else None)
+
+    def get_execute_options(self, request, prepared):
+        execute_options = {
+            "root_value": self.get_root_value(request),
+            "context_value": self.get_context(request),
+            "variable_values": prepared.variables,
+            "operation_name": prepared.operation_name,
+            "middleware": self.get_middleware(request),
+        }
+        if self.execution_context_class:
+            execute_options["execution_context_class"] = self.execution_context_class
+        return execute_options
+
+    @staticmethod
+    def is_atomic_mutation(operation_ast):
+        return (
+            operation_ast is not None
+            and operation_ast.operation == OperationType.MUTATION
+            and (
+                graphene_settings.ATOMIC_MUTATIONS is True
+                or connection.settings_dict.get("ATOMIC_MUTATIONS", False) is True
+            )
+        )
+
+    def execute_document(self, request, prepared):
+        """Run the operation on the database chosen by crm/routing.py."""
+        if not routing.is_read_only(prepared.operation_ast):
+            routing.pin(request)
+            return self.run_document(request, prepared)
+        alias = routing.replica_for(request)
+        with routing.read_from(alias):
+            result = self.run_document(request, prepared)
+        if routing.failed_on_replica(result, alias):
+            result = self.run_document(request, prepared)
+        return result
+
+    def run_document(self, request, prepared):
+        cache_key, cached = self.cached_response(prepared)
+        if cached is not None:
+            return cached
+
+        try:
+            execute_options = self.get_execute_options(request, prepared)
+
+            if self.is_atomic_mutation(prepared.operation_ast):
+                with transaction.atomic():
+                    result = execute(prepared.schema, prepared.document, **execute_options)
+                    if getattr(request, MUTATION_ERRORS_FLAG, False) is True:
+                        transaction.set_rollback(True)
+                return result
+
+            result = execute(prepared.schema, prepared.document, **execute_options)
+            if cache_key is not None and not result.errors:
+                self.response_cache.set(cache_key, result.data)
+            return result
+        except Exception as e:
+            return ExecutionResult(errors=[e])
+
+    def get_response(self, request, data, show_graphiql=False):
+        # Same as GraphQLView.get_response, but also returns result extensions
+        # and records request metrics.
+        query, variables, operation_name, id = self.get_graphql_params(request, data)
+
+        start = time.perf_counter()
+        # Each operation of a batch runs in its own transaction, so a failed one
+        # can neither undo nor break the operations around it.
+        with metrics.count_queries() as queries, (transaction.atomic() if self.batch else nullcontext()):
+            execution_result = self.execute_graphql_request(
+                request, data, query, variables, operation_name, show_graphiql
+            )
+        if execution_result is not None:
+            metrics.observe_request(self.operation_ast, execution_result, time.perf_counter() - start, queries.count)
+        response = self.format_response(request, execution_result, id, show_graphiql)
+        if self.batch:
+            self.end_batch_operation(request)
+        return response
+
+    def end_batch_operation(self, request):
+        """Reset per-operation request state before the next operation of a batch runs."""
+        if hasattr(request, MUTATION_ERRORS_FLAG):
+            delattr(request, MUTATION_ERRORS_FLAG)
+        if self.operation_ast is not None and self.operation_ast.operation == OperationType.MUTATION:
+            # Loaded rows may have changed; later operations must not read them from the loaders or the response cache.
+            request.__dict__.pop('_crm_loaders', None)
+            self.batch_wrote = True
+        self.operation_ast = None
+
+    def format_response(self, request, execution_result, id=None, show_graphiql=False):
+        if getattr(request, MUTATION_ERRORS_FLAG, False) is True:
+            set_rollback()
+
+        status_code = 200
+        if execution_result:
+            response = {}
+
+            if execution_result.errors:
+                set_rollback()
+                response["errors"] = [self.format_error(e) for e in execution_result.errors]
+
+            if execution_result.errors and any(not getattr(e, "path", None) for e in execution_result.errors):
+                status_code = 400
+            else:
+                response["data"] = execution_result.data
+
+            if execution_result.extensions:
+                response["extensions"] = execution_result.extensions
+
+            if self.batch:
+                response["id"] = id
+                response["status"] = status_code
+
+            result = self.json_encode(request, response, pretty=show_graphiql)
+        else:
+            result = None
+
+        return result, status_code
+
+
+class AsyncGraphQLView(CachedGraphQLView):
+    """CachedGraphQLView for ASGI: executes on the event loop with async resolvers.
+
+    Resolvers in crm/schema.py return awaitables on the event loop (see
+    crm/aio.py), so graphql-core gathers sibling fields concurrently and a
+    request holds no thread while it waits on the database or the client.
+    Traced requests, ATOMIC_MUTATIONS mutations and batches run on the sync
+    path in the request's database thread.
+    """
+
+    view_is_async = True
+
+    @method_decorator(ensure_csrf_cookie)
+    async def dispatch(self, request, *args, **kwargs):
+        if await sync_to_async(self.is_batch_request)(request):
+            # Batch operations run one after another, each in a transaction in the DB thread.
+            return await sync_to_async(super().dispatch)(request, *args, **kwargs)
+        try:
+            if request.method.lower() not in ("get", "post"):
+                raise HttpError(
+                    HttpResponseNotAllowed(["GET", "POST"], "GraphQL only supports GET and POST requests.")
+                )
+
+            data = self.parse_body(request)
+            if self.graphiql and self.can_display_graphiql(request, data):
+                return await sync_to_async(super().dispatch)(request, *args, **kwargs)
+
+            result, status_code = await self.aget_response(request, data)
+
+            response = HttpResponse(status=status_code, content=result, content_type="application/json")
+            return routing.remember_writes(request, response)
+
+        except HttpError as e:
+            response = e.response
+            response["Content-Type"] = "application/json"
+            response.content = self.json_encode(request, {"errors": [self.format_error(e)]})
+            return response
+
+    async def aget_response(self, request, data):
+        query, variables, operation_name, id = self.get_graphql_params(request, data)
+
+        start = time.perf_counter()
+        async with metrics.acount_queries() as queries:
+            execution_result = await self.aexecute_graphql_request(request, data, query, variables, operation_name)
+        if execution_result is not None:
+            metrics.observe_request(self.operation_ast, execution_result, time.perf_counter() - start, queries.count)
+        return self.format_response(request, execution_result, id)
+
+    async def aexecute_graphql_request(self, request, data, query, variables, operation_name):
+        if tracing_requested(request):
+            # Resolver timings need sequential execution.
+            return await sync_to_async(self.execute_graphql_request)(request, data, query, variables, operation_name)
+
+        self.tracer = None
+        prepared = self.prepare_request(request, data, query, variables, operation_name)
+        if not isinstance(prepared, PreparedOperation):
+            return prepared
+
+        if self.is_atomic_mutation(prepared.operation_ast):
+            result = await sync_to_async(self.execute_document)(request, prepared)
+        else:
+            result = await self.aexecute_document(request, prepared)
+        result.extensions = {**(result.extensions or {}), 'cost': prepared.cost}
+        return result
+
+    async def aexecute_document(self, request, prepared):
+        if not routing.is_read_only(prepared.operation_ast):
+            routing.pin(request)
+            return await self.arun_document(request, prepared)
+        # Connecting to a replica is blocking; do it in the request's DB thread.
+        alias = await sync_to_async(routing.replica_for)(request)
+        with routing.read_from(alias):
+            result = await self.arun_document(request, prepared)
+        if routing.failed_on_replica(result, alias):
+            result = await self.arun_document(request, prepared)
+        return result
+
+    async def arun_document(self, request, prepared):
+        cache_key, cached = self.cached_response(prepared)
+        if cached is not None:
+            return cached
+
+        try:
+            result = execute(prepared.schema, prepared.document, **self.get_execute_options(request, prepared))
+            if inspect.isawaitable(result):
+                result = await result
+        except Exception as e:
+            return ExecutionResult(errors=[e])
+        if cache_key is not None and not result.errors:
+            self.response_cache.set(cache_key, result.data)
+        return result